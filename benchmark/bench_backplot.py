@@ -0,0 +1,77 @@
+"""Times the back-plot verifier against generating the G-code it checks, for single codes across versions and
+emitters, and for a plate of version 40 codes. The parse column is the share spent tracing the program. For plates,
+verification includes encoding the texts again to get each code's modules.
+Run from the repository root: python -m benchmark.bench_backplot"""
+from time import perf_counter
+
+from qrcodegen import QrCode
+
+from benchmark.corpus import make_qr
+from src.platform.backplot import parse_moves
+from src.platform.vectorize_helper import QrValueTable, Point
+from src.platform.line_path import LinePath, Strategy
+from src.platform.machinify_vector import MachinifyVector, Tool, EngraveParams
+from src.platform.plate_job import PlateJob
+from src.platform.subprogram import SubprogramDialect
+from src.platform.postprocessor.linuxcnc import LinuxCncPostProcessor
+
+REPEATS = 5
+
+
+def make_machinify(version, option):
+    table = QrValueTable()
+    table.set_qr(make_qr(version))
+    machinify = MachinifyVector(1.2)
+    machinify.set_qr_path(LinePath(table, Strategy.RUN_LENGTH))
+    machinify.set_tool(Tool(dia=1))
+    machinify.set_engrave_params(EngraveParams())
+    machinify.set_xy_zero(Point(0, 0))
+    if option == 'stay_down':
+        machinify.set_stay_down(True)
+    elif option == 'm98':
+        machinify.set_subprogram_dialect(SubprogramDialect.M98)
+    elif option == 'linuxcnc_g81':
+        machinify.set_post_processor(LinuxCncPostProcessor())
+    return machinify
+
+
+def make_plate():
+    plate = PlateJob(1.2, 400, 400)
+    plate.set_ecc(QrCode.Ecc.LOW)
+    plate.set_tool(Tool(dia=1))
+    plate.set_engrave_params(EngraveParams())
+    plate.set_xy_zero(Point(0, 0))
+    plate.set_texts(['{:0>7000}'.format(number) for number in range(4)])  # four version 40 codes
+    return plate
+
+
+def best_ms(function):
+    best = float('inf')
+    for _ in range(REPEATS):
+        start = perf_counter()
+        function()
+        best = min(best, perf_counter() - start)
+    return best * 1000
+
+
+def report(name, machinify):
+    gcode = machinify.generate_gcode().getvalue()  # plans the path outside of the measurement
+    generate_ms = best_ms(machinify.generate_gcode)
+    parse_ms = best_ms(lambda: parse_moves(gcode))
+    verify_ms = best_ms(lambda: machinify.verify_gcode(gcode))
+    result = machinify.verify_gcode(gcode)
+    print('{:22s}  {:6d}  {:11.1f}  {:8.1f}  {:9.1f}  {:2s}  {}'.format(
+        name, gcode.count('\n'), generate_ms, parse_ms, verify_ms, 'ok' if result.is_ok() else '!!',
+        len(result.double_cut)))
+
+
+def main():
+    print('job                      lines  generate_ms  parse_ms  verify_ms      double_cuts')
+    for version in (10, 25, 40):
+        for option in ('plain', 'stay_down', 'm98', 'linuxcnc_g81'):
+            report('v{} {}'.format(version, option), make_machinify(version, option))
+    report('plate 4 x v40', make_plate())
+
+
+if __name__ == '__main__':
+    main()
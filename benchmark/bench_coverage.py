@@ -0,0 +1,52 @@
+"""Compares the default module pitch, the width a V-bit cuts, with the largest pitch that still cuts every dark
+module fully, for codes across versions and strategies: the weakest module's cut share, the redundant and
+crossing area of passes that cut the same spot twice, the area cut into light modules, and the estimated job
+duration. The last columns time the coverage analysis and the pitch search.
+Run from the repository root: python -m benchmark.bench_coverage"""
+from time import perf_counter
+
+from benchmark.corpus import make_qr
+from src.platform.vectorize_helper import QrValueTable, Point
+from src.platform.line_path import LinePath, Strategy
+from src.platform.machinify_vector import MachinifyVector, Tool, EngraveParams
+
+STRATEGIES = {'run_length': Strategy.RUN_LENGTH, 'min_plunge': Strategy.MIN_PLUNGE,
+              'serpentine': Strategy.SERPENTINE}
+
+
+def make_machinify(version, strategy):
+    table = QrValueTable()
+    table.set_qr(make_qr(version))
+    machinify = MachinifyVector(1.2)
+    machinify.set_qr_path(LinePath(table, STRATEGIES[strategy]))
+    machinify.set_tool(Tool(dia=3, angle=60, tip=0.1))
+    machinify.set_engrave_params(EngraveParams())
+    machinify.set_xy_zero(Point(0, 0))
+    return machinify
+
+
+def report(name, machinify):
+    start = perf_counter()
+    coverage = machinify.get_coverage()
+    analyze_ms = (perf_counter() - start) * 1000
+    start = perf_counter()
+    pitch = machinify.suggest_pitch()
+    suggest_ms = (perf_counter() - start) * 1000
+    for label, setting in (('width', None), ('suggested', pitch)):
+        machinify.set_pitch(setting)
+        coverage = machinify.get_coverage()
+        print('{:16s}  {:9s}  {:8.3f}  {:8.3f}  {:13.2f}  {:13.2f}  {:12.2f}  {:>8s}  {:10.1f}  {:10.1f}'.format(
+            name, label, coverage.pitch, coverage.min_dark_fraction, coverage.redundant_area, coverage.crossing_area,
+            coverage.overcut_area, str(machinify.get_job_duration_sec()), analyze_ms, suggest_ms))
+
+
+def main():
+    print('job               pitch      pitch_mm  min_dark  redundant_mm2  crossing_mm2  overcut_mm2  duration  '
+          'analyze_ms  suggest_ms')
+    for version in (2, 10, 25, 40):
+        for strategy in STRATEGIES:
+            report('v{} {}'.format(version, strategy), make_machinify(version, strategy))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+"""Reports G-code program size with and without modal compaction, in bytes and lines, on its own and combined with
+stay-down linking.
+Run from the repository root: python -m benchmark.bench_gcode_compact"""
+from io import StringIO
+
+from benchmark.corpus import make_qr
+from src.platform.vectorize_helper import QrValueTable, Point
+from src.platform.line_path import LinePath, Strategy
+from src.platform.machinify_vector import MachinifyVector, Tool, EngraveParams
+
+
+def measure(machinify, compact, stay_down):
+    machinify.set_compact(compact)
+    machinify.set_stay_down(stay_down)
+    gcode = StringIO()
+    machinify.write_gcode(gcode)
+    program = gcode.getvalue()
+    return len(program.encode('ascii')), program.count('\n')
+
+
+def main():
+    print('version  stay_down  full_kB  compact_kB  bytes_saved  full_lines  compact_lines  lines_eliminated')
+    for version in (10, 25, 40):
+        table = QrValueTable()
+        table.set_qr(make_qr(version))
+        machinify = MachinifyVector(1.2)
+        machinify.set_qr_path(LinePath(table, Strategy.RUN_LENGTH))
+        machinify.set_tool(Tool(dia=1.5))
+        machinify.set_engrave_params(EngraveParams())
+        machinify.set_xy_zero(Point(6.21, -17.21))
+        for stay_down in (False, True):
+            full_bytes, full_lines = measure(machinify, False, stay_down)
+            compact_bytes, compact_lines = measure(machinify, True, stay_down)
+            print('{:7d}  {:9s}  {:7.1f}  {:10.1f}  {:10.1%}  {:10d}  {:13d}  {:16d}'.format(
+                version, str(stay_down), full_bytes / 1024, compact_bytes / 1024, 1 - compact_bytes / full_bytes,
+                full_lines, compact_lines, full_lines - compact_lines))
+
+
+if __name__ == '__main__':
+    main()
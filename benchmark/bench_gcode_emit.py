@@ -0,0 +1,82 @@
+"""Reports G-code emission speed in lines per second: the per-segment round()/str() emitter as it was before versus
+the GcodeEmitter that assembles moves from precomputed coordinate strings. Both are timed with a flat and a
+tapered tool, the latter making the per-segment tool step computation more expensive.
+Run from the repository root: python -m benchmark.bench_gcode_emit"""
+from math import tan, pi
+from timeit import timeit
+
+from benchmark.corpus import make_qr
+from src.platform.vectorize_helper import QrValueTable, Point
+from src.platform.line_path import LinePath, Strategy
+from src.platform.machinify_vector import MachinifyVector, Tool, EngraveParams
+
+
+class LegacyEmitter:
+    """Reference: MachinifyVector's engrave methods as they were before."""
+
+    def __init__(self, tool, engrave_params, xy_zero):
+        self._tool = tool
+        self._engrave_params = engrave_params
+        self._xy_zero = xy_zero
+
+    def _get_xy_move_per_step(self):
+        if self._tool.angle > 0:
+            tan_angle = tan(self._tool.angle / 360 * pi)
+            dia = self._tool.tip + 2 * self._engrave_params.z_engrave * tan_angle
+            if dia >= self._tool.diameter:
+                return self._tool.diameter
+            return dia
+        else:
+            return self._tool.diameter
+
+    def engrave(self, line_segment):
+        cmd = ''
+        tool_step = self._get_xy_move_per_step()
+        qrpos_x = round(line_segment.position.x * tool_step + self._xy_zero.x, 3)
+        qrpos_y = round(-line_segment.position.y * tool_step + self._xy_zero.y, 3)
+        cmd += 'G00 X' + str(qrpos_x) + \
+               ' Y' + str(qrpos_y) + '\n'
+        cmd += 'G01 Z-' + str(self._engrave_params.z_engrave) + ' F' + str(self._tool.fz) + '\n'
+        if line_segment.y_length != 0:
+            cmd += 'G01 Y' + str(round(qrpos_y - line_segment.y_length * tool_step, 3))
+            cmd += ' F' + str(self._tool.fxy) + '\n'
+        elif line_segment.x_length != 0:
+            cmd += 'G01 X' + str(round(qrpos_x + line_segment.x_length * tool_step, 3))
+            cmd += ' F' + str(self._tool.fxy) + '\n'
+        cmd += 'G00 Z' + str(self._engrave_params.z_hover) + '\n'
+        return cmd
+
+    def gcode_engrave(self, segments):
+        engrave = ''
+        for segment in segments:
+            engrave += self.engrave(segment)
+        return engrave
+
+
+def main():
+    tools = (('flat', Tool(dia=1.5)), ('tapered', Tool(dia=3.175, angle=30, tip=0.2)))
+    xy_zero = Point(6.21, -17.21)
+    engrave_params = EngraveParams()
+    print('version  tool     lines  legacy_klines/s  lattice_klines/s  speedup')
+    for version in (10, 25, 40):
+        table = QrValueTable()
+        table.set_qr(make_qr(version))
+        path = LinePath(table, Strategy.RUN_LENGTH)
+        segments = path.get_vectors()
+        for name, tool in tools:
+            machinify = MachinifyVector(1.2)
+            machinify.set_qr_path(path)
+            machinify.set_tool(tool)
+            machinify.set_engrave_params(engrave_params)
+            machinify.set_xy_zero(xy_zero)
+            legacy = LegacyEmitter(tool, engrave_params, xy_zero)
+            lines = machinify._gcode_engrave().count('\n')
+
+            legacy_sec = timeit(lambda: legacy.gcode_engrave(segments), number=5) / 5
+            lattice_sec = timeit(machinify._gcode_engrave, number=5) / 5
+            print('{:7d}  {:7s}  {:5d}  {:15.0f}  {:16.0f}  {:7.1f}'.format(
+                version, name, lines, lines / legacy_sec / 1000, lines / lattice_sec / 1000, legacy_sec / lattice_sec))
+
+
+if __name__ == '__main__':
+    main()
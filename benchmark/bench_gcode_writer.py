@@ -0,0 +1,64 @@
+"""Reports peak memory and time of writing a G-code program to a file: building the whole program in a StringIO and
+copying it to the file, as the GUI did before, versus streaming it through MachinifyVector.write_gcode.
+Run from the repository root: python -m benchmark.bench_gcode_writer"""
+import os
+import tempfile
+import tracemalloc
+from shutil import copyfileobj
+from time import perf_counter
+
+from benchmark.corpus import make_qr
+from src.platform.vectorize_helper import QrValueTable, Point
+from src.platform.line_path import LinePath, Strategy
+from src.platform.machinify_vector import MachinifyVector, Tool, EngraveParams
+
+
+def make_machinify(version):
+    table = QrValueTable()
+    table.set_qr(make_qr(version))
+    machinify = MachinifyVector(1.2)
+    machinify.set_qr_path(LinePath(table, Strategy.RUN_LENGTH))
+    machinify.set_tool(Tool())
+    machinify.set_engrave_params(EngraveParams())
+    machinify.set_xy_zero(Point(0, 0))
+    machinify.get_job_duration_sec()  # plans the path outside of the measurement
+    return machinify
+
+
+def copy_to_file(machinify, path):
+    gcode = machinify.generate_gcode()
+    with open(path, 'w') as file:
+        gcode.seek(0)
+        copyfileobj(gcode, file)
+
+
+def stream_to_file(machinify, path):
+    with open(path, 'w') as file:
+        machinify.write_gcode(file)
+
+
+def measure(writer, machinify, path):
+    tracemalloc.start()
+    start = perf_counter()
+    writer(machinify, path)
+    elapsed = perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak, elapsed
+
+
+def main():
+    print('version  program_kB  copy_peak_kB  stream_peak_kB  copy_ms  stream_ms')
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench.tap')
+        for version in (10, 25, 40):
+            machinify = make_machinify(version)
+            copy_peak, copy_sec = measure(copy_to_file, machinify, path)
+            stream_peak, stream_sec = measure(stream_to_file, machinify, path)
+            print('{:7d}  {:10.0f}  {:12.0f}  {:14.0f}  {:7.1f}  {:9.1f}'.format(
+                version, os.path.getsize(path) / 1024, copy_peak / 1024, stream_peak / 1024,
+                copy_sec * 1000, stream_sec * 1000))
+
+
+if __name__ == '__main__':
+    main()
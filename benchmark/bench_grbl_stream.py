@@ -0,0 +1,53 @@
+"""Streams a fine QR-code engraving to the GRBL simulator with both protocols and reports how well each keeps the
+machine busy, for two USB latencies (FTDI adapters default to a 16 ms latency timer, CH340 answer within ~1 ms).
+Run from the repository root, on a system with pseudo terminals: python -m benchmark.bench_grbl_stream"""
+from time import monotonic, sleep
+
+from benchmark.corpus import make_qr
+from src.platform.vectorize_helper import QrValueTable, Point
+from src.platform.line_path import LinePath, Strategy
+from src.platform.machinify_vector import MachinifyVector, Tool, EngraveParams
+from src.platform.postprocessor.grbl import GrblPostProcessor
+from src.platform.grbl_sender import GrblSender, StreamProtocol, open_port
+from src.platform.grbl_simulator import GrblSimulator
+
+
+def make_program(version):
+    table = QrValueTable()
+    table.set_qr(make_qr(version))
+    machinify = MachinifyVector(1.2)
+    machinify.set_qr_path(LinePath(table, Strategy.RUN_LENGTH))
+    machinify.set_tool(Tool(dia=0.2, fxy=4000, fz=2000))
+    machinify.set_engrave_params(EngraveParams(0.1, 0.2, 1))
+    machinify.set_xy_zero(Point(0, 0))
+    machinify.set_post_processor(GrblPostProcessor(strip_comments=True))
+    return machinify.generate_gcode().getvalue().splitlines()
+
+
+def stream(lines, protocol, latency):
+    with GrblSimulator(response_latency=latency) as simulator:
+        port = open_port(simulator.get_port_path())
+        sender = GrblSender(port, protocol, response_timeout=5)
+        start = monotonic()
+        sender.stream(lines)
+        while not simulator.is_idle():
+            sleep(0.0005)
+        seconds = monotonic() - start
+        port.close()
+        return seconds, simulator.get_busy_time(), simulator.get_overflow_count()
+
+
+def main():
+    lines = make_program(2)
+    print('{} lines per run'.format(len(lines)))
+    print('latency_ms  protocol            job_sec  moving_sec  utilization  lines/s  overflows')
+    for latency in (0.001, 0.016):
+        for name, protocol in (('send-response', StreamProtocol.SEND_RESPONSE),
+                               ('char-counting', StreamProtocol.CHARACTER_COUNTING)):
+            seconds, busy, overflows = stream(lines, protocol, latency)
+            print('{:10.0f}  {:16s}  {:8.2f}  {:10.2f}  {:11.1%}  {:7.0f}  {:9d}'.format(
+                latency * 1000, name, seconds, busy, busy / seconds, len(lines) / seconds, overflows))
+
+
+if __name__ == '__main__':
+    main()
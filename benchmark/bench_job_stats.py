@@ -0,0 +1,63 @@
+"""Times what a GUI status update costs: job dimensions and duration, with the path geometry walked on every update
+as before, versus derived from cached job statistics. Also times an update after a feed change.
+Run from the repository root: python -m benchmark.bench_job_stats"""
+from time import perf_counter
+
+from benchmark.corpus import make_qr
+from src.platform.vectorize_helper import QrValueTable, Point
+from src.platform.line_path import LinePath, Strategy
+from src.platform.machinify_vector import MachinifyVector, Tool, EngraveParams
+from src.platform.kinematics import MachineProfile
+
+UPDATES = 50
+
+
+def make_machinify(version, stay_down, profile):
+    table = QrValueTable()
+    table.set_qr(make_qr(version))
+    machinify = MachinifyVector(1.2)
+    machinify.set_qr_path(LinePath(table, Strategy.RUN_LENGTH))
+    machinify.set_tool(Tool(dia=1))
+    machinify.set_engrave_params(EngraveParams())
+    machinify.set_xy_zero(Point(0, 0))
+    machinify.set_stay_down(stay_down)
+    machinify.set_machine_profile(profile)
+    return machinify
+
+
+def update_status(machinify):
+    machinify.get_dimension_info()
+    machinify.get_job_duration_sec()
+
+
+def main():
+    print('{} status updates per run'.format(UPDATES))
+    print('version  stay_down  profile  uncached_ms  cached_ms  feed_change_ms  recomputed  reused')
+    for version in (10, 25, 40):
+        for stay_down in (False, True):
+            for profile in (None, MachineProfile()):
+                machinify = make_machinify(version, stay_down, profile)
+                update_status(machinify)  # plans the path outside of the measurement
+                start = perf_counter()
+                for _ in range(UPDATES):
+                    machinify._stats = None  # forces the geometry walk of every update before caching
+                    update_status(machinify)
+                uncached_ms = (perf_counter() - start) * 1000 / UPDATES
+                machinify = make_machinify(version, stay_down, profile)
+                update_status(machinify)
+                start = perf_counter()
+                for _ in range(UPDATES):
+                    update_status(machinify)
+                cached_ms = (perf_counter() - start) * 1000 / UPDATES
+                start = perf_counter()
+                for feed in range(UPDATES):
+                    machinify.set_tool(Tool(dia=1, fxy=1000 + feed))
+                    update_status(machinify)
+                feed_ms = (perf_counter() - start) * 1000 / UPDATES
+                print('{:7d}  {:9s}  {:7s}  {:11.2f}  {:9.3f}  {:14.3f}  {:10d}  {:6d}'.format(
+                    version, str(stay_down), 'yes' if profile else 'no', uncached_ms, cached_ms, feed_ms,
+                    machinify.get_stats_recomputed(), machinify.get_stats_reused()))
+
+
+if __name__ == '__main__':
+    main()
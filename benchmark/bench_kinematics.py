@@ -0,0 +1,81 @@
+"""Compares the job duration estimate of path length over feed times a fixed factor with the kinematic estimate of a
+machine profile, and times the vectorized kinematic model against a move-by-move planner loop.
+Run from the repository root: python -m benchmark.bench_kinematics"""
+from math import sqrt
+from time import perf_counter
+
+from benchmark.corpus import make_qr
+from src.platform.vectorize_helper import QrValueTable, Point
+from src.platform.line_path import LinePath, Strategy
+from src.platform.machinify_vector import MachinifyVector, Tool, EngraveParams
+from src.platform.kinematics import MachineProfile, KinematicModel, engrave_moves
+
+
+def loop_duration(profile, deltas, feeds):
+    """Reference: the same junction deviation planner, one move at a time."""
+    rates = (profile.rapid_xy / 60, profile.rapid_xy / 60, profile.rapid_z / 60)
+    accels = (profile.accel_xy, profile.accel_xy, profile.accel_z)
+    moves = []
+    for delta, feed in zip(deltas.tolist(), feeds.tolist()):
+        length = sqrt(sum(value * value for value in delta))
+        unit = [value / length for value in delta]
+        v_max = min([feed / 60] + [rate / abs(u) for rate, u in zip(rates, unit) if u])
+        accel = min(limit / abs(u) for limit, u in zip(accels, unit) if u)
+        moves.append((length, unit, v_max, accel))
+    limits = [0.0]
+    for previous, move in zip(moves, moves[1:]):
+        cos_theta = -sum(a * b for a, b in zip(previous[1], move[1]))
+        sin_half = sqrt(max(0.0, min(1.0, 0.5 * (1 - cos_theta))))
+        junction = float('inf') if sin_half >= 1 else \
+            min(previous[3], move[3]) * profile.junction_deviation * sin_half / (1 - sin_half)
+        limits.append(min(junction, previous[2] ** 2, move[2] ** 2))
+    limits.append(0.0)
+    entry = list(limits)
+    for index, move in enumerate(moves):  # forward pass
+        entry[index + 1] = min(entry[index + 1], entry[index] + 2 * move[3] * move[0])
+    for index in range(len(moves) - 1, -1, -1):  # backward pass
+        entry[index] = min(entry[index], entry[index + 1] + 2 * moves[index][3] * moves[index][0])
+    seconds = 0
+    for index, (length, _, v_max, accel) in enumerate(moves):
+        v0, v1 = entry[index], entry[index + 1]
+        peak = min(v_max ** 2, (2 * accel * length + v0 + v1) / 2)
+        cruise = max(0.0, length - (2 * peak - v0 - v1) / (2 * accel))
+        seconds += (2 * sqrt(peak) - sqrt(v0) - sqrt(v1)) / accel + cruise / sqrt(peak)
+    return seconds
+
+
+def main():
+    profile = MachineProfile()
+    print('profile: rapid {}/{} mm/min, accel {}/{} mm/s^2, junction deviation {} mm'.format(
+        profile.rapid_xy, profile.rapid_z, profile.accel_xy, profile.accel_z, profile.junction_deviation))
+    print('version  stay_down  moves  length_over_feed  x1.6_estimate  kinematic  implied_factor  '
+          'vector_ms  loop_ms')
+    for version in (5, 10, 25, 40):
+        table = QrValueTable()
+        table.set_qr(make_qr(version))
+        machinify = MachinifyVector(1.2)
+        machinify.set_qr_path(LinePath(table, Strategy.RUN_LENGTH))
+        machinify.set_tool(Tool(dia=1))
+        machinify.set_engrave_params(EngraveParams())
+        machinify.set_xy_zero(Point(0, 0))
+        for stay_down in (False, True):
+            machinify.set_stay_down(stay_down)
+            machinify.set_machine_profile(None)
+            fudged = machinify.get_job_duration_sec().total_seconds()
+            toolpath, plunges = machinify._get_machining_order()
+            deltas, feeds = engrave_moves(toolpath, plunges, 1, machinify._engrave_params, machinify._tool)
+            start = perf_counter()
+            kinematic = KinematicModel(profile).get_duration(deltas, feeds)
+            vector_ms = (perf_counter() - start) * 1000
+            start = perf_counter()
+            reference = loop_duration(profile, deltas, feeds)
+            loop_ms = (perf_counter() - start) * 1000
+            assert abs(kinematic - reference) < 1e-6 * reference
+            plain = fudged / 1.6
+            print('{:7d}  {:9s}  {:5d}  {:16.0f}  {:13.0f}  {:9.0f}  {:14.2f}  {:9.1f}  {:7.1f}'.format(
+                version, str(stay_down), len(deltas), plain, fudged, kinematic, kinematic / plain, vector_ms,
+                loop_ms))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,26 @@
+"""Compares the planning time of the LinePath strategies on QR-codes of several versions.
+Run from the repository root: python -m benchmark.bench_line_path"""
+from timeit import timeit
+
+from benchmark.corpus import make_qr
+from src.platform.vectorize_helper import QrValueTable
+from src.platform.line_path import LinePath, Strategy
+
+
+def plan_ms(table, strategy, repeat=5):
+    return timeit(lambda: LinePath(table.copy(), strategy).get_vectors(), number=repeat) / repeat * 1000
+
+
+def main():
+    print('version  size  segments  serpentine_ms  run_length_ms')
+    for version in (1, 5, 10, 20, 30, 40):
+        table = QrValueTable()
+        table.set_qr(make_qr(version))
+        segments = len(LinePath(table.copy(), Strategy.RUN_LENGTH).get_vectors())
+        print('{:7d}  {:4d}  {:8d}  {:13.2f}  {:13.2f}'.format(
+            version, table.size, segments,
+            plan_ms(table, Strategy.SERPENTINE), plan_ms(table, Strategy.RUN_LENGTH)))
+
+
+if __name__ == '__main__':
+    main()
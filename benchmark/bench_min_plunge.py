@@ -0,0 +1,31 @@
+"""Compares the number of segments, i.e. plunge and retract cycles, of the greedy serpentine planner against the
+minimum plunge decomposition on a corpus of real codes.
+Run from the repository root: python -m benchmark.bench_min_plunge"""
+from timeit import timeit
+
+from benchmark.corpus import make_real_qrs
+from src.platform.vectorize_helper import QrValueTable
+from src.platform.line_path import LinePath, Strategy
+
+
+def main():
+    print('version  ecc  greedy  min_plunge  saved_%  min_plunge_ms  text')
+    total_greedy = 0
+    total_min = 0
+    for text, ecc, qr in make_real_qrs():
+        table = QrValueTable()
+        table.set_qr(qr)
+        greedy = len(LinePath(table.copy(), Strategy.RUN_LENGTH).get_vectors())
+        minimal = len(LinePath(table.copy(), Strategy.MIN_PLUNGE).get_vectors())
+        duration_ms = timeit(lambda: LinePath(table.copy(), Strategy.MIN_PLUNGE).get_vectors(), number=3) / 3 * 1000
+        total_greedy += greedy
+        total_min += minimal
+        print('{:7d}  {:>3}  {:6d}  {:10d}  {:7.1f}  {:13.2f}  {}'.format(
+            qr.get_version(), 'LMQH'[ecc.ordinal], greedy, minimal, 100 * (greedy - minimal) / greedy, duration_ms,
+            text[:30].replace('\n', ' ')))
+    print('total    {:11d}  {:10d}  {:7.1f}'.format(total_greedy, total_min,
+                                                    100 * (total_greedy - total_min) / total_greedy))
+
+
+if __name__ == '__main__':
+    main()
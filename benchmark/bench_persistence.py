@@ -0,0 +1,56 @@
+"""Times what the GUI's persistence saves cost the Tk thread. Each status update saves the tool list, engrave
+parameters, and XY0. The bursts replay status updates where nothing changed and ones where the XY0 offset changed each
+time. The table compares writing within save() with the write-behind default, and counts the writes of each.
+Run from the repository root: python -m benchmark.bench_persistence"""
+import os
+import tempfile
+from time import perf_counter
+
+from src.helpers.persistence import Persistence, WRITE_DELAY
+from src.platform.machinify_vector import Tool, ToolList, EngraveParams
+from src.platform.vectorize_helper import Point
+
+UPDATES = 300
+
+
+def make_tool_list():
+    tool_list = ToolList()
+    for number in range(1, 21):
+        tool_list.add_or_update(Tool(number, 'Tool', number / 4, angle=60 if number % 2 else 0, tip=0.1))
+    tool_list.select_tool(3)
+    return tool_list
+
+
+def replay(delay, changing):
+    """:returns tuple: milliseconds spent in save() per status update, and the number of writes"""
+    Persistence.set_write_delay(delay)
+    tool_list = make_tool_list()
+    engrave = EngraveParams()
+    writes = Persistence.get_write_count()
+    start = perf_counter()
+    for update in range(UPDATES):
+        Persistence.save(tool_list)
+        Persistence.save(engrave)
+        Persistence.save(Point(update if changing else 0, 0))
+    elapsed = perf_counter() - start
+    Persistence.flush()
+    return tuple((elapsed * 1000 / UPDATES, Persistence.get_write_count() - writes))
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        path = Persistence.get_path()
+        print('updates            mode          ms/update  writes')
+        for changing in (False, True):
+            for mode, delay in (('in save()', 0), ('write-behind', WRITE_DELAY)):
+                Persistence.set_path(os.path.join(directory, 'persistence.dat'))
+                milliseconds, writes = replay(delay, changing)
+                updates = 'XY0 changing' if changing else 'unchanged'
+                print('{:17s}  {:12s}  {:9.3f}  {:6d}'.format(updates, mode, milliseconds, writes))
+                os.remove(Persistence.get_path())
+        Persistence.set_write_delay(WRITE_DELAY)
+        Persistence.set_path(path)
+
+
+if __name__ == '__main__':
+    main()
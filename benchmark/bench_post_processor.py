@@ -0,0 +1,48 @@
+"""Reports program size, line count, and generation time of each post-processor dialect, with and without
+comments, and with the throughput options of each dialect.
+Run from the repository root: python -m benchmark.bench_post_processor"""
+from io import StringIO
+from time import perf_counter
+
+from benchmark.corpus import make_qr
+from src.platform.vectorize_helper import QrValueTable, Point
+from src.platform.line_path import LinePath, Strategy
+from src.platform.machinify_vector import MachinifyVector, Tool, EngraveParams
+from src.platform.postprocessor.post_processor import PostProcessor
+from src.platform.postprocessor.grbl import GrblPostProcessor
+from src.platform.postprocessor.linuxcnc import LinuxCncPostProcessor
+from src.platform.postprocessor.fanuc import FanucPostProcessor
+
+POST_PROCESSORS = (('default', PostProcessor()),
+                   ('grbl', GrblPostProcessor()),
+                   ('grbl_strip', GrblPostProcessor(strip_comments=True)),
+                   ('linuxcnc_plain', LinuxCncPostProcessor(canned_cycles=False)),
+                   ('linuxcnc', LinuxCncPostProcessor()),
+                   ('fanuc_plain', FanucPostProcessor(canned_cycles=False)),
+                   ('fanuc', FanucPostProcessor()))
+
+
+def main():
+    print('version  dialect         program_kB  lines  longest  emit_ms')
+    for version in (10, 25, 40):
+        table = QrValueTable()
+        table.set_qr(make_qr(version))
+        machinify = MachinifyVector(1.2)
+        machinify.set_qr_path(LinePath(table, Strategy.RUN_LENGTH))
+        machinify.set_tool(Tool(dia=1.5))
+        machinify.set_engrave_params(EngraveParams())
+        machinify.set_xy_zero(Point(6.21, -17.21))
+        machinify.get_job_duration_sec()  # plans the path outside of the measurement
+        for name, post_processor in POST_PROCESSORS:
+            machinify.set_post_processor(post_processor)
+            gcode = StringIO()
+            start = perf_counter()
+            machinify.write_gcode(gcode)
+            emit_ms = (perf_counter() - start) * 1000
+            lines = gcode.getvalue().splitlines()
+            print('{:7d}  {:14s}  {:10.1f}  {:5d}  {:7d}  {:7.2f}'.format(
+                version, name, len(gcode.getvalue()) / 1024, len(lines), max(len(line) for line in lines), emit_ms))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""Reports throughput of encoding and planning a serial-number run: per item encoding with the best mask and full
+planning, as before, versus SerialTemplate with a fixed mask and pre-planned function modules.
+Run from the repository root: python -m benchmark.bench_serial_template [item count, default 1000]"""
+import sys
+from time import perf_counter
+
+from qrcodegen import QrCode
+
+from src.platform.vectorize_helper import QrValueTable
+from src.platform.line_path import LinePath, Strategy, clear_plan_cache
+from src.platform.template_planner import get_template
+
+SERIAL_FORMATS = (('serial', 'SN-{:06d}'),
+                  ('asset_url', 'https://schallbert.de/asset/{:08d}?batch=2023-04'),
+                  ('long_label', 'INVENTORY LABEL / WORKSHOP 3 / SHELF 12 / BOX 4 / ITEM {0:06d} / ' * 3))
+
+
+def plan_full(texts, strategy):
+    segments = 0
+    for text in texts:
+        table = QrValueTable()
+        table.set_qr(QrCode.encode_text(text, QrCode.Ecc.MEDIUM))
+        segments += len(LinePath(table, strategy).get_vectors())
+    return segments
+
+
+def plan_template(texts, strategy):
+    sample = QrCode.encode_text(texts[0], QrCode.Ecc.MEDIUM)
+    template = get_template(sample.get_version(), QrCode.Ecc.MEDIUM, sample.get_mask(), strategy)
+    segments = 0
+    for text in texts:
+        segments += len(template.make_path(template.encode(text)).get_vectors())
+    return segments
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    print('{} items per run'.format(count))
+    print('format      version  strategy  full_items/s  template_items/s  speedup  segments_added')
+    for name, text_format in SERIAL_FORMATS:
+        texts = [text_format.format(index) for index in range(count)]
+        version = QrCode.encode_text(texts[0], QrCode.Ecc.MEDIUM).get_version()
+        for strategy_name, strategy in (('run_len', Strategy.RUN_LENGTH), ('min_plg', Strategy.MIN_PLUNGE)):
+            clear_plan_cache()
+            start = perf_counter()
+            full_segments = plan_full(texts, strategy)
+            full_sec = perf_counter() - start
+            start = perf_counter()
+            template_segments = plan_template(texts, strategy)
+            template_sec = perf_counter() - start
+            print('{:10s}  {:7d}  {:8s}  {:12.0f}  {:16.0f}  {:7.1f}  {:14.1%}'.format(
+                name, version, strategy_name, count / full_sec, count / template_sec, full_sec / template_sec,
+                template_segments / full_segments - 1))
+
+
+if __name__ == '__main__':
+    main()
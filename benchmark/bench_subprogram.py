@@ -0,0 +1,45 @@
+"""Reports G-code program size with repeated finder and alignment patterns emitted as subprograms, for both call
+dialects, with and without modal compaction.
+Run from the repository root: python -m benchmark.bench_subprogram"""
+from io import StringIO
+
+from benchmark.corpus import make_qr
+from src.platform.vectorize_helper import QrValueTable, Point
+from src.platform.line_path import LinePath, Strategy
+from src.platform.machinify_vector import MachinifyVector, Tool, EngraveParams
+from src.platform.subprogram import SubprogramDialect
+
+
+def measure(machinify, dialect, compact):
+    machinify.set_subprogram_dialect(dialect)
+    machinify.set_compact(compact)
+    gcode = StringIO()
+    machinify.write_gcode(gcode)
+    program = gcode.getvalue()
+    return len(program.encode('ascii')), program.count('\n')
+
+
+def main():
+    dialects = (('inline', SubprogramDialect.NONE), ('M98', SubprogramDialect.M98),
+                ('o-call', SubprogramDialect.O_CALL))
+    print('version  compact  dialect  program_kB  lines  bytes_saved  plunges')
+    for version in (10, 25, 40):
+        table = QrValueTable()
+        table.set_qr(make_qr(version))
+        machinify = MachinifyVector(1.2)
+        machinify.set_qr_path(LinePath(table, Strategy.RUN_LENGTH))
+        machinify.set_tool(Tool(dia=1.5))
+        machinify.set_engrave_params(EngraveParams())
+        machinify.set_xy_zero(Point(6.21, -17.21))
+        for compact in (False, True):
+            inline_bytes = None
+            for name, dialect in dialects:
+                size, lines = measure(machinify, dialect, compact)
+                inline_bytes = inline_bytes or size
+                print('{:7d}  {:7s}  {:7s}  {:10.1f}  {:5d}  {:11.1%}  {:7d}'.format(
+                    version, str(compact), name, size / 1024, lines, 1 - size / inline_bytes,
+                    machinify.get_plunge_count()))
+
+
+if __name__ == '__main__':
+    main()
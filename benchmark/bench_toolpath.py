@@ -0,0 +1,53 @@
+"""Reports per-segment memory and path metric timings of the toolpath representations: LineSegment objects as they
+were before (with instance dictionaries), slotted LineSegment objects, and the structured-array Toolpath.
+Run from the repository root: python -m benchmark.bench_toolpath"""
+import tracemalloc
+from timeit import timeit
+
+from benchmark.corpus import make_qr
+from src.platform.vectorize_helper import QrValueTable, Point
+from src.platform.line_path import LinePath, Strategy
+from src.platform.path_optimizer import get_travel
+from src.platform.toolpath import Toolpath
+
+
+class LegacyLineSegment:
+    """Reference: LineSegment without __slots__, as used before."""
+    def __init__(self, x_length, y_length, position):
+        self.x_length = x_length
+        self.y_length = y_length
+        self.position = position
+
+
+def measure_bytes(builder):
+    tracemalloc.start()
+    snapshot = tracemalloc.take_snapshot()
+    result = builder()
+    allocated = sum(stat.size_diff for stat in tracemalloc.take_snapshot().compare_to(snapshot, 'filename'))
+    tracemalloc.stop()
+    del result
+    return allocated
+
+
+def main():
+    print('version  segments  legacy_B/seg  slots_B/seg  toolpath_B/seg  loop_travel_ms  toolpath_travel_ms')
+    for version in (10, 25, 40):
+        table = QrValueTable()
+        table.set_qr(make_qr(version))
+        segments = LinePath(table, Strategy.RUN_LENGTH).get_vectors()
+        raw = [(s.x_length, s.y_length, s.position.x, s.position.y) for s in segments]
+        count = len(segments)
+
+        legacy = measure_bytes(lambda: [LegacyLineSegment(dx, dy, Point(x, y)) for dx, dy, x, y in raw])
+        slots = measure_bytes(lambda: [type(segments[0])(dx, dy, Point(x, y)) for dx, dy, x, y in raw])
+        toolpath = Toolpath.from_segments(segments)
+        compact = toolpath.get_array().nbytes
+
+        loop_ms = timeit(lambda: get_travel(segments), number=10) / 10 * 1000
+        vector_ms = timeit(toolpath.get_travel_length, number=10) / 10 * 1000
+        print('{:7d}  {:8d}  {:12.1f}  {:11.1f}  {:14.1f}  {:14.2f}  {:18.2f}'.format(
+            version, count, legacy / count, slots / count, compact / count, loop_ms, vector_ms))
+
+
+if __name__ == '__main__':
+    main()
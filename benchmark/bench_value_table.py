@@ -0,0 +1,56 @@
+"""Compares build time and memory footprint of the array-backed QrValueTable against the former dictionary of
+(y, x) tuples for QR-code versions 1 to 40.
+Run from the repository root: python -m benchmark.bench_value_table"""
+import tracemalloc
+from timeit import timeit
+
+from benchmark.corpus import make_qr
+from src.platform.vectorize_helper import QrValueTable
+
+
+def build_dict_table(qr):
+    """Reference implementation: the dictionary based table this repository used before."""
+    table = {}
+    size = qr.get_size()
+    for y in range(size):
+        for x in range(size):
+            table[y, x] = qr.get_module(x, y)
+    return table
+
+
+def build_array_table(qr):
+    table = QrValueTable()
+    table.set_qr(qr)
+    return table
+
+
+def measure_memory(builder, qr):
+    """Measures the memory held by the result of builder(qr) in bytes."""
+    tracemalloc.start()
+    snapshot = tracemalloc.take_snapshot()
+    result = builder(qr)
+    allocated = sum(stat.size_diff for stat in tracemalloc.take_snapshot().compare_to(snapshot, 'filename'))
+    tracemalloc.stop()
+    del result
+    return allocated
+
+
+def measure_time_ms(builder, qr, repeat=5):
+    return timeit(lambda: builder(qr), number=repeat) / repeat * 1000
+
+
+def main():
+    print('version  size   dict_ms  array_ms  dict_kib  array_kib  copy_us')
+    for version in range(1, 41):
+        qr = make_qr(version)
+        table = build_array_table(qr)
+        copy_us = timeit(table.copy, number=100) / 100 * 1e6
+        print('{:7d}  {:4d}  {:8.2f}  {:8.2f}  {:8.1f}  {:9.1f}  {:7.1f}'.format(
+            version, qr.get_size(),
+            measure_time_ms(build_dict_table, qr), measure_time_ms(build_array_table, qr),
+            measure_memory(build_dict_table, qr) / 1024, measure_memory(build_array_table, qr) / 1024,
+            copy_us))
+
+
+if __name__ == '__main__':
+    main()
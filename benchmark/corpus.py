@@ -0,0 +1,38 @@
+"""Shared QR-code inputs for the benchmark scripts."""
+from qrcodegen import QrCode, QrSegment
+
+
+def make_qr(version, text='schallbert.de', ecc=QrCode.Ecc.MEDIUM):
+    """Encodes a short text into a QR-code of exactly the requested version.
+    :param version: QR-code version 1..40
+    :returns a QrCode object"""
+    segments = [QrSegment.make_bytes(text.encode('utf-8'))]
+    return QrCode.encode_segments(segments, ecc, minversion=version, maxversion=version, boostecl=False)
+
+
+# Texts as they are typically engraved: URLs, asset tags and serials, contact and network data.
+REAL_TEXTS = [
+    'schallbert.de',
+    'https://schallbert.de/projects-software/qr-codengrave/',
+    'https://github.com/Schallbert/QR-codengrave',
+    'https://www.youtube.com/watch?v=dQw4w9WgXcQ',
+    'ASSET-000001',
+    'SN:2023-04-17-0042-XK',
+    'INV-7731-A/BOX 12/SHELF 3',
+    'WIFI:T:WPA;S:Workshop-CNC;P:correct horse battery staple;;',
+    'BEGIN:VCARD\nVERSION:3.0\nN:Schallbert;;;;\nURL:https://schallbert.de\nEND:VCARD',
+    'mailto:info@example.com?subject=Engraving%20request',
+    'geo:48.137154,11.576124',
+    '0123456789' * 20,
+    'The quick brown fox jumps over the lazy dog. ' * 12,
+]
+
+
+def make_real_qrs():
+    """Encodes REAL_TEXTS at all error correction levels.
+    :returns a list of (text, ecc, QrCode) tuples"""
+    codes = []
+    for ecc in (QrCode.Ecc.LOW, QrCode.Ecc.MEDIUM, QrCode.Ecc.QUARTILE, QrCode.Ecc.HIGH):
+        for text in REAL_TEXTS:
+            codes.append((text, ecc, QrCode.encode_text(text, ecc)))
+    return codes
@@ -0,0 +1,170 @@
+"""Headless entry point: converts a text into a QR-code and writes its engraving G-code, without loading Tk.
+Tool, engrave parameters, and XY0 are taken from the GUI's persistence file, if there is one, and can be overridden
+with flags.
+Usage from the repository root: python -m src.cli [options] [text ...]"""
+import argparse
+import os
+import sys
+
+from qrcodegen import QrCode
+
+from src.helpers.persistence import Persistence
+from src.platform.line_path import LinePath, Strategy
+from src.platform.machinify_vector import MachinifyVector, Tool, EngraveParams, ToolList
+from src.platform.postprocessor.dialects import PostDialect, make_post_processor
+from src.platform.vectorize_helper import QrValueTable, Point
+
+VERSION = 1.2
+
+_ECC = {'low': QrCode.Ecc.LOW, 'medium': QrCode.Ecc.MEDIUM, 'quartile': QrCode.Ecc.QUARTILE,
+        'high': QrCode.Ecc.HIGH}
+_STRATEGIES = {'serpentine': Strategy.SERPENTINE, 'run_length': Strategy.RUN_LENGTH,
+               'min_plunge': Strategy.MIN_PLUNGE}
+_POST_DIALECTS = {'default': PostDialect.DEFAULT, 'grbl': PostDialect.GRBL, 'linuxcnc': PostDialect.LINUXCNC,
+                  'fanuc': PostDialect.FANUC}
+_TOOL_FLAGS = ('diameter', 'angle', 'tip', 'fxy', 'fz', 'speed')
+_ENGRAVE_FLAGS = {'engrave': 'z_engrave', 'hover': 'z_hover', 'flyover': 'z_flyover'}
+
+
+def make_parser():
+    """:returns the argparse.ArgumentParser object of the command line interface"""
+    parser = argparse.ArgumentParser(prog='python -m src.cli',
+                                     description='Converts a text into a QR-code and writes the G-code to engrave it.')
+    parser.add_argument('text', nargs='*', help='the text to encode, words are joined with spaces')
+    parser.add_argument('-i', '--input', help='read the text from a file, - for stdin (the default without text)')
+    parser.add_argument('-o', '--output', help='write the G-code to a file instead of stdout')
+    parser.add_argument('--persistence', default=Persistence.get_path(),
+                        help='the persistence file of the GUI to take tool, engrave parameters, and XY0 from')
+    parser.add_argument('--no-persistence', action='store_true', help='start from default values only')
+
+    tool = parser.add_argument_group('tool', 'defaults to the tool selected in the GUI')
+    tool.add_argument('--tool', type=int, help='select a tool from the persisted tool list by its number')
+    tool.add_argument('--diameter', type=float, help='tool diameter in mm')
+    tool.add_argument('--angle', type=float, help='V-bit angle in degrees, 0 for end mills')
+    tool.add_argument('--tip', type=float, help='V-bit tip width in mm')
+    tool.add_argument('--fxy', type=int, help='XY feed in mm/min')
+    tool.add_argument('--fz', type=int, help='Z feed in mm/min')
+    tool.add_argument('--speed', type=int, help='spindle speed in 1/min')
+
+    engrave = parser.add_argument_group('engrave parameters')
+    engrave.add_argument('--engrave', type=float, help='engrave depth in mm')
+    engrave.add_argument('--hover', type=float, help='hover height between cuts in mm')
+    engrave.add_argument('--flyover', type=float, help='flyover height to XY0 in mm')
+    engrave.add_argument('--xy0', type=float, nargs=2, metavar=('X', 'Y'), help='workpiece XY0 offset in mm')
+
+    job = parser.add_argument_group('job')
+    job.add_argument('--ecc', choices=_ECC, default='medium', help='error correction level')
+    job.add_argument('--strategy', choices=_STRATEGIES, default='run_length', help='path planning strategy')
+    job.add_argument('--post', choices=_POST_DIALECTS, default='default', help='controller dialect')
+    job.add_argument('--pitch', type=float, help='module pitch in mm, defaults to the width the tool cuts')
+    job.add_argument('--stay-down', action='store_true', help='join segments without lifting the tool')
+    job.add_argument('--verify', action='store_true', help='back-plot the G-code against the QR-code')
+    return parser
+
+
+def read_text(args, stdin=None):
+    """Collects the text to encode from the positional arguments, a file, or stdin.
+    :returns a String object"""
+    if args.text and args.input is None:
+        return ' '.join(args.text)
+    if args.input is None or args.input == '-':
+        text = (stdin or sys.stdin).read()
+    else:
+        with open(args.input, encoding='utf-8') as file:
+            text = file.read()
+    return text.rstrip('\r\n')
+
+
+def _load_persisted(args):
+    """Helper method. Reads the tool list, engrave parameters, and XY0 from the persistence file, if there is one.
+    :returns tuple: a ToolList, EngraveParams, and Point object, defaults for those not persisted
+    :raises ValueError if the persistence file cannot be read"""
+    if args.no_persistence or not os.path.isfile(args.persistence):
+        return tuple((ToolList(), EngraveParams(), Point()))
+    Persistence.set_path(args.persistence)
+    try:
+        return tuple((Persistence.load(ToolList()), Persistence.load(EngraveParams()), Persistence.load(Point())))
+    except OSError:
+        raise
+    except Exception as error:  # unpickling a corrupt or incompatible file can raise almost anything
+        raise ValueError('Cannot read persistence file {} ({}: {}). Pass --no-persistence to ignore it'.format(
+            args.persistence, type(error).__name__, error))
+
+
+def load_settings(args):
+    """Takes tool, engrave parameters, and XY0 from the persistence file, if there is one, and applies the flags.
+    :returns tuple: a Tool, EngraveParams, and Point object
+    :raises ValueError if the requested tool is not in the tool list or the persistence file cannot be read"""
+    tool_list, engrave, xy0 = _load_persisted(args)
+    if args.tool is not None:
+        if not tool_list.is_tool_in_list(args.tool):
+            raise ValueError('Tool {} is not in the tool list'.format(args.tool))
+        tool_list.select_tool(args.tool)
+    tool = tool_list.get_selected_tool()
+    tool = Tool() if tool is None else Tool(tool.number, tool.name, tool.diameter, tool.fxy, tool.fz, tool.speed,
+                                            tool.angle, tool.tip)
+    engrave = EngraveParams(engrave.z_engrave, engrave.z_hover, engrave.z_flyover)
+    for flag in _TOOL_FLAGS:
+        if getattr(args, flag) is not None:
+            setattr(tool, flag, getattr(args, flag))
+    for flag, attribute in _ENGRAVE_FLAGS.items():
+        if getattr(args, flag) is not None:
+            setattr(engrave, attribute, getattr(args, flag))
+    if args.xy0 is not None:
+        xy0 = Point(*args.xy0)
+    return tuple((tool, engrave, xy0))
+
+
+def make_machinify(text, args):
+    """Encodes the text and prepares the job.
+    :returns a MachinifyVector object"""
+    tool, engrave, xy0 = load_settings(args)
+    table = QrValueTable()
+    table.set_qr(QrCode.encode_text(text, _ECC[args.ecc]))
+    machinify = MachinifyVector(VERSION)
+    machinify.set_project_name(text)
+    machinify.set_qr_path(LinePath(table, _STRATEGIES[args.strategy]))
+    machinify.set_tool(tool)
+    machinify.set_engrave_params(engrave)
+    machinify.set_xy_zero(xy0)
+    machinify.set_pitch(args.pitch)
+    machinify.set_stay_down(args.stay_down)
+    machinify.set_post_processor(make_post_processor(_POST_DIALECTS[args.post]))
+    machinify.get_job_duration_sec()  # Job duration is part of the G-code header
+    return machinify
+
+
+def main(argv=None, stdin=None, stdout=None):
+    """Runs the command line interface.
+    :param argv: the arguments without the program name, None for sys.argv
+    :returns the exit status: 0 on success, 1 if the G-code could not be generated or failed verification"""
+    parser = make_parser()
+    args = parser.parse_args(argv)
+    stdout = stdout or sys.stdout
+    try:
+        text = read_text(args, stdin)
+        if not text:
+            parser.error('no text to encode')
+        machinify = make_machinify(text, args)
+        if args.output is None:
+            machinify.write_gcode(stdout)
+        else:
+            with open(args.output, 'w') as file:
+                machinify.write_gcode(file)
+    except (OSError, ValueError) as error:
+        print('Error: ' + str(error), file=sys.stderr)
+        return 1
+    if args.verify:
+        if args.output is None:
+            report = machinify.verify_gcode()
+        else:
+            with open(args.output) as file:  # what actually ended up on disk
+                report = machinify.verify_gcode(file)
+        if not report.is_ok():
+            print('Back-plot: ' + report.get_summary(), file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
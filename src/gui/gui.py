@@ -1,7 +1,6 @@
+import threading
 import tkinter as tk
 from tkinter import ttk
-from tkinter.filedialog import asksaveasfile
-from shutil import copyfileobj
 
 from src.gui.gui_generate_qr import GuiGenerateQr
 from src.gui.gui_tool_manage import GuiToolManager
@@ -11,18 +10,26 @@ from src.gui.gui_engrave_manage import GuiEngraveManager
 from src.gui.gui_xy0_manage import GuiXy0Manager
 
 from src.helpers.gui_helpers import MsgBox
-from src.helpers.persistence import Persistence
 
-from src.platform.machinify_vector import MachinifyVector, EngraveParams, ToolList
-from src.platform.vectorize_helper import Point
+_LOAD_POLL_MS = 10
+
+
+def _preload_persistence():
+    """Imports the platform layer and reads the persistence file. Runs in a background thread while the main window
+    is built and shown."""
+    from src.helpers.persistence import Persistence
+    Persistence.preload()
 
 
 class App:
     """Main application and entry point for QR-codengrave. Creates a main window that is able to spawn child
     windows on demand for parameter input. Provides the user interface to creating G-code CNC machine instructions
-    from Text that is converted into a QR-code."""
+    from Text that is converted into a QR-code.
+    The window shows before the platform layer and the persisted tools, engrave parameters, and XY0 have been
+    loaded: a background thread loads them, and the sections are filled in once it is done."""
 
-    def __init__(self, root):
+    def __init__(self, root, on_ready=None):
+        """:param on_ready: called without arguments once the persisted data has been loaded"""
         self.root = root
 
         self.version = 1.2
@@ -38,18 +45,20 @@ class App:
         self._options = {'padx': 5, 'pady': 5}
         self._msgbox = MsgBox()
 
-        self._machinify = MachinifyVector(self.version)
-
-        engrave = Persistence.load(EngraveParams())
-        tool_list = Persistence.load(ToolList())
-        xy0 = Persistence.load(Point())
+        self._on_ready = on_ready
+        self._persistence = None  # the Persistence class, once loaded
+        self._machinify = None  # created once the platform layer is loaded
+        self._project_name = ''
+        self._loader = threading.Thread(target=_preload_persistence, daemon=True)
+        self._loader.start()
 
         self.gui_qr_generator = GuiGenerateQr(self, self._options)
-        self.gui_tool_manager = GuiToolManager(self, self._msgbox, tool_list, self._options)
-        self.gui_engrave_params = GuiEngraveManager(self, self._msgbox, engrave, self._options)
-        self.gui_xy0_manager = GuiXy0Manager(self, self._msgbox, xy0, self._options)
+        self.gui_tool_manager = GuiToolManager(self, self._msgbox, None, self._options)
+        self.gui_engrave_params = GuiEngraveManager(self, self._msgbox, None, self._options)
+        self.gui_xy0_manager = GuiXy0Manager(self, self._msgbox, None, self._options)
         self.gui_gcode_generator = GuiGenerateGcode(self, self._options)
         self.gui_status_bar = GuiStatusBar(self, self._options)
+        self.root.after(_LOAD_POLL_MS, self._await_persistence)
 
     def update_status(self, text=''):
         """Called from other parts of the GUI, this method updates the status bar and synchronizes object state
@@ -69,14 +78,16 @@ class App:
     def set_project_name(self, text):
         """Setter method.
         :param text: forwards the project's name as a String object to the G-code generating class."""
-        self._machinify.set_project_name(text)
+        self._project_name = text
+        if self._machinify is not None:
+            self._machinify.set_project_name(text)
 
     def run_gcode_generator(self):
         """Command to run the G-code generator. To be called by a button within the GUI. In case all relevant data is
         available, has G-code generated and saved to a file."""
         if not self._validate_data():
             return
-        self._save_file(self._machinify.generate_gcode())
+        self._save_file()
 
     def _collect_path_tool_data(self):
         """Tries to obtain QR-code paths and tool information from other parts of the GUI.
@@ -85,13 +96,13 @@ class App:
         paths = self.gui_qr_generator.get_qr_path()
         tool = self.gui_tool_manager.get_selected_tool()
 
-        if paths is None:
+        if paths is None or not self._is_loaded():
             return False
         self._machinify.set_qr_path(paths)
         if tool is None:
             return False
         self._machinify.set_tool(tool)
-        Persistence.save(self.gui_tool_manager.get_tool_list())
+        self._persistence.save(self.gui_tool_manager.get_tool_list())
         return True
 
     def collect_engrave_offset_data(self):
@@ -104,17 +115,19 @@ class App:
         if engrave is None:
             return False
         self._machinify.set_engrave_params(engrave)
-        Persistence.save(engrave)
+        self._persistence.save(engrave)
         if xy0 is None:
             return False
         self._machinify.set_xy_zero(xy0)
-        Persistence.save(xy0)
+        self._persistence.save(xy0)
         return True
 
     def _validate_data(self):
         """Calls Machinify's data check method and raises an error message if not all data is available to generate
         G-code.
         :returns True if all necessary data is available, else returns False."""
+        if not self._is_loaded():
+            return False
         error = self._machinify.report_data_missing()
         if error != '':
             self._msgbox.error(title='Error: ' + error + ' missing',
@@ -122,14 +135,55 @@ class App:
             return False
         return True
 
-    def _save_file(self, gcode):
-        """Calls a file save dialog and copies the already generated G-code into that file.
-        :param gcode: A StringIO object representing the machine instructions.
+    def _save_file(self):
+        """Calls a file save dialog and has the G-code written straight into that file.
         :returns early in case the dialog is cancelled by the user."""
-        file = asksaveasfile(mode='w', initialfile='qr_' + self._machinify.get_project_name() + '.tap',
-                             defaultextension='.tap', filetypes=[('CNC gcode', '*.tap'), ('Text Document', '*.txt')])
+        from tkinter.filedialog import asksaveasfile
+        extension = self._machinify.get_post_processor().get_file_extension()
+        file = asksaveasfile(mode='w', initialfile='qr_' + self._machinify.get_project_name() + extension,
+                             defaultextension=extension,
+                             filetypes=[('CNC gcode', '*' + extension), ('Text Document', '*.txt')])
         if file is None:  # asksaveasfile return `None` if dialog closed with "cancel".
             return
-        gcode.seek(0)
-        copyfileobj(gcode, file)
+        self._machinify.write_gcode(file)
         file.close()
+        with open(file.name) as saved:  # what actually ended up on disk
+            report = self._machinify.verify_gcode(saved)
+        if not report.is_ok():
+            self._msgbox.error(title='Warning: G-code does not match the QR-code',
+                               message='Back-plot of the saved G-code: ' + report.get_summary())
+
+    def _is_loaded(self):
+        """Helper method. Finishes loading the persisted data in case it is needed before the loader is done.
+        :returns True once the platform layer and the persisted data are available"""
+        if self._machinify is None:
+            self._apply_persistence()
+        return self._machinify is not None
+
+    def _await_persistence(self):
+        """Polls the background loader from the Tk event loop, so the window stays responsive while it works."""
+        if self._machinify is not None:
+            return
+        if self._loader.is_alive():
+            self.root.after(_LOAD_POLL_MS, self._await_persistence)
+            return
+        self._apply_persistence()
+
+    def _apply_persistence(self):
+        """Waits for the background loader and fills the persisted data into the GUI sections."""
+        self._loader.join()
+        from src.helpers.persistence import Persistence
+        from src.platform.machinify_vector import MachinifyVector, EngraveParams, ToolList
+        from src.platform.vectorize_helper import Point
+
+        self._persistence = Persistence
+        self._machinify = MachinifyVector(self.version)
+        self._machinify.set_project_name(self._project_name)
+        engrave = Persistence.load(EngraveParams())
+        tool_list = Persistence.load(ToolList())
+        xy0 = Persistence.load(Point())
+        self.gui_tool_manager.set_tool_list(tool_list)
+        self.gui_engrave_params.set_engrave_parameters(engrave)
+        self.gui_xy0_manager.set_xy0_parameters(xy0)
+        if self._on_ready is not None:
+            self._on_ready()
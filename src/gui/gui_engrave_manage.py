@@ -1,20 +1,17 @@
 import tkinter as tk
 from tkinter import ttk
 
-from src.gui.gui_engrave_configure import GuiEngraveConfigure
-
 
 class GuiEngraveManager:
     def __init__(self, main, msgbox, params, options):
         self._main = main
         self._msgbox = msgbox
         self._options = options
-        self._z_params = params
-
-        self._engrave_configure = GuiEngraveConfigure(self, self._msgbox, self._options)
-        self._engrave_configure.set_params(self._z_params)
+        self._z_params = params  # None until the parameters have been loaded, see set_engrave_parameters()
+        self._engrave_configure = None  # created when first shown
 
         self._init_frame_params_section()
+        self._update_labels()
 
     def get_engrave_parameters(self):
         """Getter function.
@@ -25,10 +22,15 @@ class GuiEngraveManager:
         """Setter function.
         to be called by child window to refresh parameters"""
         self._z_params = params
+        self._update_labels()
+        self._main.update_status()
+
+    def _update_labels(self):
+        if self._z_params is None:
+            return
         self._engrave.config(text=str(self._z_params.z_engrave))
         self._hover.config(text=str(self._z_params.z_hover))
         self._flyover.config(text=str(self._z_params.z_flyover))
-        self._main.update_status()
 
     def _init_frame_params_section(self):
         """create all items within the parameters frame section"""
@@ -41,7 +43,7 @@ class GuiEngraveManager:
         engrave_label.grid(column=0, row=0, sticky='E', **self._options)
 
         # Engrave var
-        self._engrave = ttk.Label(params_frame, text=str(self._z_params.z_engrave), width=6)
+        self._engrave = ttk.Label(params_frame, width=6)
         self._engrave.grid(column=1, row=0, sticky='W', **self._options)
         self._engrave.bind('<Button-1>', lambda click: self._label_clicked())
 
@@ -50,7 +52,7 @@ class GuiEngraveManager:
         hover_label.grid(column=0, row=1, sticky='E', **self._options)
 
         # Hover var
-        self._hover = ttk.Label(params_frame, text=str(self._z_params.z_hover), width=6)
+        self._hover = ttk.Label(params_frame, width=6)
         self._hover.grid(column=1, row=1, sticky='W', **self._options)
         self._hover.bind('<Button-1>', lambda click: self._label_clicked())
 
@@ -59,7 +61,7 @@ class GuiEngraveManager:
         flyover_label.grid(column=0, row=2, sticky='E', **self._options)
 
         # Flyover var
-        self._flyover = ttk.Label(params_frame, text=str(self._z_params.z_flyover), width=6)
+        self._flyover = ttk.Label(params_frame, width=6)
         self._flyover.grid(column=1, row=2, sticky='W', **self._options)
         self._flyover.bind('<Button-1>', lambda click: self._label_clicked())
 
@@ -69,5 +71,11 @@ class GuiEngraveManager:
 
     def _label_clicked(self):
         """Handle label click event"""
+        if self._z_params is None:
+            return
+        if self._engrave_configure is None:
+            from src.gui.gui_engrave_configure import GuiEngraveConfigure
+            self._engrave_configure = GuiEngraveConfigure(self, self._msgbox, self._options)
+            self._engrave_configure.set_params(self._z_params)
         self._main.update_status('Parameter')
         self._engrave_configure.show()
@@ -1,13 +1,8 @@
 import tkinter as tk
 from tkinter import ttk
-from turtle import RawTurtle
 from tkinter.messagebox import showerror
 
-from qrcodegen import QrCode
-
-from src.resources import app_image_path
-from src.platform.vectorize_helper import QrValueTable
-from src.platform.line_path import LinePath
+from src.resources import app_image_path, app_cache_path
 
 
 class GuiGenerateQr:
@@ -16,6 +11,7 @@ class GuiGenerateQr:
         self._options = options
 
         self._path = None
+        self._cache = None
         self._stop_draw = False
         self._turtle = None
 
@@ -67,37 +63,51 @@ class GuiGenerateQr:
         drawing_frame.grid(column=0, row=1, rowspan=3, sticky='NEWS', **self._options)
         self._turtle_canvas = tk.Canvas(drawing_frame, height=300, width=300)
         self._turtle_canvas.pack()
+        self._img = None
+        self._turtle_canvas.after_idle(self._show_logo)  # decoded once the window shows
+        return drawing_frame
+
+    def _show_logo(self):
+        """Shows the application logo on the drawing screen until the first QR-code is drawn"""
         self._img = tk.PhotoImage(file=app_image_path)
         self._turtle_canvas.create_image(152, 152, image=self._img)
-        return drawing_frame
 
     def _create_qr_from_input(self, text_to_qr):
         """This method requests a QR code to be generated by the library.
-        It then vectorizes it and generates spiral paths."""
-        qr = QrCode.encode_text(text_to_qr, QrCode.Ecc.MEDIUM)
-        qr_vect = QrValueTable()
-        qr_vect.set_qr(qr)
-        self._path = LinePath(qr_vect)
+        It then vectorizes it and generates spiral paths. Texts that have been converted before are taken from
+        the toolpath cache."""
+        if self._cache is None:
+            from src.platform.toolpath_cache import ToolpathCache
+            self._cache = ToolpathCache(app_cache_path)
+        self._path = self._cache.get_path(text_to_qr)
 
     def _draw_qr_turtle(self):
         """Method that draws a QR code path based on the QrPathSegment data class with Turtle."""
         self._main.update_status('\u270d Drawing')
 
-        vect = self._path.get_vectors()
         size = self._path.get_size()
-        path_count = len(vect)
-        self.progress.config(maximum=path_count)
+        path_count = self._path.get_vector_count()
+        if path_count is None:  # vectors are streamed while being planned: show progress by row
+            self.progress.config(maximum=size)
+        else:
+            self.progress.config(maximum=path_count)
         self._stop_draw = False
-        for vect in vect:
+        for vect in self._path.iter_vectors():
             if self._stop_draw:
                 break
 
-            self.progress.step()
+            if path_count is None:
+                self.progress.config(value=vect.position.y + 1)
+            else:
+                self.progress.step()
             self._turtle.setpos(self.pen_size * (vect.position.x - size / 2),
                                 self.pen_size * (size / 2 - vect.position.y))
             if vect.x_length == 0:
                 length = vect.y_length
-                self._turtle.setheading(270)
+                if length >= 0:
+                    self._turtle.setheading(270)
+                else:
+                    self._turtle.setheading(90)
             else:
                 length = vect.x_length
                 if length > 0:
@@ -114,6 +124,7 @@ class GuiGenerateQr:
 
     def _prepare_turtle(self):
         """Prepares the turtle tool for another drawing, i.e. clearing the screen"""
+        from turtle import RawTurtle
         self._turtle = RawTurtle(self._turtle_canvas)
         self._turtle.hideturtle()
         self._turtle.speed(0)
@@ -1,10 +1,9 @@
 import tkinter as tk
 from tkinter import ttk
 
-from webbrowser import open_new
-
 
 def _callback(url):
+    from webbrowser import open_new
     open_new(url)
 
 
@@ -1,8 +1,6 @@
 import tkinter as tk
 from tkinter import ttk
 
-from src.gui.gui_tool_configure import GuiConfigureTool
-
 
 class GuiToolManager:
     def __init__(self, main, msgbox, params, options):
@@ -10,11 +8,8 @@ class GuiToolManager:
         self._main = main
         self._msgbox = msgbox
         self._options = options
-        self._tool_list = params
-
-        self._config_gui = GuiConfigureTool(self,
-                                            self._msgbox,
-                                            self._options)
+        self._tool_list = params  # None until the tool list has been loaded, see set_tool_list()
+        self._config_gui = None  # created when first shown
 
         self._tool_frame = self._init_frame_tool_section()
 
@@ -24,9 +19,18 @@ class GuiToolManager:
         self._update_tool_options()
         self._main.update_status()
 
+    def set_tool_list(self, tool_list):
+        """Setter function. Shows a tool list that has been loaded after the window was created.
+        :param tool_list: a ToolList object"""
+        self._tool_list = tool_list
+        self.tool_selection.set(self._tool_list.get_selected_tool_description())
+        self._update_tool_options()
+
     def get_selected_tool(self):
         """Getter function.
         :returns the currently selected tool"""
+        if self._tool_list is None:
+            return None
         return self._tool_list.get_selected_tool()
 
     def get_tool_list(self):
@@ -52,15 +56,23 @@ class GuiToolManager:
 
         # Select Tool OptionMenu
         self.tool_selection = tk.StringVar()
-        self.tool_dropdown = ttk.OptionMenu(tool_section_frame, self.tool_selection,
-                                            *self._tool_list.get_tool_list_string())
-        self.tool_selection.set(self._tool_list.get_selected_tool_description())
+        self.tool_dropdown = ttk.OptionMenu(tool_section_frame, self.tool_selection)
+        if self._tool_list is not None:
+            self.tool_selection.set(self._tool_list.get_selected_tool_description())
         self.tool_dropdown.config(width=30)
         self.tool_dropdown.grid(column=1, row=1, columnspan=2, sticky='S', **self._options)
         self.tool_selection.trace('w', self._tool_selection_changed)
         self._update_tool_options()
         return tool_section_frame
 
+    def _get_config_gui(self):
+        """Helper method. Imports and creates the tool configuration dialog on first use.
+        :returns a GuiConfigureTool object"""
+        if self._config_gui is None:
+            from src.gui.gui_tool_configure import GuiConfigureTool
+            self._config_gui = GuiConfigureTool(self, self._msgbox, self._options)
+        return self._config_gui
+
     def _tool_selection_get_to_int(self):
         """helper method to get a tool number from a tool description string
         :returns integer value of corresponding tool number"""
@@ -77,6 +89,8 @@ class GuiToolManager:
     def _update_tool_options(self):
         """callback handler for updating the tool dropdown box.
         Basically this method redraws the contents of the dropdown with latest data"""
+        if self._tool_list is None:
+            return
         menu = self.tool_dropdown['menu']
         menu.delete(0, 'end')
         options_update = self._tool_list.get_tool_list_string()
@@ -86,17 +100,19 @@ class GuiToolManager:
 
     def _add_tool_button_clicked(self):
         """Handle add tool button click event"""
+        if self._tool_list is None:
+            return
         self._main.update_status('\u27f1 Tool')
         tool_entry = self._tool_selection_get_to_int()
         if self._tool_list.is_tool_in_list(tool_entry):
             self._tool_list.select_tool(tool_entry)
-            self._config_gui.set_tool(self._tool_list.get_selected_tool())
-        self._config_gui.show()
+            self._get_config_gui().set_tool(self._tool_list.get_selected_tool())
+        self._get_config_gui().show()
 
     def _remove_tool_button_clicked(self):
         """Handle add tool button click event"""
         remove = self._tool_selection_get_to_int()
-        if remove == 0:
+        if remove == 0 or self._tool_list is None:
             return
         self._tool_list.remove(remove)
         self._tool_list.select_tool(None)
@@ -1,20 +1,19 @@
 import tkinter as tk
 from tkinter import ttk
 
-from src.gui.gui_xy0_configure import GuiConfigureXy0
-
 
 class GuiXy0Manager:
     def __init__(self, main, msgbox, params, options):
         self._main = main
         self._msgbox = msgbox
         self._options = options
-        self._xy0 = params
+        self._xy0 = params  # None until the offset has been loaded, see set_xy0_parameters()
 
-        self._is_dimension_info_available = False
-        self._guiconfig = GuiConfigureXy0(self, self._msgbox, self._options)
+        self._dimension_info = None
+        self._guiconfig = None  # created when first shown
 
         self._init_frame_params_section()
+        self._update_labels()
 
     def get_xy0_parameters(self):
         """Getter function.
@@ -24,8 +23,7 @@ class GuiXy0Manager:
     def set_xy0_parameters(self, xy0):
         """Setter function. To be called by child: configure window"""
         self._xy0 = xy0
-        self._setx0.config(text=str(self._xy0.x))
-        self._sety0.config(text=str(self._xy0.y))
+        self._update_labels()
         self._main.update_status()
 
     def set_dimension_info(self, dimension_info):
@@ -33,8 +31,13 @@ class GuiXy0Manager:
         to be called by parent to enable XY0 changes"""
         if dimension_info is None:
             return
-        self._is_dimension_info_available = True
-        self._guiconfig.set_params(dimension_info[0], dimension_info[1], self._xy0)
+        self._dimension_info = dimension_info
+
+    def _update_labels(self):
+        if self._xy0 is None:
+            return
+        self._setx0.config(text=str(self._xy0.x))
+        self._sety0.config(text=str(self._xy0.y))
 
     def _init_frame_params_section(self):
         """create all items within the parameters frame section"""
@@ -50,7 +53,7 @@ class GuiXy0Manager:
         setx0_label.grid(column=1, row=0, sticky='E', **self._options)
 
         # X var
-        self._setx0 = ttk.Label(params_frame, text=str(self._xy0.x), width=6)
+        self._setx0 = ttk.Label(params_frame, width=6)
         self._setx0.grid(column=2, row=0, sticky='W', **self._options)
         self._setx0.bind('<Button-1>', lambda click: self._label_clicked())
 
@@ -59,7 +62,7 @@ class GuiXy0Manager:
         sety0_label.grid(column=1, row=1, sticky='E', **self._options)
 
         # y var
-        self._sety0 = ttk.Label(params_frame, text=str(self._xy0.y), width=6)
+        self._sety0 = ttk.Label(params_frame, width=6)
         self._sety0.grid(column=2, row=1, sticky='W', **self._options)
         self._sety0.bind('<Button-1>', lambda click: self._label_clicked())
 
@@ -69,9 +72,13 @@ class GuiXy0Manager:
 
     def _label_clicked(self):
         """Handle XY0 label click event"""
-        if not self._is_dimension_info_available:
+        if self._dimension_info is None:
             self._msgbox.showinfo(title="QR or Tool not set", message='Warning: QR not provided and/or Tool not set. \n'
                                                                       'Thus XY0 can not be defined.')
             return
+        if self._guiconfig is None:
+            from src.gui.gui_xy0_configure import GuiConfigureXy0
+            self._guiconfig = GuiConfigureXy0(self, self._msgbox, self._options)
+        self._guiconfig.set_params(self._dimension_info[0], self._dimension_info[1], self._xy0)
         self._guiconfig.show()
         self._main.update_status('Set XY0')
@@ -1,38 +1,152 @@
+import atexit
+import os
 import pickle
+import tempfile
+import threading
 
-from tkinter import messagebox
 from src.resources import app_persistence_path
 from src.platform.vectorize_helper import Point
 from src.platform.machinify_vector import ToolList, EngraveParams
 
+WRITE_DELAY = 1.0  # seconds that saves are collected before the file is written
+
 
 class Persistence:
-    """Class that interfaces Pickle module to save application parameters to a file."""
+    """Class that interfaces Pickle module to save application parameters to a file.
+    Saving is write-behind: save() only serializes the objects and compares them with what the file holds. Changes
+    are written by a background thread once write_delay seconds have passed since the first unwritten save, so that
+    bursts of saves end up in one write and a slow file system never blocks the caller. The file is replaced
+    atomically, and pending changes are written when the interpreter exits or flush() is called."""
     _tool_list = ToolList()
     _z_params = EngraveParams()
     _xy0 = Point()
     _has_loaded = False
-    _msgbox = messagebox
+    _path = app_persistence_path
+    _msgbox = None  # tkinter's messagebox, imported on first use so that headless scripts do not load Tk
+
+    _write_delay = WRITE_DELAY  # 0 writes within save()
+    _lock = threading.Lock()  # guards the objects, the pending changes, and the counters
+    _write_lock = threading.Lock()  # serializes writes, so that an older state never replaces a newer one
+    _timer = None
+    _written = None  # the serialized objects the file holds, None if unknown
+    _pending = None  # serialized objects waiting to be written
+    _save_count = 0
+    _write_count = 0
+    _unchanged_count = 0  # saves that did not change what the file holds
+    _coalesced_count = 0  # saves merged into a write that was already pending
+    _error_count = 0  # background writes that failed and are retried with the next save or flush
+
+    @classmethod
+    def set_path(cls, path):
+        """Setter function. Pending changes are written to the previous file first. Objects are loaded from the new
+        file on the next call of load().
+        :param path: the file path of the persistence file"""
+        cls.flush()
+        with cls._lock:
+            cls._path = path
+            cls._has_loaded = False
+            cls._written = None
+
+    @classmethod
+    def get_path(cls):
+        return cls._path
+
+    @classmethod
+    def set_write_delay(cls, seconds):
+        """Setter function.
+        :param seconds: how long saves are collected before the file is written, 0 to write within save()"""
+        cls._write_delay = seconds
 
     @classmethod
     def save(cls, data):
         """Saves an application object to file via automated serialization. Holds copies of the objects as static
-        member variables.
+        member variables. The file is written in the background, and only if the objects have changed.
         :param data: the input object of type ToolList, EngraveParams, or Point (XY0 workpiece offset)"""
-        if type(data) == ToolList:
-            cls._tool_list = data
-        elif type(data) == EngraveParams:
-            cls._z_params = data
-        elif type(data) == Point:
-            cls._xy0 = data
-        else:
-            raise ValueError(str(data) + " is no type known to Persistence")
+        with cls._lock:
+            if type(data) == ToolList:
+                cls._tool_list = data
+            elif type(data) == EngraveParams:
+                cls._z_params = data
+            elif type(data) == Point:
+                cls._xy0 = data
+            else:
+                raise ValueError(str(data) + " is no type known to Persistence")
+
+            cls._save_count += 1
+            # Serialized right away: the objects may be changed by the caller while the write is pending
+            payload = cls._serialize()
+            if cls._pending is None and payload == cls._written:
+                cls._unchanged_count += 1
+                return
+            if cls._pending is not None:
+                cls._coalesced_count += 1
+            cls._pending = payload
+            if cls._write_delay > 0 and cls._timer is None:
+                cls._timer = threading.Timer(cls._write_delay, cls._write_in_background)
+                cls._timer.daemon = True
+                cls._timer.start()
+        if cls._write_delay <= 0:
+            cls._write_pending()
+
+    @classmethod
+    def flush(cls):
+        """Writes pending changes now, e.g. before the application exits.
+        :raises OSError if the file cannot be written"""
+        with cls._lock:
+            if cls._timer is not None:
+                cls._timer.cancel()
+                cls._timer = None
+        cls._write_pending()
+
+    @classmethod
+    def is_dirty(cls):
+        """:returns True if there are changes that have not been written yet, or are being written"""
+        return cls._pending is not None or cls._write_lock.locked()
 
-        with open(app_persistence_path, 'wb') as file:
-            pickle.dump([cls._tool_list,
-                         cls._z_params,
-                         cls._xy0],
-                        file, protocol=2)
+    @classmethod
+    def get_save_count(cls):
+        """Getter function.
+        :returns the number of calls of save()"""
+        return cls._save_count
+
+    @classmethod
+    def get_write_count(cls):
+        """Getter function.
+        :returns the number of times the file has been written"""
+        return cls._write_count
+
+    @classmethod
+    def get_unchanged_count(cls):
+        """Getter function.
+        :returns the number of saves that were skipped because the file already held the objects"""
+        return cls._unchanged_count
+
+    @classmethod
+    def get_coalesced_count(cls):
+        """Getter function.
+        :returns the number of saves that were merged into a pending write"""
+        return cls._coalesced_count
+
+    @classmethod
+    def get_writes_avoided(cls):
+        """:returns the number of saves that did not cause a write of their own"""
+        return cls._unchanged_count + cls._coalesced_count
+
+    @classmethod
+    def get_error_count(cls):
+        """Getter function.
+        :returns the number of background writes that failed"""
+        return cls._error_count
+
+    @classmethod
+    def preload(cls):
+        """Reads the persistence file ahead of load(), e.g. in a background thread while the GUI starts. Shows no
+        message: if the file cannot be read, load() tries again and reports it."""
+        try:
+            cls._read()
+            cls._has_loaded = True
+        except Exception:
+            pass
 
     @classmethod
     def load(cls, data):
@@ -42,12 +156,11 @@ class Persistence:
         :returns the object of requested datatype."""
         if not cls._has_loaded:
             try:
-                with open(app_persistence_path, 'rb') as file:
-                    cls._tool_list, cls._z_params, cls._xy0 = pickle.load(file)
+                cls._read()
             except FileNotFoundError:
-                cls._msgbox.showinfo(title='Persistence file not found', message='Could not locate saved data under'
-                                                                                 + app_persistence_path + '. \n' +
-                                                                                 'Starting with a blank database.')
+                cls._get_msgbox().showinfo(title='Persistence file not found',
+                                           message='Could not locate saved data under' + cls._path + '. \n' +
+                                                   'Starting with a blank database.')
                 pass
             cls._has_loaded = True
 
@@ -59,3 +172,83 @@ class Persistence:
             return cls._xy0
         else:
             raise ValueError(str(data) + " is no type known to Persistence")
+
+    @classmethod
+    def _read(cls):
+        """Helper method. Reads the objects from file and remembers them as what the file holds."""
+        with open(cls._path, 'rb') as file:
+            tool_list, z_params, xy0 = pickle.load(file)
+        with cls._lock:
+            cls._tool_list, cls._z_params, cls._xy0 = tool_list, z_params, xy0
+            cls._written = cls._serialize()
+
+    @classmethod
+    def _serialize(cls):
+        """Helper method.
+        :returns the objects as they are written to file, a bytes object"""
+        return pickle.dumps([cls._tool_list,
+                             cls._z_params,
+                             cls._xy0],
+                            protocol=2)
+
+    @classmethod
+    def _write_in_background(cls):
+        """Timer callback. Failed writes stay pending and are retried with the next save or flush."""
+        with cls._lock:
+            cls._timer = None
+        try:
+            cls._write_pending()
+        except OSError:
+            with cls._lock:
+                cls._error_count += 1
+
+    @classmethod
+    def _write_pending(cls):
+        """Helper method. Writes the pending changes without holding up save() while the file system works.
+        :raises OSError if the file cannot be written, the changes then stay pending"""
+        with cls._write_lock:
+            with cls._lock:
+                payload, written, path = cls._pending, cls._written, cls._path
+                if payload is None:
+                    return
+                cls._pending = None
+                cls._written = payload  # saves of the same objects while the file is written are unchanged
+            try:
+                _replace_file(path, payload)
+            except OSError:
+                with cls._lock:
+                    if cls._pending is None:
+                        cls._pending = payload
+                    cls._written = written
+                raise
+            with cls._lock:
+                cls._write_count += 1
+
+    @classmethod
+    def _get_msgbox(cls):
+        """Helper method.
+        :returns the message box to inform the user with"""
+        if cls._msgbox is None:
+            from tkinter import messagebox
+            cls._msgbox = messagebox
+        return cls._msgbox
+
+
+def _replace_file(path, data):
+    """Replaces a file atomically: the data is written to a temporary file in the same directory, which is then
+    renamed, so that the file is never left half written.
+    :param data: a bytes object"""
+    handle, temp_path = tempfile.mkstemp(prefix='.persistence', dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(handle, 'wb') as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+atexit.register(Persistence.flush)
@@ -0,0 +1,62 @@
+import sys
+from time import perf_counter
+
+
+class StartupPhase:
+    """POD container class representing a phase of application startup."""
+
+    def __init__(self, name, seconds, elapsed, modules):
+        self.name = name
+        self.seconds = seconds  # duration of the phase
+        self.elapsed = elapsed  # time since the report was started, at the end of the phase
+        self.modules = modules  # sorted list of the names of the modules imported during the phase
+
+
+class StartupReport:
+    """Measures application startup in phases, from the creation of the report to e.g. the first window.
+    Like python -X importtime, it reports how long each phase took and which modules it imported, so that imports
+    and work creeping into startup show up release by release. Interpreter startup before the report was created is
+    not included."""
+
+    def __init__(self):
+        self._start = perf_counter()
+        self._last = self._start
+        self._modules = set(sys.modules)
+        self._phases = []
+
+    def mark(self, name):
+        """Ends the current phase and starts the next one.
+        :param name: what the ending phase did, e.g. 'import tkinter'
+        :returns a StartupPhase object"""
+        now = perf_counter()
+        modules = set(sys.modules)
+        phase = StartupPhase(name, now - self._last, now - self._start, sorted(modules - self._modules))
+        self._phases.append(phase)
+        self._last = now
+        self._modules = modules
+        return phase
+
+    def get_phases(self):
+        """Getter function.
+        :returns a list of StartupPhase objects in order"""
+        return self._phases
+
+    def get_elapsed(self, name):
+        """:returns the time in seconds from the start of the report to the end of the named phase, None if it has
+        not ended yet"""
+        for phase in self._phases:
+            if phase.name == name:
+                return phase.elapsed
+        return None
+
+    def format(self):
+        """Formats the phases as a table: duration, time since start, modules imported, and the top-level packages
+        they belong to.
+        :returns a String object"""
+        lines = ['startup:  phase [ms] | elapsed [ms] | modules | phase']
+        for phase in self._phases:
+            packages = sorted(set(module.split('.')[0] for module in phase.modules))
+            lines.append('startup: {:10.1f} | {:12.1f} | {:7d} | {}{}'.format(
+                phase.seconds * 1000, phase.elapsed * 1000, len(phase.modules), phase.name,
+                ' (' + ', '.join(packages) + ')' if packages else ''))
+        return '\n'.join(lines)
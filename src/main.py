@@ -1,10 +1,29 @@
-import tkinter as tk
+import sys
+
+from src.helpers.startup_report import StartupReport
+
+STARTUP_REPORT_FLAG = '--startup-report'  # print how long startup took and quit once the window is ready
+
+
+def _startup_ready(root, report):
+    report.mark('load persistence')
+    if STARTUP_REPORT_FLAG in sys.argv:
+        print(report.format(), file=sys.stderr)
+        root.destroy()
 
-from src.gui.gui import App
-from src.resources import app_icon_path
 
 if __name__ == '__main__':
+    report = StartupReport()
+    import tkinter as tk
+    report.mark('import tkinter')
+    from src.gui.gui import App
+    from src.resources import app_icon_path
+    report.mark('import gui')
+
     main = tk.Tk()
-    app = App(main)
+    app = App(main, on_ready=lambda: _startup_ready(main, report))
     main.iconbitmap(bitmap=app_icon_path)
+    report.mark('build window')
+    main.update()
+    report.mark('first window')
     main.mainloop()
@@ -0,0 +1,324 @@
+import re
+
+import numpy as np
+
+_COMMENT = re.compile(r'\([^)]*\)|;.*')
+_SKIP = re.compile(r'^[ \t]*(?:MSG|%).*$', re.MULTILINE)  # operator messages and the file delimiter
+_BLOCK = re.compile(r'^[ \t]*O([0-9]+)[ \t]*(SUB|ENDSUB|CALL)?[ \t]*$', re.MULTILINE)
+_SURFACE = -1e-6  # Z below which the tool cuts, with some room for rounding
+_MAX_CALL_DEPTH = 8
+
+
+def _tokenize(text):
+    """Splits a program into words, e.g. 'X-1.25', all at once on the program's bytes: a word is a letter directly
+    followed by a number, whose value is summed up from its digits' place values.
+    :returns tuple of arrays: each word's letter as an ASCII code, its value (nan if the letter has no number),
+    and its line index"""
+    chars = np.frombuffer(text.encode('ascii', errors='replace'), dtype=np.uint8)
+    count = len(chars)
+    letters = (chars >= ord('A')) & (chars <= ord('Z'))
+    starts = np.flatnonzero(letters)
+    if not len(starts):
+        return tuple((np.zeros(0, dtype=np.uint8), np.zeros(0), np.zeros(0, dtype=np.int64)))
+    digits = (chars >= ord('0')) & (chars <= ord('9'))
+    numeric = digits | (chars == ord('.')) | (chars == ord('-')) | (chars == ord('+'))
+    word = np.cumsum(letters) - 1  # the word of each character, -1 before the first letter
+
+    # A number runs from behind its letter up to the next character that cannot be part of it
+    positions = np.arange(count + 1)
+    following = np.minimum.accumulate(np.where(np.append(~numeric, True), positions, count)[::-1])[::-1]
+    stops = following[starts + 1]
+    member = numeric & (word >= 0) & (positions[:-1] < stops[word])
+
+    points = stops.copy()  # the decimal point of each number, or its end
+    is_point = member & (chars == ord('.'))
+    points[word[is_point]] = np.flatnonzero(is_point)
+    index = np.flatnonzero(member & digits)
+    owner = word[index]
+    exponents = np.where(index < points[owner], points[owner] - index - 1, points[owner] - index)
+    values = np.bincount(owner, weights=(chars[index] - ord('0')) * 10.0 ** exponents, minlength=len(starts))
+    values[np.bincount(owner, minlength=len(starts)) == 0] = np.nan
+    values[word[member & (chars == ord('-'))]] *= -1
+    lines = np.cumsum(chars == ord('\n'))[starts]
+    return tuple((chars[starts], values, lines))
+
+
+def _line_values(letters, values, lines, line_count, letter):
+    """:returns a float array holding the value of a letter's word on each line, nan on lines without it"""
+    result = np.full(line_count, np.nan)
+    selected = letters == ord(letter)
+    result[lines[selected]] = values[selected]
+    return result
+
+
+def _forward_fill(values, initial):
+    """Carries modal values forward over the lines that do not set them.
+    :returns a float array"""
+    last = np.where(np.isnan(values), -1, np.arange(len(values)))
+    np.maximum.accumulate(last, out=last)
+    return np.where(last >= 0, values[np.maximum(last, 0)], initial)
+
+
+def _axis_positions(words, absolute):
+    """Tracks an axis in mixed distance modes: after each line, the axis is at the last absolute position plus all
+    incremental moves since.
+    :param words: the axis word of each line, nan where the axis does not move
+    :param absolute: a bool array, True for lines in absolute distance mode
+    :returns a float array of the axis position after each line, starting from 0"""
+    given = ~np.isnan(words)
+    increments = np.cumsum(np.where(given & ~absolute, words, 0))
+    last = np.where(given & absolute, np.arange(len(words)), -1)
+    np.maximum.accumulate(last, out=last)
+    safe = np.maximum(last, 0)
+    return np.where(last >= 0, words[safe] + increments - increments[safe], increments)
+
+
+def _execution_order(text, letters, values, lines, line_count):
+    """Works out in which order the lines of a program run: the main program up to M02 or M30, with the body of
+    each subprogram inserted after the line calling it. Subprograms are defined in the M98 (O1001 ... M99) or the
+    O-call (o1001 sub ... o1001 endsub) form; a Fanuc program number in front of the main program is skipped.
+    Only the few lines that structure the program are looked at one by one.
+    :returns an int array of line indices
+    :raises ValueError if the program calls a subprogram it does not define"""
+    events = _structure_events(text, letters, values, lines, line_count)
+    has_words = np.concatenate(([0], np.cumsum(np.bincount(lines, minlength=line_count))))
+    main, subprograms, calls = _split_blocks(events, has_words, line_count)
+    return np.concatenate([np.zeros(0, dtype=np.int64)] + _expand_calls(main, subprograms, calls, 0))
+
+
+def _structure_events(text, letters, values, lines, line_count):
+    """Finds the lines that structure a program: O-word block lines, M98 calls, M99 returns, and M02 or M30.
+    :returns a sorted list of (line, kind, number) tuples"""
+    events = []
+    newlines = np.flatnonzero(np.frombuffer(text.encode('ascii', errors='replace'), dtype=np.uint8) == ord('\n'))
+    for match in _BLOCK.finditer(text):
+        line = int(np.searchsorted(newlines, match.start()))
+        events.append(tuple((line, match.group(2) or 'O', int(match.group(1)))))
+    numbers = _line_values(letters, values, lines, line_count, 'P')
+    for letter_index in np.flatnonzero((letters == ord('M')) & np.isin(values, (2, 30, 98, 99))):
+        line = int(lines[letter_index])
+        code = values[letter_index]
+        if code == 98:
+            events.append(tuple((line, 'CALL', int(numbers[line]))))
+        else:
+            events.append(tuple((line, 'RETURN' if code == 99 else 'END', 0)))
+    events.sort()
+    return events
+
+
+def _split_blocks(events, has_words, line_count):
+    """Splits a program into the main program and the subprograms along its structuring lines.
+    :param has_words: the number of words before each line, to tell a Fanuc program number from a subprogram
+    :returns tuple: the main program's [start, stop) line ranges, a dictionary of subprogram number -> line ranges,
+    and a dictionary of calling line -> subprogram number"""
+    main = []
+    subprograms = {}
+    calls = {}
+    block = main
+    start = 0
+    for line, kind, number in events:
+        if kind == 'CALL':
+            if block is not None:
+                calls[line] = number
+            continue
+        if block is not None:
+            block.append(tuple((start, line + 1 if kind in ('RETURN', 'END') else line)))
+        start = line + 1
+        if kind == 'SUB' or kind == 'O' and (block is not main or has_words[line] > 0):
+            block = subprograms.setdefault(number, [])
+        elif kind == 'ENDSUB':
+            block = main
+        elif kind in ('RETURN', 'END'):
+            block = None
+    if block is not None:
+        block.append(tuple((start, line_count)))
+    return tuple((main, subprograms, calls))
+
+
+def _expand_calls(ranges, subprograms, calls, depth):
+    """Inserts the lines of each called subprogram after its calling line.
+    :returns a list of int arrays of line indices"""
+    if depth > _MAX_CALL_DEPTH:
+        raise ValueError('Subprograms nested too deeply')
+    chunks = []
+    for first, stop in ranges:
+        for line in sorted(line for line in calls if first <= line < stop):
+            if calls[line] not in subprograms:
+                raise ValueError('Call of undefined subprogram ' + str(calls[line]))
+            chunks.append(np.arange(first, line + 1))
+            chunks += _expand_calls(subprograms[calls[line]], subprograms, calls, depth + 1)
+            first = line + 1
+        chunks.append(np.arange(first, stop))
+    return chunks
+
+
+def parse_moves(gcode):
+    """Traces the tool through a G-code program as written by MachinifyVector and its post-processors: G00, G01,
+    and G81 moves (with G99, retracting to the R plane) in absolute (G90) or incremental (G91) distance mode, and
+    subprogram calls. The tool starts at the machine's zero. The program is evaluated on numpy arrays.
+    :param gcode: a String object or an iterable of lines, e.g. an open G-code file
+    :returns tuple: (n, 3) float arrays of each move's start and end position in mm, and a bool array,
+    True for rapid moves. Moves of zero length are left out.
+    :raises ValueError if the program calls a subprogram it does not define"""
+    if not isinstance(gcode, str):
+        gcode = '\n'.join(line.rstrip('\r\n') for line in gcode)
+    text = _SKIP.sub('', _COMMENT.sub('', gcode).upper())
+    line_count = text.count('\n') + 1
+    letters, values, lines = _tokenize(text)
+    order = _execution_order(text, letters, values, lines, line_count)
+
+    def modal(codes, initial):
+        """:returns the G-code of a modal group each executed line leaves the controller in"""
+        selected = (letters == ord('G')) & np.isin(values, codes)
+        return _forward_fill(_line_values(letters[selected], values[selected], lines[selected], line_count, 'G')[order],
+                             initial)
+
+    motion = modal((0, 1, 80, 81), 0)
+    absolute = modal((90, 91), 90) == 90
+    x, y, z, r = (_line_values(letters, values, lines, line_count, axis)[order] for axis in 'XYZR')
+    drills = (motion == 81) & (~np.isnan(x) | ~np.isnan(y))
+    moving = np.isin(motion, (0, 1)) & (~np.isnan(x) | ~np.isnan(y) | ~np.isnan(z)) | drills
+    cycle_r = _forward_fill(r, 0)
+    cycle_z = _forward_fill(np.where(motion == 81, z, np.nan), 0)
+    feeds_xy = np.isin(motion, (0, 1, 81))
+    x = _axis_positions(np.where(feeds_xy, x, np.nan), absolute)
+    y = _axis_positions(np.where(feeds_xy, y, np.nan), absolute)
+    # After a drilling cycle the tool rests at the R plane
+    z = _axis_positions(np.where(drills, cycle_r, np.where(motion == 81, np.nan, z)), absolute | drills)
+
+    # Each move ends at a waypoint: one per G00 or G01 line, four per hole: rapid to it, rapid down to the R plane,
+    # feed down to the cycle's Z, rapid back up to the R plane
+    columns = (x, y, z, motion, cycle_r, cycle_z, drills)
+    x, y, z, motion, cycle_r, cycle_z, drills = (column[moving] for column in columns)
+    counts = np.where(drills, 4, 1)
+    slots = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    waypoint_line = np.repeat(np.arange(len(x)), counts)
+    previous_z = np.concatenate(([0.0], z[:-1]))[waypoint_line]
+    drilling = drills[waypoint_line]
+    heights = np.stack((previous_z, cycle_r[waypoint_line], cycle_z[waypoint_line], cycle_r[waypoint_line]), axis=1)
+    waypoints = np.stack((x[waypoint_line], y[waypoint_line],
+                          np.where(drilling, heights[np.arange(len(slots)), np.minimum(slots, 3)], z[waypoint_line])),
+                         axis=1)
+    rapid = np.where(drilling, slots != 2, motion[waypoint_line] == 0)
+    starts = np.vstack((np.zeros((1, 3)), waypoints[:-1]))
+    keep = np.any(waypoints != starts, axis=1)
+    return tuple((starts[keep], waypoints[keep], rapid[keep]))
+
+
+def rasterize_strokes(p0, p1, radius, size, samples):
+    """Rasterizes round-ended strokes onto a grid of samples x samples points per module. Only the points within each
+    stroke's bounding box are tested, all strokes at once. Points beyond the size x size modules are left out.
+    :param p0, p1: (n, 2) float arrays of the strokes' start and end in modules
+    :param radius: the tool radius in modules
+    :returns tuple of int arrays: the stroke, sample column, and sample row of each covered point"""
+    limit = size * samples - 1
+    low = np.ceil((np.minimum(p0, p1) - radius + 0.5) * samples - 0.5).astype(np.int64)
+    high = np.floor((np.maximum(p0, p1) + radius + 0.5) * samples - 0.5).astype(np.int64)
+    np.clip(low, 0, None, out=low)
+    np.clip(high, None, limit, out=high)
+    width = np.clip(high[:, 0] - low[:, 0] + 1, 0, None)
+    height = np.clip(high[:, 1] - low[:, 1] + 1, 0, None)
+    counts = width * height
+    stroke = np.repeat(np.arange(len(p0)), counts)
+    offset = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    rows, columns = np.divmod(offset, width[stroke])
+    kx = low[stroke, 0] + columns
+    ky = low[stroke, 1] + rows
+
+    # Distance of each point to the closest point of its stroke, per axis to save numpy temporaries
+    start_x = p0[stroke, 0]
+    start_y = p0[stroke, 1]
+    direction = p1 - p0
+    length_sq = np.sum(direction ** 2, axis=1)
+    length_sq[length_sq == 0] = 1
+    direction_x = direction[stroke, 0]
+    direction_y = direction[stroke, 1]
+    relative_x = (kx + 0.5) / samples - 0.5 - start_x
+    relative_y = (ky + 0.5) / samples - 0.5 - start_y
+    t = np.clip((relative_x * direction_x + relative_y * direction_y) / length_sq[stroke], 0, 1)
+    covered = (relative_x - t * direction_x) ** 2 + (relative_y - t * direction_y) ** 2 <= radius ** 2
+    return tuple((stroke[covered], kx[covered], ky[covered]))
+
+
+class BackplotReport:
+    """POD container class representing the result of a back-plot. Modules are listed as (code, x, y) tuples: the
+    index of the QR-code in the order the codes were added, the module's column, and its row."""
+
+    def __init__(self):
+        self.missed = []  # dark modules that are not engraved
+        self.stray = []  # light modules the tool cuts into
+        self.double_cut = []  # modules engraved by more than one plunge
+        self.outside_moves = 0  # cutting moves beyond all QR-codes
+        self.rapid_cuts = 0  # G00 moves in XY below the surface
+        self.cut_moves = 0  # moves in XY below the surface, and plunges that do not move on in XY
+
+    def is_ok(self):
+        """Double cuts cost time, but do not spoil the code, so they are not counted as errors.
+        :returns True if the program engraves exactly the dark modules"""
+        return not self.missed and not self.stray and not self.outside_moves and not self.rapid_cuts
+
+    def get_summary(self):
+        return '{} missed, {} stray, {} double-cut modules, {} cutting moves outside the codes, {} rapid cuts'.format(
+            len(self.missed), len(self.stray), len(self.double_cut), self.outside_moves, self.rapid_cuts)
+
+
+class BackplotVerifier:
+    """Checks generated G-code against the QR-codes it is meant to engrave. The program's cutting moves, all moves
+    below Z0, are rasterized as strokes of the tool's width onto a canvas of samples x samples points per module.
+    A dark module counts as engraved if at least half of it is covered, any cut into a light module is a stray
+    cut. Modules whose center is passed by more than one plunge are double cuts.
+    The whole canvas is evaluated with numpy, so checking every generated file is cheap, version 40 included."""
+
+    def __init__(self, step, tool_width=None, samples=4):
+        self._step = step  # XY distance of two modules in mm
+        self._radius = (step if tool_width is None else tool_width) / step / 2  # in modules
+        self._samples = samples
+        self._codes = []  # (QrValueTable, XY zero) tuples
+
+    def add_code(self, qr_value_table, xy_zero):
+        """Adds a QR-code the program engraves.
+        :param qr_value_table: the QrValueTable of the code
+        :param xy_zero: a Point, the machine position of the code's top left module center in mm"""
+        self._codes.append(tuple((qr_value_table, xy_zero)))
+
+    def verify(self, gcode):
+        """Back-plots a program.
+        :param gcode: a String object or an iterable of lines
+        :returns a BackplotReport object"""
+        starts, ends, rapid = parse_moves(gcode)
+        report = BackplotReport()
+        below = np.minimum(starts[:, 2], ends[:, 2]) < _SURFACE
+        moves_xy = np.any(starts[:, :2] != ends[:, :2], axis=1)
+        report.rapid_cuts = int(np.count_nonzero(below & rapid & moves_xy))
+        plunges = (starts[:, 2] >= _SURFACE) & (ends[:, 2] < _SURFACE)
+        strokes = np.cumsum(plunges)
+        # Plunges and retracts only add to the coverage of strokes that do not move in XY, then the plunge suffices
+        moves_in_stroke = np.bincount(strokes[below & moves_xy], minlength=strokes[-1] + 1 if len(strokes) else 0)
+        rasterized = below & (moves_xy | plunges & (moves_in_stroke[strokes] == 0))
+        strokes = strokes[rasterized]
+        report.cut_moves = int(np.count_nonzero(rasterized))
+        cut_starts = starts[rasterized, :2]
+        cut_ends = ends[rasterized, :2]
+
+        inside = np.zeros(len(cut_starts), dtype=bool)
+        for index, (table, xy_zero) in enumerate(self._codes):
+            size = table.size
+            zero = np.array([xy_zero.x, xy_zero.y])
+            flip = np.array([1, -1])  # Y axis points down in the QR-code, up on the machine
+            p0 = (cut_starts - zero) * flip / self._step
+            p1 = (cut_ends - zero) * flip / self._step
+            inside |= np.all((np.minimum(p0, p1) >= -0.5) & (np.maximum(p0, p1) <= size - 0.5), axis=1)
+
+            _, kx, ky = rasterize_strokes(p0, p1, self._radius, size, self._samples)
+            canvas = np.zeros((size * self._samples, size * self._samples), dtype=bool)
+            canvas[ky, kx] = True
+            coverage = canvas.reshape(size, self._samples, size, self._samples).sum(axis=(1, 3), dtype=np.int32)
+            report.missed += [(index, x, y) for y, x in np.argwhere(table.table & (2 * coverage < self._samples ** 2))]
+            report.stray += [(index, x, y) for y, x in np.argwhere(~table.table & (coverage > 0))]
+
+            move, kx, ky = rasterize_strokes(p0, p1, self._radius, size, 1)
+            visits = np.unique(strokes[move] * size * size + ky * size + kx) % (size * size)
+            passes = np.bincount(visits, minlength=size * size).reshape(size, size)
+            report.double_cut += [(index, x, y) for y, x in np.argwhere(passes > 1)]
+        report.outside_moves = int(np.count_nonzero(~inside))
+        return report
@@ -0,0 +1,163 @@
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from qrcodegen import QrCode, QrSegment
+
+from src.platform.vectorize_helper import QrValueTable
+from src.platform.line_path import LinePath, Strategy
+from src.platform.machinify_vector import MachinifyVector
+from src.platform.postprocessor.post_processor import PostProcessor
+from src.platform.template_planner import get_template
+
+_UNSAFE_FILE_NAME_CHARS = re.compile(r'[^A-Za-z0-9_-]')
+
+
+def safe_file_name(name):
+    """Replaces every character except ASCII letters, digits, '_' and '-' with '_', so that a text cannot name a
+    file outside the output directory or one the file system rejects.
+    :returns a String object"""
+    return _UNSAFE_FILE_NAME_CHARS.sub('_', name)
+
+
+class BatchResult:
+    """POD container class representing the outcome of one batch item. Either file_path or error is set."""
+
+    def __init__(self, index, text, file_path=None, error=None):
+        self.index = index
+        self.text = text
+        self.file_path = file_path
+        self.error = error
+
+    def is_ok(self):
+        return self.error is None
+
+
+def plan_item(index, text, settings):
+    """Encodes a text, plans its path and writes the G-code file. Runs inside a worker process.
+    Any error is caught and reported so that one bad item does not stop the batch.
+    :param index: the position of the text within the batch
+    :param text: the String object to encode
+    :param settings: a dictionary with the BatchPlanner's machining parameters
+    :returns a BatchResult object"""
+    try:
+        if settings['mask'] < 0:
+            qr = QrCode.encode_text(text, settings['ecc'])
+            table = QrValueTable()
+            table.set_qr(qr)
+            path = LinePath(table, settings['strategy'])
+        else:  # serial run: codes of a version share their function modules
+            qr = QrCode.encode_segments(QrSegment.make_segments(text), settings['ecc'], mask=settings['mask'])
+            path = get_template(qr.get_version(), qr.get_error_correction_level(), settings['mask'],
+                                settings['strategy']).make_path(qr)
+        machinify = MachinifyVector(settings['version'])
+        machinify.set_project_name(text)
+        machinify.set_qr_path(path)
+        machinify.set_tool(settings['tool'])
+        machinify.set_engrave_params(settings['engrave_params'])
+        machinify.set_xy_zero(settings['xy_zero'])
+        machinify.set_post_processor(settings['post_processor'])
+        machinify.get_job_duration_sec()  # Job duration is part of the G-code header
+
+        file_path = os.path.join(settings['output_dir'], '{:05d}_qr_{}{}'.format(
+            index, safe_file_name(machinify.get_project_name()), settings['file_extension']))
+        with open(file_path, 'w') as file:
+            machinify.write_gcode(file)
+        if settings['verify']:
+            with open(file_path) as file:
+                report = machinify.verify_gcode(file)
+            if not report.is_ok():
+                return BatchResult(index, text, error='Back-plot: ' + report.get_summary())
+        return BatchResult(index, text, file_path=file_path)
+    except Exception as error:
+        return BatchResult(index, text, error=type(error).__name__ + ': ' + str(error))
+
+
+class BatchPlanner:
+    """Headless batch API that converts many texts into one G-code file each. Items are distributed across a pool of
+    worker processes. At most max_in_flight items are submitted or waiting for their turn to be delivered at any time,
+    so arbitrarily long (or endless) inputs, or one slow item in an ordered batch, do not pile up in memory.
+    For serial runs, set mask to a fixed QR-code mask 0..7: items are then planned with a SerialTemplate per
+    version and error correction level, which encodes and plans much faster than choosing the best mask per item.
+    Either way, ecc is the minimum error correction level: it is raised as far as the version allows.
+    Files are named with the post-processor's file extension unless file_extension is given.
+    With verify, each file is read back and back-plotted against its QR-code; items whose file does not engrave
+    exactly the code's dark modules are reported as errors."""
+
+    def __init__(self, tool, engrave_params, xy_zero, output_dir, version=1.2, strategy=Strategy.RUN_LENGTH,
+                 ecc=QrCode.Ecc.MEDIUM, max_workers=None, max_in_flight=None, ordered=True, file_extension=None,
+                 mask=-1, post_processor=None, verify=False):
+        post_processor = post_processor or PostProcessor()
+        self._settings = {'tool': tool,
+                          'engrave_params': engrave_params,
+                          'xy_zero': xy_zero,
+                          'output_dir': output_dir,
+                          'version': version,
+                          'strategy': strategy,
+                          'ecc': ecc,
+                          'mask': mask,
+                          'post_processor': post_processor,
+                          'verify': verify,
+                          'file_extension': file_extension or post_processor.get_file_extension()}
+        self._max_workers = max_workers or os.cpu_count() or 1
+        self._max_in_flight = max_in_flight or 2 * self._max_workers
+        self._ordered = ordered
+
+    def run(self, texts):
+        """Plans all texts. A generator: results are delivered while the batch is still running.
+        :param texts: an iterable of String objects
+        :returns yields BatchResult objects, in input order if the planner is ordered, else as they complete"""
+        os.makedirs(self._settings['output_dir'], exist_ok=True)
+        pending = {}  # future -> (index, text)
+        finished = {}  # index -> BatchResult, waiting for its turn if ordered
+        next_index = 0
+        items = enumerate(texts)
+        exhausted = False
+        with ProcessPoolExecutor(max_workers=self._max_workers) as executor:
+            while pending or finished or not exhausted:
+                if not exhausted:
+                    exhausted = not self._submit(executor, items, pending, finished)
+                if pending:
+                    self._collect(pending, finished)
+                # With nothing running, every item taken so far is finished and can be delivered in order
+                for result in self._pop_ready(finished, next_index, everything=not pending):
+                    yield result
+                    next_index = result.index + 1
+
+    def _submit(self, executor, items, pending, finished):
+        """Helper method. Submits items until max_in_flight items are submitted or waiting for their turn.
+        :returns False once the items are exhausted"""
+        while len(pending) + len(finished) < self._max_in_flight:
+            item = next(items, None)
+            if item is None:
+                return False
+            index, text = item
+            try:
+                pending[executor.submit(plan_item, index, text, self._settings)] = item
+            except Exception as error:  # e.g. the pool is broken
+                finished[index] = BatchResult(index, text, error=type(error).__name__ + ': ' + str(error))
+                break
+        return True
+
+    @staticmethod
+    def _collect(pending, finished):
+        """Helper method. Waits for at least one submitted item and moves the results of all completed ones."""
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            index, text = pending.pop(future)
+            try:
+                finished[index] = future.result()
+            except Exception as error:  # e.g. the worker process died
+                finished[index] = BatchResult(index, text, error=type(error).__name__ + ': ' + str(error))
+
+    def _pop_ready(self, finished, next_index, everything=False):
+        """Helper method. Removes the results that can be delivered: all of them if the planner is unordered or
+        everything is set, else the consecutive ones from next_index on.
+        :returns a list of BatchResult objects in delivery order"""
+        if everything or not self._ordered:
+            indices = sorted(finished)
+        else:
+            indices = []
+            while next_index + len(indices) in finished:
+                indices.append(next_index + len(indices))
+        return [finished.pop(index) for index in indices]
@@ -0,0 +1,114 @@
+from math import ceil
+
+import numpy as np
+
+from src.platform.backplot import rasterize_strokes
+
+
+class CoverageReport:
+    """POD container class representing how the tool's cuts cover a QR-code at a module pitch. Areas are in mm^2."""
+
+    def __init__(self, pitch, cut_width, fractions, table, uncut_area, redundant_area, crossing_area, overcut_area):
+        self.pitch = pitch  # distance of two modules in mm
+        self.cut_width = cut_width  # width of the tool's cut at engrave depth in mm
+        self.fractions = fractions  # size x size float array indexed [y, x]: the cut share of each module's area
+        dark = fractions[table]
+        self.min_dark_fraction = float(dark.min()) if len(dark) else 1.0
+        self.mean_dark_fraction = float(dark.mean()) if len(dark) else 1.0
+        self.uncut_area = uncut_area  # within dark modules, e.g. the corners of single modules and run ends
+        self.redundant_area = redundant_area  # cut by more than one pass
+        self.crossing_area = crossing_area  # the part of redundant_area where horizontal and vertical passes cross
+        self.overcut_area = overcut_area  # cut within light modules and around the code
+
+
+class CoverageAnalysis:
+    """Works out which part of each module the planned passes cut, from the segments in machining order and the width
+    the tool cuts at engrave depth, e.g. a V-bit's width from its angle, tip, and depth.
+    A pass is everything cut between a plunge and the next retract: the segments of a polyline and the moves linking
+    them. The geometry scales with the ratio of cut width to module pitch only, so pitches can be compared without
+    planning again. Areas are sampled on samples x samples points per module."""
+
+    def __init__(self, qr_value_table, toolpath, plunges, samples=8):
+        self._table = qr_value_table.table
+        self._size = qr_value_table.size
+        self._samples = samples
+        starts = toolpath.get_starts().astype(float)
+        ends = toolpath.get_ends().astype(float)
+        plunges = np.asarray(plunges, dtype=bool)
+        passes = np.cumsum(plunges)
+        # Linking moves from the end of a segment to the start of the next one of the same polyline
+        links = np.flatnonzero(~plunges[1:]) + 1
+        links = links[np.any(ends[links - 1] != starts[links], axis=1)]
+        self._p0 = np.vstack((starts, ends[links - 1]))
+        self._p1 = np.vstack((ends, starts[links]))
+        self._passes = np.concatenate((passes, passes[links]))
+        direction = self._p1 - self._p0
+        self._horizontal = (direction[:, 1] == 0) & (direction[:, 0] != 0)
+        self._vertical = (direction[:, 0] == 0) & (direction[:, 1] != 0)
+
+    def analyze(self, pitch, cut_width):
+        """Samples the cuts of all passes at a module pitch.
+        :param pitch: the distance of two modules in mm
+        :param cut_width: the width of the tool's cut at engrave depth in mm
+        :returns a CoverageReport object"""
+        radius = cut_width / pitch / 2
+        margin = self._get_margin(radius)
+        span = (self._size + 2 * margin) * self._samples
+        move, kx, ky = rasterize_strokes(self._p0 + margin, self._p1 + margin, radius, self._size + 2 * margin,
+                                         self._samples)
+        points = ky * span + kx
+        # Passes per point: a pass counts once, wherever its own moves overlap
+        visits = np.unique(self._passes[move] * span * span + points) % (span * span)
+        passes = np.bincount(visits, minlength=span * span).reshape(span, span)
+        horizontal = np.bincount(points[self._horizontal[move]], minlength=span * span).reshape(span, span) > 0
+        vertical = np.bincount(points[self._vertical[move]], minlength=span * span).reshape(span, span) > 0
+
+        cut = passes > 0
+        inner = slice(margin * self._samples, (margin + self._size) * self._samples)
+        modules = cut[inner, inner].reshape(self._size, self._samples, self._size, self._samples)
+        fractions = modules.mean(axis=(1, 3))
+        dark = np.zeros((span, span), dtype=bool)
+        dark[inner, inner] = np.repeat(np.repeat(self._table, self._samples, axis=0), self._samples, axis=1)
+        point_area = (pitch / self._samples) ** 2
+        return CoverageReport(pitch, cut_width, fractions, self._table,
+                              uncut_area=np.count_nonzero(dark & ~cut) * point_area,
+                              redundant_area=np.count_nonzero(passes > 1) * point_area,
+                              crossing_area=np.count_nonzero((passes > 1) & horizontal & vertical) * point_area,
+                              overcut_area=np.count_nonzero(~dark & cut) * point_area)
+
+    def get_min_dark_fraction(self, pitch, cut_width):
+        """:returns the cut share of the least covered dark module at a module pitch, a float"""
+        radius = cut_width / pitch / 2
+        _, kx, ky = rasterize_strokes(self._p0, self._p1, radius, self._size, self._samples)
+        cut = np.zeros((self._size * self._samples, self._size * self._samples), dtype=bool)
+        cut[ky, kx] = True
+        counts = cut.reshape(self._size, self._samples, self._size, self._samples).sum(axis=(1, 3))
+        dark = counts[self._table]
+        return float(dark.min()) / self._samples ** 2 if len(dark) else 1.0
+
+    def suggest_pitch(self, cut_width, min_fraction=1.0, tolerance=0.001):
+        """Searches the largest module pitch at which every dark module is cut to at least min_fraction of its area.
+        Smaller pitches cover more, but the cut then reaches into light neighbours (see CoverageReport.overcut_area).
+        :param cut_width: the width of the tool's cut at engrave depth in mm
+        :param min_fraction: the share of each dark module's area that has to be cut, 1.0 for full coverage
+        :param tolerance: the precision of the result in mm
+        :returns the pitch in mm, a float"""
+        low = cut_width / 2  # the tool covers a module's whole square, and more
+        high = cut_width
+        if not self._table.any():
+            return high
+        while self.get_min_dark_fraction(high, cut_width) >= min_fraction and high < 64 * cut_width:
+            low = high
+            high *= 2
+        while high - low > tolerance:
+            middle = (low + high) / 2
+            if self.get_min_dark_fraction(middle, cut_width) >= min_fraction:
+                low = middle
+            else:
+                high = middle
+        return low
+
+    @staticmethod
+    def _get_margin(radius):
+        """:returns the number of modules around the code that cuts can reach into"""
+        return max(0, ceil(radius - 0.5))
@@ -0,0 +1,276 @@
+from src.platform.subprogram import SubprogramDialect
+
+
+def _continues(a, b, c):
+    """:returns True if the move from b to c goes on in the direction of the move from a to b"""
+    ab = (b[0] - a[0], b[1] - a[1])
+    bc = (c[0] - b[0], c[1] - b[1])
+    return ab[0] * bc[1] == ab[1] * bc[0] and ab[0] * bc[0] + ab[1] * bc[1] > 0
+
+
+class GcodeEmitter:
+    """Assembles the engrave moves of a job from precomputed G-code words. On the module grid, X and Y can only take
+    one of size values each, so their strings are formatted once per job together with the constant Z and F words.
+    Segments are then put together from table lookups.
+    number_format turns coordinates into G-code numbers, e.g. to add the decimal point some controllers require."""
+
+    def __init__(self, size, tool_step, xy_zero, engrave_params, tool, number_format=str):
+        self._x = [number_format(round(index * tool_step + xy_zero.x, 3)) for index in range(size)]
+        self._y = [number_format(round(-index * tool_step + xy_zero.y, 3)) for index in range(size)]
+        self._plunge = 'G01 Z-' + number_format(engrave_params.z_engrave) + ' F' + str(tool.fz) + '\n'
+        self._hover = 'G00 Z' + number_format(engrave_params.z_hover) + '\n'
+        self._feed = ' F' + str(tool.fxy) + '\n'
+
+    def get_size(self):
+        """Getter function.
+        :returns the number of grid positions per axis"""
+        return len(self._x)
+
+    def segment(self, line_segment):
+        """Converts a QR-code line segment into G-code XYZ moves: rapid to start, plunge, cut, hover.
+        :param line_segment: LineSegment object
+        :returns a String object"""
+        x = line_segment.position.x
+        y = line_segment.position.y
+        return 'G00 X' + self._x[x] + ' Y' + self._y[y] + '\n' + self._plunge + \
+            self._cut(x, y, line_segment.x_length, line_segment.y_length) + self._hover
+
+    def polyline(self, polyline):
+        """Converts linked QR-code line segments into G-code XYZ moves. The tool is lowered once, moves between the
+        segments are cut, and it is lifted after the last segment.
+        :param polyline: a list of LineSegment objects as grouped by SegmentLinker
+        :returns a String object"""
+        first = polyline[0].position
+        cmd = ['G00 X' + self._x[first.x] + ' Y' + self._y[first.y] + '\n', self._plunge]
+        end = None
+        for line_segment in polyline:
+            x = line_segment.position.x
+            y = line_segment.position.y
+            if end is not None and end != (x, y):
+                # Linking move, only crosses modules that get engraved anyway
+                cmd.append('G01 X' + self._x[x] + ' Y' + self._y[y] + self._feed)
+            cmd.append(self._cut(x, y, line_segment.x_length, line_segment.y_length))
+            end = (x + line_segment.x_length, y + line_segment.y_length)
+        cmd.append(self._hover)
+        return ''.join(cmd)
+
+    def call(self, x, y, call_line):
+        """Rapid moves to a subprogram's start and calls it.
+        :param x, y: start position in QR-code modules
+        :param call_line: the dialect's call, a String object ending with a line break
+        :returns a String object"""
+        return 'G00 X' + self._x[x] + ' Y' + self._y[y] + '\n' + call_line
+
+    def position(self, x, y):
+        """:returns the X and Y words of a grid position, e.g. for canned cycles"""
+        return 'X' + self._x[x] + ' Y' + self._y[y]
+
+    def reset_state(self):
+        """Tells the emitter that commands it did not emit may have changed the controller's modal state."""
+        pass
+
+    def finish(self):
+        """:returns what has to follow the last move of the engrave block, a String object"""
+        return ''
+
+    def _cut(self, x, y, x_length, y_length):
+        """:returns the cutting move along a segment from its start, or an empty string for single modules"""
+        if y_length != 0:
+            return 'G01 Y' + self._y[y + y_length] + self._feed
+        if x_length != 0:
+            return 'G01 X' + self._x[x + x_length] + self._feed
+        return ''
+
+
+class CompactGcodeEmitter(GcodeEmitter):
+    """GcodeEmitter that tracks the controller's modal state (motion mode, feed, and X/Y/Z position) and leaves out
+    every word that would not change it. Moves that do not change the position are dropped entirely.
+    One instance has to emit the whole engrave block in order, directly after the prepare block."""
+
+    def __init__(self, size, tool_step, xy_zero, engrave_params, tool, number_format=str):
+        super().__init__(size, tool_step, xy_zero, engrave_params, tool, number_format)
+        self._z_engrave = '-' + number_format(engrave_params.z_engrave)
+        self._z_hover = number_format(engrave_params.z_hover)
+        self._fz = str(tool.fz)
+        self._fxy = str(tool.fxy)
+        # State after the prepare block: rapid move to hover height, XY position and feed not yet known here
+        self._motion = 'G00'
+        self._pos_x = None
+        self._pos_y = None
+        self._pos_z = self._z_hover
+        self._feed_word = None
+
+    def segment(self, line_segment):
+        x = line_segment.position.x
+        y = line_segment.position.y
+        return self._move('G00', x=self._x[x], y=self._y[y]) + \
+            self._move('G01', z=self._z_engrave, feed=self._fz) + \
+            self._cut(x, y, line_segment.x_length, line_segment.y_length) + \
+            self._move('G00', z=self._z_hover)
+
+    def polyline(self, polyline):
+        """Like GcodeEmitter.polyline(), but consecutive moves that continue in the same direction are merged."""
+        first = polyline[0].position
+        points = [(first.x, first.y)]
+        for line_segment in polyline:
+            start = (line_segment.position.x, line_segment.position.y)
+            end = (start[0] + line_segment.x_length, start[1] + line_segment.y_length)
+            for point in (start, end):
+                if point == points[-1]:
+                    continue
+                if len(points) > 1 and _continues(points[-2], points[-1], point):
+                    points[-1] = point
+                else:
+                    points.append(point)
+        cmd = [self._move('G00', x=self._x[first.x], y=self._y[first.y]),
+               self._move('G01', z=self._z_engrave, feed=self._fz)]
+        for x, y in points[1:]:
+            cmd.append(self._move('G01', x=self._x[x], y=self._y[y], feed=self._fxy))
+        cmd.append(self._move('G00', z=self._z_hover))
+        return ''.join(cmd)
+
+    def call(self, x, y, call_line):
+        """Like GcodeEmitter.call(). The subprogram leaves the modal state unknown, so all words are written again
+        afterwards."""
+        cmd = self._move('G00', x=self._x[x], y=self._y[y]) + call_line
+        self.reset_state()
+        return cmd
+
+    def reset_state(self):
+        self._motion = None
+        self._pos_x = None
+        self._pos_y = None
+        self._pos_z = None
+        self._feed_word = None
+
+    def _cut(self, x, y, x_length, y_length):
+        return self._move('G01', x=self._x[x + x_length], y=self._y[y + y_length], feed=self._fxy)
+
+    def _move(self, motion, x=None, y=None, z=None, feed=None):
+        """Creates a G-code line holding only the words that change the modal state.
+        :returns a String object, empty if the move would not change the position"""
+        words = []
+        if x is not None and x != self._pos_x:
+            words.append('X' + x)
+            self._pos_x = x
+        if y is not None and y != self._pos_y:
+            words.append('Y' + y)
+            self._pos_y = y
+        if z is not None and z != self._pos_z:
+            words.append('Z' + z)
+            self._pos_z = z
+        if not words:
+            return ''
+        if motion != self._motion:
+            words.insert(0, motion)
+            self._motion = motion
+        if feed is not None and motion != 'G00' and feed != self._feed_word:
+            words.append('F' + feed)
+            self._feed_word = feed
+        return ' '.join(words) + '\n'
+
+
+class SubprogramEmitter:
+    """Emits clusters of polylines as subprograms of incremental (G91) moves. A body starts with the tool above its
+    first polyline's start at hover height and ends at hover height. Offsets are formatted from the grid step only,
+    so the same body serves all of a cluster's regions."""
+
+    def __init__(self, tool_step, engrave_params, tool, dialect, number_format=str):
+        self._step = tool_step
+        self._dialect = dialect
+        self._number_format = number_format
+        depth = number_format(round(engrave_params.z_hover + engrave_params.z_engrave, 3))
+        self._plunge = 'G01 Z-' + depth + ' F' + str(tool.fz) + '\n'
+        self._retract = 'G00 Z' + depth + '\n'
+        self._feed = ' F' + str(tool.fxy) + '\n'
+
+    def call(self, cluster):
+        """:returns the line calling a cluster's subprogram"""
+        if self._dialect == SubprogramDialect.O_CALL:
+            return 'o' + str(cluster.number) + ' call\n'
+        return 'M98 P' + str(cluster.number) + '\n'
+
+    def definition(self, cluster):
+        """:returns the subprogram of a cluster, a String object"""
+        if self._dialect == SubprogramDialect.O_CALL:
+            return 'o' + str(cluster.number) + ' sub\n' + self._body(cluster) + 'o' + str(cluster.number) + ' endsub\n'
+        return 'O' + str(cluster.number) + '\n' + self._body(cluster) + 'M99\n'
+
+    def _body(self, cluster):
+        cmd = ['G91\n']
+        position = None
+        for polyline in cluster.polylines:
+            start = (polyline[0].position.x, polyline[0].position.y)
+            if position is not None:
+                cmd.append(self._offset('G00', start[0] - position[0], start[1] - position[1], '\n'))
+            cmd.append(self._plunge)
+            position = start
+            for segment in polyline:
+                segment_start = (segment.position.x, segment.position.y)
+                if segment_start != position:
+                    cmd.append(self._offset('G01', segment_start[0] - position[0], segment_start[1] - position[1],
+                                            self._feed))
+                if segment.x_length or segment.y_length:
+                    cmd.append(self._offset('G01', segment.x_length, segment.y_length, self._feed))
+                position = (segment_start[0] + segment.x_length, segment_start[1] + segment.y_length)
+            cmd.append(self._retract)
+        cmd.append('G90\n')
+        return ''.join(cmd)
+
+    def _offset(self, motion, dx, dy, end):
+        """:returns an incremental move by dx, dy modules, leaving out axes that do not move"""
+        words = motion
+        if dx:
+            words += ' X' + self._number_format(round(dx * self._step, 3))
+        if dy:
+            words += ' Y' + self._number_format(round(-dy * self._step, 3))
+        return words + end
+
+
+class CannedCycleEmitter:
+    """Wraps a GcodeEmitter and cuts single modules with the G81 drilling cycle instead of rapid, plunge, and
+    retract lines: the first module programs the cycle, each further one only takes a line with its position.
+    G99 retracts to the R plane at hover height, where the wrapped emitter leaves the tool as well. The cycle is
+    cancelled with G80 before any other move."""
+
+    def __init__(self, emitter, engrave_params, tool, number_format=str):
+        self._emitter = emitter
+        self._cycle = ' Z-' + number_format(engrave_params.z_engrave) + ' R' + number_format(engrave_params.z_hover) + \
+                      ' F' + str(tool.fz) + '\n'
+        self._active = False
+
+    def get_size(self):
+        return self._emitter.get_size()
+
+    def segment(self, line_segment):
+        if line_segment.x_length == 0 and line_segment.y_length == 0:
+            return self._drill(line_segment.position)
+        return self._cancel() + self._emitter.segment(line_segment)
+
+    def polyline(self, polyline):
+        if len(polyline) == 1 and polyline[0].x_length == 0 and polyline[0].y_length == 0:
+            return self._drill(polyline[0].position)
+        return self._cancel() + self._emitter.polyline(polyline)
+
+    def call(self, x, y, call_line):
+        return self._cancel() + self._emitter.call(x, y, call_line)
+
+    def reset_state(self):
+        self._emitter.reset_state()
+
+    def finish(self):
+        return self._cancel() + self._emitter.finish()
+
+    def _drill(self, position):
+        if self._active:
+            return self._emitter.position(position.x, position.y) + '\n'
+        self._active = True
+        return 'G99 G81 ' + self._emitter.position(position.x, position.y) + self._cycle
+
+    def _cancel(self):
+        """:returns the line that ends a running cycle, or an empty string"""
+        if not self._active:
+            return ''
+        self._active = False
+        self._emitter.reset_state()  # the cycle changed motion mode and position
+        return 'G80\n'
@@ -0,0 +1,38 @@
+from io import RawIOBase, BufferedIOBase
+
+
+class GcodeWriter:
+    """Buffers G-code text and writes it to a file object in chunks of about buffer_size characters.
+    Works with text files as well as binary files, which receive the program ASCII-encoded.
+    Characters outside ASCII, e.g. in a project name or tool description, are replaced by '?' in binary files."""
+
+    def __init__(self, file, buffer_size=64 * 1024):
+        self._file = file
+        self._binary = isinstance(file, (RawIOBase, BufferedIOBase))
+        self._buffer_size = buffer_size
+        self._buffer = []
+        self._buffered = 0
+        self._written = 0
+
+    def write(self, text):
+        """Appends text to the buffer and writes the buffer to the file once it is full.
+        :param text: a String object"""
+        self._buffer.append(text)
+        self._buffered += len(text)
+        if self._buffered >= self._buffer_size:
+            self.flush()
+
+    def flush(self):
+        """Writes the buffered text to the file."""
+        if not self._buffer:
+            return
+        chunk = ''.join(self._buffer)
+        self._file.write(chunk.encode('ascii', errors='replace') if self._binary else chunk)
+        self._written += len(chunk)
+        self._buffer = []
+        self._buffered = 0
+
+    def get_chars_written(self):
+        """Getter function.
+        :returns the number of characters written to the file so far"""
+        return self._written
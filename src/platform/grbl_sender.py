@@ -0,0 +1,278 @@
+import os
+import re
+import threading
+from time import monotonic
+from collections import deque
+
+RX_BUFFER_SIZE = 128  # GRBL's serial receive buffer in bytes
+RESPONSE_TIMEOUT = 60  # seconds without any answer after which GRBL is considered gone, covers long, slow moves
+
+# Realtime commands, executed by GRBL as soon as they arrive, bypassing the receive buffer
+STATUS_QUERY = b'?'
+FEED_HOLD = b'!'
+CYCLE_START = b'~'
+SOFT_RESET = b'\x18'
+FEED_OVERRIDE_RESET = b'\x90'
+FEED_OVERRIDE_PLUS_10 = b'\x91'
+FEED_OVERRIDE_MINUS_10 = b'\x92'
+FEED_OVERRIDE_PLUS_1 = b'\x93'
+FEED_OVERRIDE_MINUS_1 = b'\x94'
+FEED_OVERRIDE_MIN = 10  # percent
+FEED_OVERRIDE_MAX = 200
+
+_COMMENT = re.compile(r'\([^)]*\)|;.*')
+
+
+class StreamProtocol:
+    SEND_RESPONSE = 1  # send a line, wait for its response
+    CHARACTER_COUNTING = 2  # keep GRBL's receive buffer full
+
+
+def clean_line(line):
+    """Removes comments and whitespace, which GRBL would skip anyway, so they do not take up receive buffer space.
+    :returns the line as GRBL executes it, an empty String object if nothing is left"""
+    return _COMMENT.sub('', line).replace(' ', '').replace('\t', '').strip().upper()
+
+
+def feed_override_commands(current, target):
+    """Calculates the realtime commands that change GRBL's feed override from one value to another.
+    :param current, target: feed override in percent
+    :returns a bytes object"""
+    target = min(max(target, FEED_OVERRIDE_MIN), FEED_OVERRIDE_MAX)
+    commands = b''
+    if abs(target - 100) < abs(target - current):
+        commands += FEED_OVERRIDE_RESET
+        current = 100
+    delta = target - current
+    step_10, step_1 = (FEED_OVERRIDE_PLUS_10, FEED_OVERRIDE_PLUS_1) if delta > 0 else \
+        (FEED_OVERRIDE_MINUS_10, FEED_OVERRIDE_MINUS_1)
+    commands += step_10 * (abs(delta) // 10) + step_1 * (abs(delta) % 10)
+    return commands
+
+
+class PosixSerialPort:
+    """Minimal serial port on POSIX terminal devices, such as USB serial adapters or pseudo terminals, for systems
+    without pyserial. Offers the subset of pyserial's Serial that GrblSender uses."""
+
+    def __init__(self, path, baudrate=115200, timeout=0.05):
+        import termios
+        import tty
+        self._fd = os.open(path, os.O_RDWR | os.O_NOCTTY)
+        self.timeout = timeout
+        tty.setraw(self._fd)
+        attributes = termios.tcgetattr(self._fd)
+        speed = getattr(termios, 'B' + str(baudrate), termios.B115200)
+        attributes[4] = attributes[5] = speed
+        termios.tcsetattr(self._fd, termios.TCSANOW, attributes)
+
+    def write(self, data):
+        view = memoryview(data)
+        while view:
+            view = view[os.write(self._fd, view):]
+        return len(data)
+
+    def read(self, size=1):
+        """:returns up to size bytes, or an empty bytes object if nothing arrived within the timeout"""
+        import select
+        readable, _, _ = select.select([self._fd], [], [], self.timeout)
+        if not readable:
+            return b''
+        return os.read(self._fd, size)
+
+    def close(self):
+        os.close(self._fd)
+
+
+def open_port(path, baudrate=115200, timeout=0.05):
+    """Opens a serial port, with pyserial if it is installed.
+    :returns a serial port object with read(), write(), and close()"""
+    try:
+        import serial
+    except ImportError:
+        return PosixSerialPort(path, baudrate, timeout)
+    return serial.Serial(path, baudrate, timeout=timeout)
+
+
+class StreamError:
+    """POD container class representing a line that GRBL rejected."""
+
+    def __init__(self, line_number, line, message):
+        self.line_number = line_number  # zero-based index of the line in the program
+        self.line = line
+        self.message = message
+
+
+class GrblSender:
+    """Streams G-code to a GRBL controller. With the character-counting protocol, the sender tracks how many bytes
+    of sent lines GRBL has not acknowledged yet and sends the next line whenever it fits into the remaining receive
+    buffer. Unlike waiting for each line's ok, this keeps the planner fed when lines are short and execute fast,
+    as with QR-code engraving.
+    An alarm or a reset of GRBL, reported by an ALARM line or the welcome banner, ends the stream: GRBL has discarded
+    all lines it has not answered yet, and they are reported as errors.
+    pause(), resume(), set_feed_override(), and cancel() may be called from another thread while stream() runs."""
+
+    def __init__(self, port, protocol=StreamProtocol.CHARACTER_COUNTING, rx_buffer_size=RX_BUFFER_SIZE,
+                 response_timeout=RESPONSE_TIMEOUT):
+        self._port = port
+        self._protocol = protocol
+        self._rx_buffer_size = rx_buffer_size
+        self._response_timeout = response_timeout  # seconds to wait for any answer, None waits forever
+        self._write_lock = threading.Lock()
+        self._received = b''
+        self._feed_override = 100
+        self._paused = False
+        self._cancelled = False
+        self._sent = 0
+        self._acknowledged = 0
+        self._errors = []
+        self._aborted = False  # GRBL raised an alarm or was reset during the stream
+        self._last_status = None
+
+    def get_sent_count(self):
+        """Getter function.
+        :returns the number of lines sent to GRBL by the last stream"""
+        return self._sent
+
+    def get_acknowledged_count(self):
+        """Getter function.
+        :returns the number of lines of the last stream GRBL has answered with ok or error, or discarded"""
+        return self._acknowledged
+
+    def get_errors(self):
+        """Getter function.
+        :returns a list of StreamError objects of the last stream"""
+        return self._errors
+
+    def is_aborted(self):
+        """:returns True if GRBL raised an alarm or was reset during the last stream"""
+        return self._aborted
+
+    def get_feed_override(self):
+        return self._feed_override
+
+    def get_last_status(self):
+        """Getter function.
+        :returns the last status report, e.g. '<Run|MPos:1.000,2.000,0.000|FS:500,0>', or None"""
+        return self._last_status
+
+    def is_paused(self):
+        return self._paused
+
+    def pause(self):
+        """Holds the machine with a controlled deceleration. Streaming continues until GRBL's buffers are full."""
+        self._realtime(FEED_HOLD)
+        self._paused = True
+
+    def resume(self):
+        self._realtime(CYCLE_START)
+        self._paused = False
+
+    def set_feed_override(self, percent):
+        """Changes the feed of all cutting moves while the program runs, 10 to 200 percent in steps of 1."""
+        self._realtime(feed_override_commands(self._feed_override, percent))
+        self._feed_override = min(max(percent, FEED_OVERRIDE_MIN), FEED_OVERRIDE_MAX)
+
+    def request_status(self):
+        """Asks GRBL for a status report, which is available from get_last_status() once it has arrived."""
+        self._realtime(STATUS_QUERY)
+
+    def cancel(self):
+        """Stops streaming after the current line. Lines GRBL has already received are still executed."""
+        self._cancelled = True
+
+    def stream(self, lines, total=None, progress=None, stop_on_error=True):
+        """Sends G-code lines and waits until GRBL has answered all of them.
+        :param lines: an iterable of String objects, e.g. an open G-code file
+        :param total: the number of lines, if known, passed on to progress
+        :param progress: called as progress(sent, acknowledged, total) whenever GRBL answers a line
+        :param stop_on_error: stop sending new lines once GRBL rejected one
+        :returns True if all lines were acknowledged with ok
+        :raises ValueError if a line does not fit into GRBL's receive buffer
+        :raises TimeoutError if GRBL does not answer within the response timeout"""
+        self._cancelled = False
+        self._aborted = False
+        self._errors = []
+        self._sent = 0
+        self._acknowledged = 0
+        self._discard_input()
+        pending = deque()  # (line number, line, length) of sent lines not answered yet
+        buffered = 0
+        limit = self._rx_buffer_size if self._protocol == StreamProtocol.CHARACTER_COUNTING else 1
+        for line_number, line in enumerate(lines):
+            line = clean_line(line)
+            if not line:
+                continue
+            data = (line + '\n').encode('ascii')
+            if len(data) > self._rx_buffer_size:
+                raise ValueError('Line exceeds GRBL\'s receive buffer: ' + line)
+            while pending and (buffered + len(data) > self._rx_buffer_size or len(pending) >= limit):
+                buffered -= self._await_response(pending, total, progress)
+            if self._cancelled or self._aborted or (self._errors and stop_on_error):
+                break
+            with self._write_lock:
+                self._port.write(data)
+            pending.append((line_number, line, len(data)))
+            buffered += len(data)
+            self._sent += 1
+        while pending:
+            self._await_response(pending, total, progress)
+        return not self._errors and not self._cancelled
+
+    def _await_response(self, pending, total, progress):
+        """Waits for GRBL's answer to the oldest pending line. An alarm or a reset answers all pending lines, as GRBL
+        discards them.
+        :returns the number of receive buffer bytes it freed"""
+        while True:
+            response = self._read_line()
+            if response == 'ok' or response.startswith('error'):
+                answered = 1
+                break
+            if response.startswith('ALARM') or response.startswith('Grbl '):
+                answered = len(pending)
+                self._aborted = True
+                break
+            if response.startswith('<'):
+                self._last_status = response
+        freed = 0
+        for _ in range(answered):
+            line_number, line, length = pending.popleft()
+            if response != 'ok':
+                self._errors.append(StreamError(line_number, line, response))
+            self._acknowledged += 1
+            freed += length
+        if progress is not None:
+            progress(self._sent, self._acknowledged, total)
+        return freed
+
+    def _discard_input(self):
+        """Helper method. Skips what GRBL has sent before the stream, such as the welcome banner on connecting, so
+        that it is not taken as a reset. Status reports are kept."""
+        while True:
+            data = self._port.read(256)
+            if not data:
+                break
+            self._received += data
+        *lines, self._received = self._received.split(b'\n')
+        for line in lines:
+            line = line.decode('ascii', errors='replace').strip()
+            if line.startswith('<'):
+                self._last_status = line
+
+    def _read_line(self):
+        """Blocks until GRBL has sent a complete line.
+        :returns a String object without line break
+        :raises TimeoutError if GRBL does not answer within the response timeout"""
+        start = monotonic()
+        while b'\n' not in self._received:
+            data = self._port.read(256)
+            if data:
+                start = monotonic()
+            elif self._response_timeout is not None and monotonic() - start > self._response_timeout:
+                raise TimeoutError('GRBL did not answer within {} s'.format(self._response_timeout))
+            self._received += data
+        line, self._received = self._received.split(b'\n', 1)
+        return line.decode('ascii', errors='replace').strip()
+
+    def _realtime(self, command):
+        with self._write_lock:
+            self._port.write(command)
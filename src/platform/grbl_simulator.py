@@ -0,0 +1,298 @@
+import os
+import re
+import threading
+from collections import deque
+from math import sqrt
+from time import monotonic
+
+from src.platform.grbl_sender import RX_BUFFER_SIZE, STATUS_QUERY, FEED_HOLD, CYCLE_START, SOFT_RESET, \
+    FEED_OVERRIDE_RESET, FEED_OVERRIDE_PLUS_10, FEED_OVERRIDE_MINUS_10, FEED_OVERRIDE_PLUS_1, FEED_OVERRIDE_MINUS_1, \
+    FEED_OVERRIDE_MIN, FEED_OVERRIDE_MAX
+
+PLANNER_BLOCKS = 15  # GRBL's default planner buffer on an ATmega328p
+WELCOME = 'Grbl 1.1h [\'$\' for help]'
+
+_WORD = re.compile(r'([A-Z])([-+]?[0-9]*\.?[0-9]*)')
+_SUPPORTED_G = {0, 1, 2, 3, 4, 10, 17, 18, 19, 20, 21, 28, 30, 38, 40, 43, 49, 53, 54, 55, 56, 57, 58, 59, 61, 80, 90,
+                91, 92, 93, 94}
+_SUPPORTED_M = {0, 1, 2, 3, 4, 5, 7, 8, 9, 30}
+_FEED_OVERRIDE_STEPS = {FEED_OVERRIDE_PLUS_10[0]: 10, FEED_OVERRIDE_MINUS_10[0]: -10,
+                        FEED_OVERRIDE_PLUS_1[0]: 1, FEED_OVERRIDE_MINUS_1[0]: -1}
+
+
+class _Block:
+    """A planned linear move."""
+
+    def __init__(self, distance, rate, rapid):
+        self.remaining = distance  # mm
+        self.rate = rate  # mm/s before feed override
+        self.rapid = rapid
+
+
+class GrblSimulator:
+    """Emulates a GRBL controller on a pseudo terminal, to test and benchmark senders without a machine.
+    Bytes travel over an emulated serial line at the given baud rate into a receive buffer of rx_buffer_size bytes.
+    Bytes that arrive while it is full are lost and counted as overflows. Lines are parsed into a planner of
+    planner_blocks blocks and answered with ok, or error:20 for commands GRBL does not support, after
+    response_latency seconds of USB latency. Blocks are executed at their feed, or rapid_rate for G00, without
+    acceleration. Realtime commands for status, feed hold, cycle start, soft reset, and feed override are handled as
+    they arrive. time_scale stretches or shrinks execution time, 0 executes instantly."""
+
+    def __init__(self, baudrate=115200, rx_buffer_size=RX_BUFFER_SIZE, planner_blocks=PLANNER_BLOCKS,
+                 response_latency=0.001, rapid_rate=5000, time_scale=1.0):
+        self._byte_time = 10 / baudrate  # start, 8 data, and stop bit
+        self._rx_buffer_size = rx_buffer_size
+        self._planner_blocks = planner_blocks
+        self._response_latency = response_latency
+        self._rapid_rate = rapid_rate / 60
+        self._time_scale = time_scale
+        self._master = None
+        self._slave = None
+        self._wake = None  # pipe that interrupts the controller's wait when stopping
+        self._thread = None
+        self._running = False
+        self._lock = threading.Lock()
+        self._reset()
+        self._overflows = 0
+        self._busy_time = 0.0
+        self._executed = []
+
+    def start(self):
+        """Opens the pseudo terminal and runs the controller in a background thread.
+        :returns the path of the terminal device to connect the sender to"""
+        import tty
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._slave)
+        os.write(self._master, (WELCOME + '\r\n').encode('ascii'))  # before the sender can connect
+        self._wake = os.pipe()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return os.ttyname(self._slave)
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            os.write(self._wake[1], b'\0')
+            self._thread.join()
+            self._thread = None
+        for fd in (self._master, self._slave, *(self._wake or ())):
+            if fd is not None:
+                os.close(fd)
+        self._master = None
+        self._slave = None
+        self._wake = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def get_port_path(self):
+        return os.ttyname(self._slave)
+
+    def get_overflow_count(self):
+        """Getter function.
+        :returns the number of bytes lost because the receive buffer was full"""
+        return self._overflows
+
+    def get_busy_time(self):
+        """Getter function.
+        :returns the time in seconds the machine has been moving"""
+        return self._busy_time
+
+    def get_executed_lines(self):
+        """Getter function.
+        :returns a list of all lines parsed without error, in order"""
+        with self._lock:
+            return list(self._executed)
+
+    def get_feed_override(self):
+        return self._feed_override
+
+    def is_held(self):
+        return self._held
+
+    def is_idle(self):
+        """:returns True if all received lines have been executed"""
+        with self._lock:
+            return not self._link and not self._rx and not self._planner
+
+    def _reset(self):
+        self._link = deque()  # (arrival time, byte) on their way over the serial line
+        self._link_free = 0.0  # time the serial line has sent all queued bytes
+        self._rx = bytearray()
+        self._planner = deque()
+        self._responses = deque()  # (due time, bytes)
+        self._position = [0.0, 0.0, 0.0]
+        self._motion = 0
+        self._feed = 0.0  # mm/s
+        self._feed_override = 100
+        self._held = False
+
+    def _run(self):
+        import select
+        last = monotonic()
+        timeout = None
+        while self._running:
+            readable, _, _ = select.select([self._master, self._wake[0]], [], [], timeout)
+            now = monotonic()
+            if self._master in readable:
+                self._receive(os.read(self._master, 1024), now)
+            self._execute(now - last)
+            last = now
+            with self._lock:
+                self._transfer(now)
+                self._plan(now)
+                timeout = self._get_timeout(now)
+            while self._responses and self._responses[0][0] <= now:
+                os.write(self._master, self._responses.popleft()[1])
+
+    def _get_timeout(self, now):
+        """Helper method. Finds the next time something happens without the sender: a byte arriving over the serial
+        line, a response falling due, or the running block finishing, which frees a planner block.
+        :returns the seconds until then, or None to wait for the sender"""
+        due = [queue[0][0] for queue in (self._link, self._responses) if queue]
+        if self._planner and not self._held:
+            rate = self._get_rate(self._planner[0])
+            due.append(now if rate is None else now + self._planner[0].remaining / rate)
+        return max(min(due) - now, 0.0) if due else None
+
+    def _receive(self, data, now):
+        """Handles realtime commands right away, queues all other bytes on the serial line."""
+        for byte in data:
+            self._link_free = max(self._link_free, now) + self._byte_time
+            if byte == STATUS_QUERY[0]:
+                self._respond(now + self._response_latency, self._status())
+            elif byte == FEED_HOLD[0]:
+                self._held = True
+            elif byte == CYCLE_START[0]:
+                self._held = False
+            elif byte == SOFT_RESET[0]:
+                with self._lock:
+                    self._reset()
+                self._respond(now, WELCOME)
+            elif byte == FEED_OVERRIDE_RESET[0]:
+                self._feed_override = 100
+            elif byte in _FEED_OVERRIDE_STEPS:
+                self._feed_override = min(max(self._feed_override + _FEED_OVERRIDE_STEPS[byte], FEED_OVERRIDE_MIN),
+                                          FEED_OVERRIDE_MAX)
+            else:
+                self._link.append((self._link_free, byte))
+
+    def _transfer(self, now):
+        """Moves the bytes that have arrived over the serial line into the receive buffer."""
+        while self._link and self._link[0][0] <= now:
+            byte = self._link.popleft()[1]
+            if len(self._rx) >= self._rx_buffer_size:
+                self._overflows += 1
+            else:
+                self._rx.append(byte)
+
+    def _plan(self, now):
+        """Parses complete lines from the receive buffer while the planner has room."""
+        while len(self._planner) < self._planner_blocks and b'\n' in self._rx:
+            index = self._rx.index(b'\n')
+            line = self._rx[:index].decode('ascii', errors='replace').strip()
+            del self._rx[:index + 1]
+            if not line:
+                continue
+            error = self._parse(line)
+            self._respond(now + self._response_latency, 'ok' if error is None else 'error:' + str(error))
+
+    def _parse(self, line):
+        """Executes a line's modal state changes and plans its motion.
+        :returns None, or GRBL's error code"""
+        if line.startswith('$'):
+            return None
+        words = _WORD.findall(line)
+        if ''.join(letter + number for letter, number in words) != line:
+            return 1  # expected command letter
+        values, error = self._read_values(words)
+        if error is not None:
+            return error
+        target = self._apply_values(values)
+        self._executed.append(line)
+        if target is not None:
+            self._plan_move(target)
+        return None
+
+    @staticmethod
+    def _read_values(words):
+        """Helper method. Converts the numbers of a line's words, stopping at the first invalid word.
+        :returns tuple: the list of (letter, value) pairs, and None or GRBL's error code"""
+        values = []
+        for letter, number in words:
+            try:
+                value = float(number)
+            except ValueError:
+                return tuple((values, 2))  # bad number format
+            if letter == 'G' and value not in _SUPPORTED_G or letter == 'M' and value not in _SUPPORTED_M:
+                return tuple((values, 20))  # unsupported command
+            values.append((letter, value))
+        return tuple((values, None))
+
+    def _apply_values(self, values):
+        """Helper method. Applies the modal state changes of a line.
+        :returns the target position, or None if the line has no axis words"""
+        target = None
+        for letter, value in values:
+            if letter == 'G' and value in (0, 1):
+                self._motion = int(value)
+            elif letter == 'F':
+                self._feed = value / 60
+            elif letter in 'XYZ':
+                if target is None:
+                    target = list(self._position)
+                target['XYZ'.index(letter)] = value
+        return target
+
+    def _plan_move(self, target):
+        """Helper method. Moves to the target in the current motion mode, queuing a block unless it is a no-op."""
+        distance = sqrt(sum((b - a) ** 2 for a, b in zip(self._position, target)))
+        self._position = target
+        if distance > 0:
+            rapid = self._motion == 0
+            self._planner.append(_Block(distance, self._rapid_rate if rapid else self._feed, rapid))
+
+    def _execute(self, elapsed):
+        """Runs the planner's blocks for the elapsed time."""
+        if self._held:
+            return
+        with self._lock:
+            while self._planner and elapsed > 0:
+                block = self._planner[0]
+                rate = self._get_rate(block)
+                if rate is None:
+                    self._planner.popleft()
+                    continue
+                duration = min(elapsed, block.remaining / rate)
+                block.remaining -= duration * rate
+                self._busy_time += duration
+                elapsed -= duration
+                if block.remaining <= 1e-9:
+                    self._planner.popleft()
+
+    def _get_rate(self, block):
+        """Helper method.
+        :returns the block's rate in mm per second of wall time, or None if it is executed instantly"""
+        rate = block.rate if block.rapid else block.rate * self._feed_override / 100
+        if self._time_scale == 0 or rate <= 0:
+            return None
+        return rate / self._time_scale
+
+    def _status(self):
+        if self._held:
+            state = 'Hold:0'
+        elif self._planner:
+            state = 'Run'
+        else:
+            state = 'Idle'
+        return '<{}|MPos:{:.3f},{:.3f},{:.3f}|Bf:{},{}|FS:{:.0f},0|Ov:{},100,100>'.format(
+            state, *self._position, self._planner_blocks - len(self._planner), self._rx_buffer_size - len(self._rx),
+            self._feed * 60, self._feed_override)
+
+    def _respond(self, due, text):
+        self._responses.append((due, (text + '\r\n').encode('ascii')))
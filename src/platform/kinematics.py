@@ -0,0 +1,123 @@
+import numpy as np
+
+
+class MachineProfile:
+    """POD container class representing a machine's motion limits, as configured in its controller, e.g. GRBL's
+    $110-$112 (max rates), $120-$122 (accelerations), and $11 (junction deviation)."""
+
+    def __init__(self, rapid_xy=5000, rapid_z=2000, accel_xy=500, accel_z=200, junction_deviation=0.01):
+        self.rapid_xy = rapid_xy  # max rate of the X and Y axes in mm/min, used for G00 moves
+        self.rapid_z = rapid_z  # max rate of the Z axis in mm/min
+        self.accel_xy = accel_xy  # acceleration of the X and Y axes in mm/s^2
+        self.accel_z = accel_z  # acceleration of the Z axis in mm/s^2
+        self.junction_deviation = junction_deviation  # in mm
+
+    def __eq__(self, other):
+        eq = (self.rapid_xy == other.rapid_xy)
+        eq &= (self.rapid_z == other.rapid_z)
+        eq &= (self.accel_xy == other.accel_xy)
+        eq &= (self.accel_z == other.accel_z)
+        eq &= (self.junction_deviation == other.junction_deviation)
+        return eq
+
+
+def engrave_moves(toolpath, plunges, step, engrave_params, tool, start=(0, 0)):
+    """Lists the machine moves of an engrave block, like GcodeEmitter writes them: for each plunge a rapid move to
+    the first segment, plunge, cut, and retract to hover height. Segments that continue a polyline are reached by a
+    cutting move instead.
+    :param toolpath: a Toolpath object in machining order
+    :param plunges: a bool array, True for each segment the tool is lowered for (the first segment of a polyline)
+    :param step: the XY distance of two modules in mm
+    :param engrave_params: an EngraveParams POD object
+    :param tool: a Tool POD object
+    :param start: the position in modules the tool starts from, at hover height
+    :returns tuple: an (n, 3) float array of XYZ move vectors in mm and an array of feeds in mm/min,
+    inf for rapid moves. Moves of zero length are left out."""
+    count = len(toolpath)
+    plunges = np.asarray(plunges, dtype=bool)
+    starts = toolpath.get_starts()
+    ends = toolpath.get_ends()
+    previous_ends = np.vstack(([start], ends[:-1])) if count else np.zeros((0, 2))
+    retracts = np.append(plunges[1:], True) if count else plunges
+    depth = engrave_params.z_hover + engrave_params.z_engrave
+
+    # Four moves per segment: approach, plunge, cut, retract. Unused moves have zero length and are dropped below.
+    deltas = np.zeros((count, 4, 3))
+    feeds = np.empty((count, 4))
+    deltas[:, 0, :2] = (starts - previous_ends) * step
+    feeds[:, 0] = np.where(plunges, np.inf, tool.fxy)  # linking moves of a polyline are cut
+    deltas[:, 1, 2] = np.where(plunges, -depth, 0)
+    feeds[:, 1] = tool.fz
+    deltas[:, 2, :2] = (ends - starts) * step
+    feeds[:, 2] = tool.fxy
+    deltas[:, 3, 2] = np.where(retracts, depth, 0)
+    feeds[:, 3] = np.inf
+    deltas = deltas.reshape(-1, 3)
+    feeds = feeds.reshape(-1)
+    deltas[:, 1] *= -1  # Y axis points down in the QR-code, up on the machine
+    moving = np.any(deltas != 0, axis=1)
+    return deltas[moving], feeds[moving]
+
+
+def _min_plus_scan(limits, gains):
+    """Solves w[0] = limits[0], w[i + 1] = min(limits[i + 1], w[i] + gains[i]) without a Python loop:
+    w[i] = D[i] + min over j <= i of (limits[j] - D[j]), with D the prefix sum of gains.
+    :returns a float array of the same length as limits"""
+    prefix = np.concatenate(([0.0], np.cumsum(gains)))
+    return prefix + np.minimum.accumulate(limits - prefix)
+
+
+class KinematicModel:
+    """Estimates how long a machine takes for a list of moves, with a trapezoidal velocity profile per move.
+    Like the motion planners of GRBL and LinuxCNC, the speed at which the machine passes from one move to the next
+    is limited by the junction deviation, and every move starts and ends at a speed the machine can accelerate to or
+    brake from within the move. The whole job is evaluated on numpy arrays: the planner's forward and backward passes
+    are min-plus scans."""
+
+    def __init__(self, profile):
+        self._profile = profile
+
+    def get_profile(self):
+        return self._profile
+
+    def get_move_times(self, deltas, feeds):
+        """Calculates the duration of each move. The machine starts and ends at rest.
+        :param deltas: an (n, 3) float array of XYZ move vectors in mm, none of zero length
+        :param feeds: an array of feeds in mm/min, inf for rapid moves
+        :returns a float array of durations in seconds"""
+        deltas = np.asarray(deltas, dtype=float)
+        if not len(deltas):
+            return np.zeros(0)
+        lengths = np.linalg.norm(deltas, axis=1)
+        units = deltas / lengths[:, np.newaxis]
+        axis_rates = np.array([self._profile.rapid_xy, self._profile.rapid_xy, self._profile.rapid_z]) / 60
+        axis_accels = np.array([self._profile.accel_xy, self._profile.accel_xy, self._profile.accel_z], dtype=float)
+        with np.errstate(divide='ignore'):
+            # Each move is limited by the axis that reaches its limit first
+            v_max = np.minimum(np.min(axis_rates / np.abs(units), axis=1), np.asarray(feeds, dtype=float) / 60)
+            accel = np.min(axis_accels / np.abs(units), axis=1)
+
+        # Squared entry speed limits: junction deviation and the speed limits of both moves
+        cos_theta = -np.sum(units[:-1] * units[1:], axis=1)
+        sin_half = np.sqrt(np.clip(0.5 * (1 - cos_theta), 0, 1))
+        with np.errstate(divide='ignore'):
+            junction = np.minimum(accel[1:], accel[:-1]) * self._profile.junction_deviation * sin_half / (1 - sin_half)
+        junction = np.minimum(junction, np.minimum(v_max[1:], v_max[:-1]) ** 2)
+        limits = np.concatenate(([0.0], junction, [0.0]))  # at rest before the first and after the last move
+
+        gains = 2 * accel * lengths  # squared speed gained or lost over a whole move
+        forward = _min_plus_scan(limits, gains)
+        backward = _min_plus_scan(limits[::-1], gains[::-1])[::-1]
+        entry = np.minimum(forward, backward)
+        v_entry = np.sqrt(entry[:-1])
+        v_exit = np.sqrt(entry[1:])
+
+        # Trapezoid, or triangle if the move is too short to reach its speed limit
+        v_peak = np.sqrt(np.minimum(v_max ** 2, (gains + entry[:-1] + entry[1:]) / 2))
+        ramp_lengths = (2 * v_peak ** 2 - entry[:-1] - entry[1:]) / (2 * accel)
+        cruise_lengths = np.clip(lengths - ramp_lengths, 0, None)
+        return (2 * v_peak - v_entry - v_exit) / accel + cruise_lengths / v_peak
+
+    def get_duration(self, deltas, feeds):
+        """:returns the duration of all moves in seconds, a float"""
+        return float(self.get_move_times(deltas, feeds).sum())
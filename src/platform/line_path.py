@@ -1,32 +1,201 @@
+from collections import OrderedDict
+
 from src.platform.vectorize_helper import Point, LineSegment
+from src.platform.run_length import RunLengthScanner
+from src.platform.min_plunge import MinPlungeDecomposer
+from src.platform.toolpath import Toolpath
+
+
+class Strategy:
+    """Enum class associating a path planning algorithm with a number"""
+    SERPENTINE = 1  # module-by-module serpentine scan
+    RUN_LENGTH = 2  # same result as SERPENTINE, detects runs in bulk
+    MIN_PLUNGE = 3  # provably smallest number of segments
+
+
+PLANNER_VERSION = 1  # Increase whenever a strategy's output changes. Invalidates persisted plans.
+
+_PLAN_CACHE_SIZE = 64
+_plan_cache = OrderedDict()  # (table digest, strategy) -> frozen segments, least recently used first
+
+
+def clear_plan_cache():
+    """Empties the memo of planned QR-codes shared by all LinePath objects."""
+    _plan_cache.clear()
+
+
+def _freeze(segments):
+    """Converts segments into a form that callers cannot change through the LineSegment and Point objects they get.
+    :returns a tuple of (x_length, y_length, x, y) tuples"""
+    return tuple((segment.x_length, segment.y_length, segment.position.x, segment.position.y) for segment in segments)
+
+
+def _thaw(frozen):
+    """:returns a list of new LineSegment objects from the result of _freeze()"""
+    return [LineSegment(x_length, y_length, Point(x, y)) for x_length, y_length, x, y in frozen]
 
 
 class LinePath:
-    def __init__(self, qr_value_table):
-        self._qr_todo = qr_value_table
+    def __init__(self, qr_value_table, strategy=Strategy.SERPENTINE, optimizer=None):
+        self._qr_table = qr_value_table
         self._size = qr_value_table.size
-        self._line_list = []
+        self._strategy = strategy
+        self._optimizer = optimizer  # optional PathOptimizer reordering the segments
+        self._line_list = None
+        self._toolpath = None
+        self._preloaded = None  # segment decomposition kept outside of the memo
 
     def get_size(self):
         return self._size
 
-    def get_vectors(self):
+    def get_table(self):
+        """Getter function.
+        :returns the QrValueTable this path is planned from. It is never modified."""
+        return self._qr_table
+
+    def get_strategy(self):
+        return self._strategy
+
+    def set_strategy(self, strategy):
+        """Setter function. Re-planning is free if this QR-code has been planned with the strategy before.
+        :param strategy: a Strategy value"""
+        if strategy != self._strategy:
+            self._strategy = strategy
+            self._line_list = None
+            self._toolpath = None
+            self._preloaded = None
+
+    def get_optimizer(self):
+        return self._optimizer
+
+    def set_optimizer(self, optimizer):
+        """Setter function. The segment decomposition is reused, only the ordering is redone.
+        :param optimizer: a PathOptimizer object or None"""
+        self._optimizer = optimizer
+        self._line_list = None
+        self._toolpath = None
+
+    def get_vectors(self, memoize=True):
         """Compiles a list of vectors from the qr-code input that scans the fields
         row-by-row, left-to-right for even line numbers, and right-to-left for uneven line numbers
-        to reduce machining time.
+        to reduce machining time. Strategy.RUN_LENGTH yields the same list but scans each row in bulk.
+        Strategy.MIN_PLUNGE yields the smallest possible number of segments in the same row order.
+        If an optimizer is set, the list is reordered by it afterwards.
+        Results are memoized by QR-code content and strategy, so identical codes are planned only once.
+        :param memoize: if False, the memo is neither read nor written. For QR-codes that are planned only once, e.g.
+        the serial number regions of a SerialTemplate, so that they do not evict useful entries.
         :return line_list: a list of LineSegments"""
-        if not self._line_list:
+        if self._line_list is None:
+            line_list = self._plan(memoize)
+            if self._optimizer is not None:
+                line_list = self._optimizer.optimize(line_list)
+            self._line_list = line_list
+        return self._line_list
+
+    def iter_vectors(self, materialize=True):
+        """Streams the vectors of get_vectors() while the QR-code is still being scanned, so consumers can start
+        with the first rows right away. Serves the list if it has already been compiled. If an optimizer is set, the
+        whole list is compiled first as reordering needs all segments.
+        :param materialize: keep the streamed vectors so that get_vectors() is free afterwards. Set to False to keep
+        memory flat for very large bitmaps.
+        :returns yields LineSegments"""
+        if self._preloaded is not None and self._line_list is None and self._optimizer is None:
+            if not materialize:
+                yield from _thaw(self._preloaded)
+                return
+            yield from self.get_vectors()  # preloaded decompositions never enter the memo
+            return
+        key = (self._qr_table.digest(), self._strategy)
+        if self._line_list is not None or self._optimizer is not None or key in _plan_cache:
+            yield from self.get_vectors()
+            return
+
+        line_list = [] if materialize else None
+        for segments in self._scan_rows():
+            if materialize:
+                line_list += segments
+            yield from segments
+        if materialize and self._line_list is None:
+            self._remember(key, line_list)
+            self._line_list = line_list
+
+    def get_toolpath(self):
+        """Getter function.
+        :returns the vectors of get_vectors() as a compact Toolpath object"""
+        if self._toolpath is None:
+            self._toolpath = Toolpath.from_segments(self.get_vectors())
+        return self._toolpath
+
+    def get_vector_count(self):
+        """Getter function.
+        :returns the number of vectors if they have been compiled, else None"""
+        if self._line_list is None:
+            return None
+        return len(self._line_list)
+
+    def preload(self, segments, memoize=True):
+        """Stores an already planned segment decomposition of this path's QR-code and strategy in the memo, e.g.
+        one that has been persisted to disk.
+        :param segments: a list of LineSegments
+        :param memoize: if False, the decomposition is only used by this path. For decompositions that differ from
+        what the strategy would plan."""
+        if memoize:
+            self._remember((self._qr_table.digest(), self._strategy), segments)
+        else:
+            self._preloaded = _freeze(segments)
+        self._line_list = None
+        self._toolpath = None
+
+    def _remember(self, key, segments):
+        _plan_cache[key] = _freeze(segments)
+        _plan_cache.move_to_end(key)
+        if len(_plan_cache) > _PLAN_CACHE_SIZE:
+            _plan_cache.popitem(last=False)
+
+    def _plan(self, memoize=True):
+        """Looks up the segment decomposition in the memo or computes it.
+        :param memoize: if False, the decomposition is computed without using the memo
+        :returns a list of LineSegments"""
+        if self._preloaded is not None:
+            return _thaw(self._preloaded)
+        line_list = []
+        if not memoize:
+            for segments in self._scan_rows():
+                line_list += segments
+            return line_list
+
+        key = (self._qr_table.digest(), self._strategy)
+        if key in _plan_cache:
+            _plan_cache.move_to_end(key)
+            return _thaw(_plan_cache[key])
+
+        for segments in self._scan_rows():
+            line_list += segments
+        self._remember(key, line_list)
+        return line_list
+
+    def _scan_rows(self):
+        """Runs the selected strategy. Serpentine scans work on a fresh scratch copy of the table.
+        :returns yields a list of LineSegments per row, or a single list for Strategy.MIN_PLUNGE"""
+        if self._strategy == Strategy.RUN_LENGTH:
+            scanner = RunLengthScanner(self._qr_table.table)
+            for line in range(self._size):
+                yield scanner.scan_row(line)
+        elif self._strategy == Strategy.MIN_PLUNGE:
+            yield MinPlungeDecomposer(self._qr_table.table).get_segments()
+        else:
+            todo = self._qr_table.table.copy()  # scratch copy of this scan that gets cleared while scanning
             for line in range(self._size):
                 if line % 2:
-                    self._line_list += self._get_line_right_to_left(line)
+                    yield self._get_line_right_to_left(todo, line)
                 else:
-                    self._line_list += self._get_line_left_to_right(line)
-        return self._line_list
+                    yield self._get_line_left_to_right(todo, line)
 
-    def _get_line_left_to_right(self, row):
+    def _get_line_left_to_right(self, todo, row):
         """This algorithm walks through a line of the QR-code left to right and line by line to construct vectors
         of coherent bits that are True. If the bit below the currently targeted bit is also True, then a vertical
         line is created. Else, a horizontal vector is created.
+        :param todo: the boolean matrix of the modules not engraved yet, cleared as vectors are found
         :param row: int the row in the QR-code to analyze
         :return a list of vectors"""
         vectors = []
@@ -36,36 +205,38 @@ class LinePath:
             return vectors
 
         while position.x < self._size:
-            if self._qr_todo.table[row, position.x]:
+            if todo[row, position.x]:
                 x_length = 0
                 y_length = 0
-                while position.x + x_length + 1 < self._size and self._qr_todo.table[row, position.x + x_length + 1]:
+                while position.x + x_length + 1 < self._size and todo[row, position.x + x_length + 1]:
                     x_length += 1
-                while row + y_length + 1 < self._size and self._qr_todo.table[row + y_length + 1, position.x]:
+                while row + y_length + 1 < self._size and todo[row + y_length + 1, position.x]:
                     y_length += 1
-                vectors.append(self._make_segment(x_length, y_length, position))
+                vectors.append(self._make_segment(todo, x_length, y_length, position))
             position.x += 1
         return vectors
 
-    def _make_segment(self, x_length, y_length, position):
+    def _make_segment(self, todo, x_length, y_length, position):
         """Creates a segment from a given input vector and position. Does not connect vectors. Prefers horizontal
         over vertial vectors.
+        :param todo: the boolean matrix of the modules not engraved yet
         :param x_length: horizontal length of the vector
         :param y_length: vertical length of the vector
         :param position: a Point object
         :returns segment: a LineSegment object"""
         if abs(x_length) >= abs(y_length):
             segment = LineSegment(x_length, 0, Point(position.x, position.y))
-            self._clear_todo(segment)
+            self._clear_todo(todo, segment)
         else:
             segment = LineSegment(0, y_length, Point(position.x, position.y))
-            self._clear_todo(segment)
+            self._clear_todo(todo, segment)
         return segment
 
-    def _get_line_right_to_left(self, row):
+    def _get_line_right_to_left(self, todo, row):
         """This algorithm walks through a line of the QR-code right to left and line by line to construct vectors
         of coherent bits that are True. If the bit below the currently targeted bit is also True, then a vertical
         line is created. Else, a horizontal vector is created.
+        :param todo: the boolean matrix of the modules not engraved yet, cleared as vectors are found
         :param row: the row in the QR-code to analyze
         :return a list of vectors"""
         vectors = []
@@ -75,25 +246,26 @@ class LinePath:
             return vectors
 
         while position.x >= 0:
-            if self._qr_todo.table[row, position.x]:
+            if todo[row, position.x]:
                 x_length = 0
                 y_length = 0
-                while position.x - x_length - 1 >= 0 and self._qr_todo.table[row, position.x - x_length - 1]:
+                while position.x - x_length - 1 >= 0 and todo[row, position.x - x_length - 1]:
                     x_length += 1
-                while row + y_length + 1 < self._size and self._qr_todo.table[row + y_length + 1, position.x]:
+                while row + y_length + 1 < self._size and todo[row + y_length + 1, position.x]:
                     y_length += 1
-                vectors.append(self._make_segment(-x_length, y_length, position))
+                vectors.append(self._make_segment(todo, -x_length, y_length, position))
             position.x -= 1
         return vectors
 
-    def _clear_todo(self, segment):
+    def _clear_todo(self, todo, segment):
         """Method to clear a segment of the QR-code working copy. Clearing is done to not double-engrave
         already completed fields.
+        :param todo: the boolean matrix of the modules not engraved yet
         :param segment: A LineSegment object"""
-        for y in range(segment.y_length + 1):
-            self._qr_todo.table[segment.position.y + y, segment.position.x] = False
-        x_range = range(abs(segment.x_length + 1))
+        x = segment.position.x
+        y = segment.position.y
+        todo[y:y + segment.y_length + 1, x] = False
         if segment.x_length < 0:
-            x_range = range(0, segment.x_length - 1, -1)
-        for x in x_range:
-            self._qr_todo.table[segment.position.y, segment.position.x + x] = False
+            todo[y, max(x + segment.x_length, 0):x + 1] = False
+        else:
+            todo[y, x:x + segment.x_length + 1] = False
@@ -1,8 +1,17 @@
 from io import StringIO
-from math import sqrt, tan, pi
+from math import tan, pi
 from datetime import timedelta
 
-from src.platform.vectorize_helper import Point
+import numpy as np
+
+from src.platform.backplot import BackplotVerifier
+from src.platform.coverage import CoverageAnalysis
+from src.platform.gcode_writer import GcodeWriter
+from src.platform.kinematics import KinematicModel, engrave_moves
+from src.platform.postprocessor.post_processor import PostProcessor
+from src.platform.segment_linker import SegmentLinker
+from src.platform.subprogram import SubprogramDialect, SubprogramPlanner, SubprogramCall
+from src.platform.toolpath import Toolpath
 
 
 class Tool:
@@ -107,6 +116,18 @@ class EngraveParams:
         return eq
 
 
+class JobStats:
+    """POD container class representing the metrics derived from a QR path's geometry, in QR-code modules. They do
+    not depend on tool, feeds, or engrave parameters, which only scale them."""
+
+    def __init__(self, toolpath, plunges):
+        self.toolpath = toolpath  # Toolpath in machining order
+        self.plunges = plunges  # bool array, True for each segment the tool is lowered for
+        self.cut_length = toolpath.get_cut_length()
+        self.travel_length = toolpath.get_travel_length()
+        self.plunge_count = int(np.count_nonzero(plunges))
+
+
 class MachinifyVector:
     """Class that processes QR-code path data, tool data, engrave depth data, and Workpiece zero coordinates
     to create a CNC machine readable file containing G-code instructions."""
@@ -118,11 +139,28 @@ class MachinifyVector:
         self._tool = None  # Selected Tool
         self._engrave_params = None  # Z-information for engraving
         self._xy_zero = None  # XY0-offset
+        self._pitch = None  # distance of two modules in mm, None for the width the tool cuts
 
         self._project_name = ''
         self._job_duration = timedelta(0)
         self._state = False  # current Z state (True = engraving)
-        self._time_buffer = 1.6
+        self._time_buffer = 1.6  # accounts for acceleration when no machine profile is set
+        self._machine_profile = None  # MachineProfile for the kinematic job duration estimate
+        self._stay_down = False  # link adjacent segments without lifting the tool
+        self._compact = False  # leave out G-code words that do not change the modal state
+        self._subprogram_dialect = SubprogramDialect.NONE  # emit repeated function patterns as subprograms
+        self._post_processor = PostProcessor()  # G-code dialect of the controller
+
+        self._stats = None  # JobStats of the current path geometry
+        self._stats_key = None  # inputs self._stats was derived from
+        self._polylines = None  # linked segments of the current path geometry, for stay-down
+        self._polylines_key = None  # inputs self._polylines was derived from
+        self._subprogram_planner = None  # SubprogramPlanner of the current path geometry
+        self._subprogram_planner_key = None  # inputs self._subprogram_planner was derived from
+        self._kinematic_seconds = None  # kinematic duration estimate
+        self._kinematic_key = None  # inputs self._kinematic_seconds was calculated from
+        self._stats_recomputed = 0
+        self._stats_reused = 0
 
     def report_data_missing(self):
         """Reports to GUI in case there's data missing so that G-code cannot be generated.
@@ -174,36 +212,120 @@ class MachinifyVector:
         :param xy_zero: a Point POD object"""
         self._xy_zero = xy_zero
 
+    def set_pitch(self, pitch):
+        """Setter function. By default, modules are as wide as the tool cuts at engrave depth, so that the cuts of
+        neighbouring rows just touch. See suggest_pitch().
+        :param pitch: the distance of two modules in mm, or None for the cut width"""
+        self._pitch = pitch
+
+    def get_pitch(self):
+        return self._pitch
+
+    def set_stay_down(self, stay_down):
+        """Setter function. When enabled, segments whose connecting move only crosses engraved modules are joined
+        into polylines that are cut without lifting the tool.
+        :param stay_down: boolean"""
+        self._stay_down = stay_down
+
+    def get_stay_down(self):
+        """Getter function.
+        :returns True if adjacent segments are linked"""
+        return self._stay_down
+
+    def set_compact(self, compact):
+        """Setter function. When enabled, the engrave block only contains words that change the controller's modal
+        state (motion mode, feed, and X/Y/Z position). This makes files smaller and faster to stream.
+        :param compact: boolean"""
+        self._compact = compact
+
+    def get_compact(self):
+        """Getter function.
+        :returns True if redundant G-code words are left out"""
+        return self._compact
+
+    def set_subprogram_dialect(self, dialect):
+        """Setter function. Unless set to SubprogramDialect.NONE, finder and alignment patterns that repeat
+        throughout the QR-code are emitted once as a subprogram and called at each location.
+        :param dialect: a SubprogramDialect value"""
+        self._subprogram_dialect = dialect
+
+    def get_subprogram_dialect(self):
+        """Getter function.
+        :returns the SubprogramDialect value"""
+        return self._subprogram_dialect
+
+    def set_post_processor(self, post_processor):
+        """Setter function.
+        :param post_processor: a PostProcessor object for the controller's G-code dialect"""
+        self._post_processor = post_processor
+
+    def get_post_processor(self):
+        """Getter function.
+        :returns the PostProcessor object"""
+        return self._post_processor
+
+    def set_machine_profile(self, profile):
+        """Setter function. With a machine profile, the job duration is simulated move by move from the machine's
+        rapid rates, accelerations, and junction deviation instead of estimated from path length and feed.
+        :param profile: a MachineProfile POD object, or None"""
+        self._machine_profile = profile
+
+    def get_machine_profile(self):
+        """Getter function.
+        :returns the MachineProfile, or None"""
+        return self._machine_profile
+
+    def get_plunge_count(self):
+        """Counts how often the tool is lowered into the workpiece.
+        :returns int: one per segment, or one per polyline if stay-down linking is enabled"""
+        if self._qr_path is None:
+            return 0
+        return self._get_stats().plunge_count
+
+    def get_stats_recomputed(self):
+        """Getter function.
+        :returns how often the path geometry has been walked to derive job statistics"""
+        return self._stats_recomputed
+
+    def get_stats_reused(self):
+        """Getter function.
+        :returns how often job statistics have been served without walking the path geometry"""
+        return self._stats_reused
+
     def get_job_duration_sec(self):
-        """Calculates the estimated job duration for an engrave path set.
+        """Calculates the estimated job duration for an engrave path set. The path geometry is only walked when it
+        has changed; changing tool, feeds, or engrave parameters rescales the cached distances.
         :returns _job_duration: a timedelta object representing seconds."""
         if self._qr_path is None or self._tool is None:
             return timedelta(0)
-        vect = self._qr_path.get_vectors()
-        count_z_moves = 2 * len(vect)
-
-        xy_moves_mm = 0
-        pos = Point()
-        x_length_last = 0
-        y_length_last = 0
-        for v in vect:
-            xy_moves_mm += abs(v.x_length + v.y_length) + \
-                           sqrt(abs(v.position.x - (pos.x + x_length_last)) ** 2 +
-                                abs(v.position.y - (pos.y + y_length_last)) ** 2)
-            pos = v.position
-            x_length_last = v.x_length
-            y_length_last = v.y_length
-
-        xy_moves_mm *= self._get_xy_move_per_step()
-        z_moves_mm = count_z_moves * (self._engrave_params.z_hover + self._engrave_params.z_engrave)
-
-        xy_moves_sec = xy_moves_mm / self._tool.fxy * 60 * self._time_buffer
-        z_moves_sec = z_moves_mm / self._tool.fz * 60 * self._time_buffer
-
-        self._job_duration = timedelta(seconds=xy_moves_sec + z_moves_sec)
+        stats = self._get_stats()
+        if self._machine_profile is not None:
+            seconds = self._get_kinematic_seconds(stats)
+        else:
+            # Linking moves are cut instead of travelled, but at the same XY feed
+            xy_moves_mm = stats.cut_length + stats.travel_length
+            xy_moves_mm *= self._get_xy_move_per_step()
+            count_z_moves = 2 * stats.plunge_count
+            z_moves_mm = count_z_moves * (self._engrave_params.z_hover + self._engrave_params.z_engrave)
+
+            xy_moves_sec = xy_moves_mm / self._tool.fxy * 60 * self._time_buffer
+            z_moves_sec = z_moves_mm / self._tool.fz * 60 * self._time_buffer
+            seconds = xy_moves_sec + z_moves_sec
+
+        self._job_duration = timedelta(seconds=seconds)
         self._job_duration -= timedelta(microseconds=self._job_duration.microseconds)
         return self._job_duration
 
+    def get_travel_savings(self):
+        """Reports what the QR path's optimizer saved on moves between segments, if any.
+        :returns tuple: travel saved in mm and the estimated job duration saved as a timedelta object"""
+        if self._qr_path is None or self._tool is None or self._qr_path.get_optimizer() is None:
+            return tuple((0, timedelta(0)))
+        self._qr_path.get_vectors()
+        saved_mm = self._qr_path.get_optimizer().get_travel_saved() * self._get_xy_move_per_step()
+        saved_sec = saved_mm / self._tool.fxy * 60 * self._time_buffer
+        return tuple((saved_mm, timedelta(seconds=saved_sec)))
+
     def get_dimension_info(self):
         """Getter function.
         :returns tuple: returns a tuple of QR engrave dimension and engrave bit size"""
@@ -216,13 +338,63 @@ class MachinifyVector:
         """Calls G-code boilerplate methods and the engrave method that converts a path into CNC-readable commands.
         :returns gcode: a StringIO object that can be saved to a file."""
         gcode = StringIO()
-        gcode.write(self._gcode_header())
-        gcode.write(self._gcode_prepare())
-        gcode.write(self._gcode_engrave())
-        gcode.write(self._gcode_finalize())
+        self.write_gcode(gcode)
         return gcode
 
+    def write_gcode(self, file):
+        """Writes the G-code program straight to a file object in buffered chunks, so that the program never has
+        to be held in memory as a whole.
+        :param file: a text or binary file object opened for writing
+        :returns the number of characters written
+        :raises ValueError if the post-processor's dialect has no subprograms of the selected kind"""
+        if not self._post_processor.supports_subprograms(self._subprogram_dialect):
+            raise ValueError('The post-processor does not support the selected subprogram dialect')
+        writer = GcodeWriter(file)
+        writer.write(self._post_processor.prologue(self._project_name))
+        writer.write(self._gcode_header())
+        if self._subprogram_dialect == SubprogramDialect.O_CALL:
+            writer.write(self._gcode_subprograms() + self._post_processor.blank())
+        writer.write(self._gcode_prepare())
+        for cmd in self._iter_engrave():
+            writer.write(cmd)
+        writer.write(self._gcode_finalize())
+        if self._subprogram_dialect == SubprogramDialect.M98:
+            writer.write(self._post_processor.blank() + self._gcode_subprograms())
+        writer.write(self._post_processor.epilogue())
+        writer.flush()
+        return writer.get_chars_written()
+
+    def get_coverage(self, pitch=None):
+        """Analyzes which part of each module the planned passes cut, see CoverageAnalysis.
+        :param pitch: the module pitch in mm to analyze, None for the current one
+        :returns a CoverageReport object"""
+        return self._get_coverage_analysis().analyze(pitch or self._get_xy_move_per_step(), self._get_cut_width())
+
+    def suggest_pitch(self, min_fraction=1.0):
+        """Suggests the largest module pitch at which the tool still cuts every dark module to at least min_fraction
+        of its area. For a V-bit, the cut width follows from its angle, tip, and the engrave depth.
+        :returns the pitch in mm, a float"""
+        return self._get_coverage_analysis().suggest_pitch(self._get_cut_width(), min_fraction)
+
+    def verify_gcode(self, gcode=None):
+        """Back-plots the program and compares what it engraves module by module with the QR-code.
+        :param gcode: a String object or an iterable of lines, e.g. an open G-code file, None to generate the program
+        :returns a BackplotReport object"""
+        if gcode is None:
+            gcode = self.generate_gcode().getvalue()
+        verifier = BackplotVerifier(self._get_xy_move_per_step(), self._get_cut_width())
+        for table, xy_zero in self._get_backplot_codes():
+            verifier.add_code(table, xy_zero)
+        return verifier.verify(gcode)
+
     def _get_xy_move_per_step(self):
+        """Helper method.
+        :returns float: the module pitch, by default the width the tool cuts"""
+        if self._pitch is not None:
+            return self._pitch
+        return self._get_cut_width()
+
+    def _get_cut_width(self):
         """Helper method.
         :returns float: a value representing the tool diameter relevant for engraving."""
         if self._tool.angle > 0:
@@ -234,70 +406,141 @@ class MachinifyVector:
         else:
             return self._tool.diameter
 
+    def _get_stats(self):
+        """Helper method. Derives the job statistics from the path geometry, or reuses them if none of the inputs
+        they depend on has changed.
+        :returns a JobStats object"""
+        key = self._get_geometry_key()
+        if self._stats is not None and key == self._stats_key:
+            self._stats_reused += 1
+            return self._stats
+        self._stats = JobStats(*self._get_machining_order())
+        self._stats_key = key
+        self._kinematic_key = None
+        self._stats_recomputed += 1
+        return self._stats
+
+    def _get_geometry_key(self):
+        """Helper method.
+        :returns a tuple of the inputs the machined path geometry depends on"""
+        path = self._qr_path
+        return tuple((path, path.get_table().digest(), path.get_strategy(), path.get_optimizer(), self._stay_down,
+                      self._subprogram_dialect))
+
+    def _get_kinematic_seconds(self, stats):
+        """Helper method. Simulates the job with the machine profile, unless it has been simulated with the same
+        geometry, tool, engrave parameters, and profile before.
+        :returns the duration in seconds, a float"""
+        profile = self._machine_profile
+        key = tuple((self._get_xy_move_per_step(), self._tool.fxy, self._tool.fz, self._engrave_params.z_hover,
+                     self._engrave_params.z_engrave, profile.rapid_xy, profile.rapid_z, profile.accel_xy,
+                     profile.accel_z, profile.junction_deviation))
+        if key != self._kinematic_key:
+            deltas, feeds = engrave_moves(stats.toolpath, stats.plunges, self._get_xy_move_per_step(),
+                                          self._engrave_params, self._tool)
+            self._kinematic_seconds = KinematicModel(profile).get_duration(deltas, feeds)
+            self._kinematic_key = key
+        return self._kinematic_seconds
+
+    def _get_coverage_analysis(self):
+        """Helper method.
+        :returns a CoverageAnalysis object of the path in machining order"""
+        stats = self._get_stats()
+        return CoverageAnalysis(self._qr_path.get_table(), stats.toolpath, stats.plunges)
+
+    def _get_machining_order(self):
+        """Helper method. Collects the segments as they are machined, subprogram calls expanded.
+        :returns tuple: a Toolpath object and a bool array, True for each segment the tool is lowered for"""
+        if self._subprogram_dialect != SubprogramDialect.NONE:
+            polylines = self._get_subprogram_planner().get_expanded_polylines()
+        elif self._stay_down:
+            polylines = self._get_polylines()
+        else:
+            toolpath = self._qr_path.get_toolpath()
+            return tuple((toolpath, np.ones(len(toolpath), dtype=bool)))
+        lengths = [len(polyline) for polyline in polylines]
+        plunges = np.zeros(sum(lengths), dtype=bool)
+        plunges[np.cumsum([0] + lengths)[:len(lengths)]] = True
+        return tuple((Toolpath.from_segments(segment for polyline in polylines for segment in polyline), plunges))
+
+    def _get_backplot_codes(self):
+        """Helper method.
+        :returns a list of (QrValueTable, Point) tuples: the codes the program engraves and their XY zero"""
+        return [tuple((self._qr_path.get_table(), self._xy_zero))]
+
+    def _get_polylines(self):
+        """Helper method. Reorders and links the QR path's segments, or reuses the linked segments if the path
+        geometry has not changed.
+        :returns a list of polylines, each one a list of LineSegment objects"""
+        key = self._get_geometry_key()
+        if self._polylines is None or key != self._polylines_key:
+            self._polylines = SegmentLinker(self._qr_path.get_table()).link(self._qr_path.iter_vectors())
+            self._polylines_key = key
+        return self._polylines
+
     def _gcode_engrave(self):
         """Converts a list of paths into G-code instructions for the CNC.
         :returns engrave: A String object"""
-        engrave = ''
-        for path in self._qr_path.get_vectors():
-            engrave += self._engrave(path)
-        return engrave
-
-    def _engrave(self, line_segment):
-        """Converts a QR-code line segment bit state into G-code XYZ moves for the CNC.
-        :param line_segment: LineSegment object.
-        :returns cmd: a string object"""
-        cmd = ''
-
-        # Rapid move: start position of vector
-        tool_step = self._get_xy_move_per_step()
-        qrpos_x = round(line_segment.position.x * tool_step + self._xy_zero.x, 3)
-        qrpos_y = round(-line_segment.position.y * tool_step + self._xy_zero.y, 3)
-        cmd += 'G00 X' + str(qrpos_x) + \
-               ' Y' + str(qrpos_y) + '\n'
-        # Engrave: Z down
-        cmd += 'G01 Z-' + str(self._engrave_params.z_engrave) + ' F' + str(self._tool.fz) + '\n'
-        # Engrave: move
-        if line_segment.y_length != 0:
-            cmd += 'G01 Y' + str(round(qrpos_y - line_segment.y_length * tool_step, 3))
-            cmd += ' F' + str(self._tool.fxy) + '\n'
-        elif line_segment.x_length != 0:
-            cmd += 'G01 X' + str(round(qrpos_x + line_segment.x_length * tool_step, 3))
-            cmd += ' F' + str(self._tool.fxy) + '\n'
-        #  Hover: Z up
-        cmd += 'G00 Z' + str(self._engrave_params.z_hover) + '\n'
-        return cmd
+        return ''.join(self._iter_engrave())
+
+    def _iter_engrave(self):
+        """Converts paths into G-code instructions for the CNC one segment, or polyline, at a time.
+        :returns yields String objects"""
+        emitter = self._post_processor.make_emitter(self._qr_path.get_size(), self._get_xy_move_per_step(),
+                                                    self._xy_zero, self._engrave_params, self._tool, self._compact)
+        if self._subprogram_dialect != SubprogramDialect.NONE:
+            subprogram_emitter = self._make_subprogram_emitter()
+            for item in self._get_subprogram_planner().get_items():
+                if isinstance(item, SubprogramCall):
+                    start = item.get_start()
+                    yield emitter.call(start.x, start.y, subprogram_emitter.call(item.cluster))
+                else:
+                    yield emitter.polyline(item)
+        elif self._stay_down:
+            for polyline in self._get_polylines():
+                yield emitter.polyline(polyline)
+        else:
+            for path in self._qr_path.iter_vectors():
+                yield emitter.segment(path)
+        yield emitter.finish()
+
+    def _get_subprogram_planner(self):
+        """Helper method. The planner is reused as long as the path geometry has not changed, so that the clusters
+        are found once for the statistics, the subprograms, and the main program.
+        :returns a SubprogramPlanner object for the QR path"""
+        key = self._get_geometry_key()
+        if self._subprogram_planner is None or key != self._subprogram_planner_key:
+            self._subprogram_planner = SubprogramPlanner(self._qr_path.get_table(), self._qr_path.get_strategy(),
+                                                         self._qr_path.get_optimizer(), self._stay_down)
+            self._subprogram_planner_key = key
+        return self._subprogram_planner
+
+    def _make_subprogram_emitter(self):
+        """Helper method.
+        :returns a SubprogramEmitter object for the current tool, engrave parameters, and dialect"""
+        return self._post_processor.make_subprogram_emitter(self._get_xy_move_per_step(), self._engrave_params,
+                                                            self._tool, self._subprogram_dialect)
+
+    def _gcode_subprograms(self):
+        """Creates the subprograms of repeated function patterns, separated by empty lines.
+        :returns subprograms: a String object"""
+        subprogram_emitter = self._make_subprogram_emitter()
+        return self._post_processor.blank().join(subprogram_emitter.definition(cluster)
+                                                 for cluster in self._get_subprogram_planner().get_clusters())
 
     def _gcode_header(self):
         """Creates boilerplate code that is sent into the G-code file. It creates human-readable comments to
         identify project information.
         :returns header: a String object"""
-        header = '(Project: QR-codengrave_' + self._project_name + ')\n'
-        header += '(Created with Schallbert\'s QR-codengrave Version ' + str(self._version) + ')\n'
-        header += '(Job duration ca. ' + str(self._job_duration) + ')\n\n'
-        header += '(Required tool: ' + self._tool.get_description() + ')\n\n'
-        return header
+        return self._post_processor.header(self._project_name, self._version, self._job_duration, self._tool)
 
     def _gcode_prepare(self):
         """Creates boilerplate G-code to initialize the CNC with correct tool, spindle speed, and moves to Qr-code's
          targeted position.
          :returns prepare: a String object"""
-        prepare = 'G90 \n'  # Set absolute coordinates (modal)
-        prepare += 'MSG "Tool: ' + self._tool.get_description() + '"\n'  # Tool message for user
-        prepare += 'T' + str(self._tool.number) + ' M06 \n'  # Tool select / change
-        prepare += 'M03 S' + str(self._tool.speed) + '\n'  # Set spindle speed
-
-        prepare += 'G00 Z' + str(self._engrave_params.z_flyover) + '\n\n'  # Go to flyover height
-        prepare += 'G00 Y0 X0 \n'  # Go to workpiece XY0
-        prepare += 'G00 X' + str(self._xy_zero.x) + ' Y' + \
-                   str(self._xy_zero.y) + ' \n'  # Go to QR-code begin position
-        prepare += 'G00 Z' + str(self._engrave_params.z_hover) + '\n\n'  # Go to hover Z height
-        return prepare
+        return self._post_processor.prepare(self._tool, self._engrave_params, self._xy_zero)
 
     def _gcode_finalize(self):
         """Creates boilerplate G-code to finalize the CNC job. Commands spindle stop, returns to workpiece zero.
         :returns finalize, a String object"""
-        finalize = '\nM05 \n'  # Spindle Stop
-        finalize += 'G00 Z' + str(self._engrave_params.z_flyover) + '\n'  # Go to flyover height
-        finalize += 'G00 Y0 X0 \n'  # Go to workpiece XY0
-        finalize += 'M30 \n'  # End of Program
-        return finalize
+        return self._post_processor.finalize(self._engrave_params)
@@ -0,0 +1,157 @@
+import numpy as np
+
+from src.platform.vectorize_helper import Point, LineSegment
+
+
+def hopcroft_karp(adjacency, right_count):
+    """Computes a maximum matching of a bipartite graph with the Hopcroft-Karp algorithm.
+    :param adjacency: a list holding, for each left vertex, the list of right vertices it is connected to
+    :param right_count: the number of right vertices
+    :returns match_left, match_right: lists holding the matched partner of each vertex, or -1 if unmatched"""
+    left_count = len(adjacency)
+    match_left = [-1] * left_count
+    match_right = [-1] * right_count
+    while True:
+        layer, found_free_right = _layer_graph(adjacency, match_left, match_right)
+        if not found_free_right:
+            return match_left, match_right
+        next_edge = [0] * left_count
+        for root in range(left_count):
+            if match_left[root] == -1:
+                _augment(root, adjacency, match_left, match_right, layer, next_edge)
+
+
+def _layer_graph(adjacency, match_left, match_right):
+    """Breadth first search layers the graph starting from all free left vertices.
+    :returns tuple: the layer of each left vertex (-1 if unreached), and True if a free right vertex is reachable"""
+    layer = [-1] * len(adjacency)
+    queue = [u for u in range(len(adjacency)) if match_left[u] == -1]
+    for u in queue:
+        layer[u] = 0
+    found_free_right = False
+    head = 0
+    while head < len(queue):
+        u = queue[head]
+        head += 1
+        for v in adjacency[u]:
+            w = match_right[v]
+            if w == -1:
+                found_free_right = True
+            elif layer[w] == -1:
+                layer[w] = layer[u] + 1
+                queue.append(w)
+    return tuple((layer, found_free_right))
+
+
+def _augment(root, adjacency, match_left, match_right, layer, next_edge):
+    """Depth first search along the layers for a shortest augmenting path from a free left vertex, flipping the
+    matching along it if one is found. Vertices and edges used up in this phase are skipped by later searches.
+    :param next_edge: for each left vertex, the index of the next edge to try in this phase"""
+    stack = [root]
+    via = []
+    while stack:
+        u = stack[-1]
+        if next_edge[u] == len(adjacency[u]):
+            layer[u] = -1  # dead end for this phase
+            stack.pop()
+            if via:
+                via.pop()
+            continue
+        v = adjacency[u][next_edge[u]]
+        next_edge[u] += 1
+        w = match_right[v]
+        if w == -1:
+            via.append(v)
+            for left, right in zip(stack, via):
+                match_left[left] = right
+                match_right[right] = left
+            return
+        if layer[w] == layer[u] + 1:
+            stack.append(w)
+            via.append(v)
+
+
+def minimum_vertex_cover(adjacency, right_count):
+    """Derives a minimum vertex cover from a maximum matching (Koenig's theorem).
+    :param adjacency: a list holding, for each left vertex, the list of right vertices it is connected to
+    :param right_count: the number of right vertices
+    :returns left_cover, right_cover: lists of bools, True for vertices that are part of the cover"""
+    match_left, match_right = hopcroft_karp(adjacency, right_count)
+    # Vertices reachable from free left vertices on alternating paths
+    visited_left = [match == -1 for match in match_left]
+    visited_right = [False] * right_count
+    queue = [u for u in range(len(adjacency)) if visited_left[u]]
+    while queue:
+        u = queue.pop()
+        for v in adjacency[u]:
+            if not visited_right[v]:
+                visited_right[v] = True
+                w = match_right[v]
+                if w != -1 and not visited_left[w]:
+                    visited_left[w] = True
+                    queue.append(w)
+    return [not visited for visited in visited_left], visited_right
+
+
+def _label_runs(table):
+    """Helper function. Numbers the maximal runs of dark modules along the rows of a matrix.
+    :param table: a square numpy bool matrix
+    :returns run_id: int matrix with each dark module's run number, starts_y, starts_x, lengths: run extents"""
+    is_start = table.copy()
+    is_start[:, 1:] &= ~table[:, :-1]
+    run_id = np.cumsum(is_start.ravel()).reshape(table.shape) - 1
+    starts_y, starts_x = np.nonzero(is_start)
+    lengths = np.bincount(run_id[table], minlength=len(starts_y))
+    return run_id, starts_y, starts_x, lengths
+
+
+class MinPlungeDecomposer:
+    """Decomposes a QR-code matrix into the smallest possible number of horizontal and vertical segments, which
+    means the smallest number of plunges. Every dark module is an edge between the maximal horizontal run and the
+    maximal vertical run it belongs to. The smallest set of runs that covers all modules is a minimum vertex cover
+    of that bipartite graph, found through a maximum matching. The input matrix is not modified."""
+
+    def __init__(self, table):
+        self._table = table
+        self._size = table.shape[0]
+
+    def get_segments(self):
+        """Calculates the segment set and orders it row by row, left-to-right for even rows and right-to-left
+        for uneven rows like LinePath's serpentine algorithm. Vertical segments point downwards.
+        Vertical segments' ends that are cut by a horizontal segment anyway are trimmed.
+        :returns a list of LineSegments"""
+        table = self._table
+        h_id, h_y, h_x, h_length = _label_runs(table)
+        v_id_t, v_x, v_y, v_length = _label_runs(table.T)
+        v_id = v_id_t.T
+
+        ys, xs = np.nonzero(table)
+        edges_h = h_id[ys, xs]
+        edges_v = v_id[ys, xs]
+        order = np.argsort(edges_h, kind='stable')
+        splits = np.cumsum(h_length)[:-1]
+        adjacency = [group.tolist() for group in np.split(edges_v[order], splits)] if len(h_length) else []
+        h_cover, v_cover = minimum_vertex_cover(adjacency, len(v_length))
+        h_cover = np.array(h_cover, dtype=bool)
+        v_cover = np.array(v_cover, dtype=bool)
+
+        cut_horizontally = np.zeros_like(table)
+        cut_horizontally[ys, xs] = h_cover[edges_h]
+
+        segments = []
+        for y, x, length in zip(h_y[h_cover].tolist(), h_x[h_cover].tolist(), h_length[h_cover].tolist()):
+            if y % 2:
+                segments.append((y, -(x + length - 1), LineSegment(1 - length, 0, Point(x + length - 1, y))))
+            else:
+                segments.append((y, x, LineSegment(length - 1, 0, Point(x, y))))
+        for y, x, length in zip(v_y[v_cover].tolist(), v_x[v_cover].tolist(), v_length[v_cover].tolist()):
+            top = y
+            bottom = y + length - 1
+            while top < bottom and cut_horizontally[top, x]:
+                top += 1
+            while bottom > top and cut_horizontally[bottom, x]:
+                bottom -= 1
+            key_x = -x if top % 2 else x
+            segments.append((top, key_x, LineSegment(0, bottom - top, Point(x, top))))
+        segments.sort(key=lambda entry: (entry[0], entry[1]))
+        return [segment for _, _, segment in segments]
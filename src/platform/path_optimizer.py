@@ -0,0 +1,227 @@
+from time import perf_counter
+
+import numpy as np
+
+from src.platform.vectorize_helper import Point, LineSegment
+
+
+def _distance(a, b):
+    """Helper function. Row-wise euclidean distance between two arrays of XY coordinates."""
+    return np.hypot(a[..., 0] - b[..., 0], a[..., 1] - b[..., 1])
+
+
+def get_travel(segments, start=Point(0, 0)):
+    """Calculates the length of all moves between segments, in QR-code modules.
+    :param segments: a list of LineSegments in machining order
+    :param start: the Point the tool starts from
+    :returns a float representing the travel length"""
+    travel = 0
+    x = start.x
+    y = start.y
+    for segment in segments:
+        travel += ((segment.position.x - x) ** 2 + (segment.position.y - y) ** 2) ** 0.5
+        x = segment.position.x + segment.x_length
+        y = segment.position.y + segment.y_length
+    return travel
+
+
+class PathOptimizer:
+    """Reorders a list of LineSegments and chooses each segment's cut direction to shorten the rapid moves between
+    them. Starts from a nearest-neighbour tour that is refined with 2-opt and Or-opt moves until no improvement is
+    found or the time budget is used up."""
+
+    def __init__(self, time_budget_sec=0.5, start=Point(0, 0)):
+        self._time_budget = time_budget_sec
+        self._start = np.array([start.x, start.y], dtype=float)
+        self._travel_before = 0
+        self._travel_after = 0
+        self._deadline = 0
+
+    def get_time_budget(self):
+        return self._time_budget
+
+    def get_travel_before(self):
+        """Getter function.
+        :returns the travel length of the last optimized input order, in modules"""
+        return self._travel_before
+
+    def get_travel_after(self):
+        """Getter function.
+        :returns the travel length of the last optimized output order, in modules"""
+        return self._travel_after
+
+    def get_travel_saved(self):
+        """Getter function.
+        :returns the travel length saved by the last optimization, in modules"""
+        return self._travel_before - self._travel_after
+
+    def optimize(self, segments):
+        """Reorders segments to reduce travel. The input list is not modified.
+        :param segments: a list of LineSegments
+        :returns a new list of LineSegments. Segments that are cut in reverse direction are new objects."""
+        self._deadline = perf_counter() + self._time_budget
+        if not segments:
+            self._travel_before = self._travel_after = 0
+            return []
+        starts = np.array([[s.position.x, s.position.y] for s in segments], dtype=float)
+        ends = starts + np.array([[s.x_length, s.y_length] for s in segments], dtype=float)
+        self._travel_before = self._tour_travel(starts, ends)
+
+        order, flipped = self._nearest_neighbour(starts, ends)
+        tour_starts = np.where(flipped[:, None], ends[order], starts[order])
+        tour_ends = np.where(flipped[:, None], starts[order], ends[order])
+        tour = [order, flipped, tour_starts, tour_ends]
+
+        improved = True
+        while improved and not self._is_timed_out():
+            improved = self._two_opt(tour)
+            improved |= self._or_opt(tour)
+        order, flipped, tour_starts, tour_ends = tour
+        self._travel_after = self._tour_travel(tour_starts, tour_ends)
+        if self._travel_after > self._travel_before:
+            self._travel_after = self._travel_before
+            return list(segments)
+
+        result = []
+        for index, flip in zip(order.tolist(), flipped.tolist()):
+            segment = segments[index]
+            if flip:
+                segment = LineSegment(-segment.x_length, -segment.y_length,
+                                      Point(segment.position.x + segment.x_length,
+                                            segment.position.y + segment.y_length))
+            result.append(segment)
+        return result
+
+    def _is_timed_out(self):
+        return perf_counter() > self._deadline
+
+    def _tour_travel(self, starts, ends):
+        previous_ends = np.vstack((self._start, ends[:-1]))
+        return float(_distance(previous_ends, starts).sum())
+
+    def _nearest_neighbour(self, starts, ends):
+        """Builds a tour by always visiting the closest unvisited segment end next. Candidate ends are kept in
+        compacted coordinate arrays, the first half holding segment starts and the second half segment ends, that
+        shrink as segments get visited.
+        :returns order: the segment indices in tour order, flipped: True where a segment is cut in reverse"""
+        count = len(starts)
+        remaining = np.arange(count)
+        xs = np.concatenate((starts[:, 0], ends[:, 0]))
+        ys = np.concatenate((starts[:, 1], ends[:, 1]))
+        order = np.empty(count, dtype=int)
+        flipped = np.empty(count, dtype=bool)
+        x, y = self._start
+        distance = np.empty(2 * count)
+        for step in range(count):
+            left = count - step
+            dist = distance[:2 * left]
+            np.subtract(xs, x, out=dist)
+            np.square(dist, out=dist)
+            dist += np.square(ys - y)
+            best = int(dist.argmin())
+            flipped[step] = best >= left
+            best %= left
+            # Tool leaves from the other end of the chosen segment.
+            other = best if flipped[step] else best + left
+            x = xs[other]
+            y = ys[other]
+            order[step] = remaining[best]
+
+            last = left - 1
+            remaining[best] = remaining[last]
+            for coordinates in (xs, ys):
+                coordinates[best] = coordinates[last]
+                coordinates[left + best] = coordinates[left + last]
+                coordinates[last:2 * last] = coordinates[left:left + last]
+            xs = xs[:2 * last]
+            ys = ys[:2 * last]
+            remaining = remaining[:last]
+        return order, flipped
+
+    def _two_opt(self, tour):
+        """Reverses blocks of the tour where this shortens travel. Reversing a block also reverses each segment's
+        cut direction, so only the two edges at the block borders change length.
+        :param tour: list of order, flipped, starts, ends arrays. Modified in place.
+        :returns True if the tour was improved"""
+        order, flipped, starts, ends = tour
+        count = len(order)
+        improved = False
+        for i in range(count):
+            if self._is_timed_out():
+                break
+            before = self._start if i == 0 else ends[i - 1]
+            next_starts = starts[i + 1:]
+            old = _distance(before, starts[i]) + np.append(_distance(ends[i:-1], next_starts), 0)
+            new = _distance(before, ends[i:]) + np.append(_distance(starts[i], next_starts), 0)
+            gain = old - new
+            j = int(np.argmax(gain))
+            if gain[j] > 1e-9:
+                j += i
+                order[i:j + 1] = order[i:j + 1][::-1].copy()
+                flipped[i:j + 1] = ~flipped[i:j + 1][::-1]
+                starts[i:j + 1], ends[i:j + 1] = ends[i:j + 1][::-1].copy(), starts[i:j + 1][::-1].copy()
+                improved = True
+        return improved
+
+    def _or_opt(self, tour):
+        """Moves chains of up to three consecutive segments to the position in the tour where they cause the least
+        travel, in either direction.
+        :param tour: list of order, flipped, starts, ends arrays. Modified in place.
+        :returns True if the tour was improved"""
+        improved = False
+        for length in (1, 2, 3):
+            i = 0
+            while i + length <= len(tour[0]):
+                if self._is_timed_out():
+                    return improved
+                if self._move_chain(tour, i, length):
+                    improved = True
+                i += 1
+        return improved
+
+    def _move_chain(self, tour, i, length):
+        """Tries to move the chain tour[i:i + length] to the best other position.
+        :returns True if the chain was moved"""
+        order, flipped, starts, ends = tour
+        count = len(order)
+        last = i + length - 1
+        before = self._start if i == 0 else ends[i - 1]
+        removal_gain = _distance(before, starts[i])
+        if last + 1 < count:
+            removal_gain += _distance(ends[last], starts[last + 1]) - _distance(before, starts[last + 1])
+
+        # Candidate insertion edges k -> k + 1 of the remaining tour, k = -1 being the start position.
+        rest = np.r_[0:i, last + 1:count]
+        if not len(rest):
+            return False
+        edge_from = np.vstack((self._start, ends[rest]))
+        edge_to = starts[rest]
+        edge_length = np.append(_distance(edge_from[:-1], edge_to), 0)
+        has_next = np.append(np.ones(len(rest), dtype=bool), False)
+        to_padded = np.vstack((edge_to, edge_to[:1]))
+
+        chain_start = starts[i]
+        chain_end = ends[last]
+        forward = _distance(edge_from, chain_start) + np.where(has_next, _distance(chain_end, to_padded), 0)
+        backward = _distance(edge_from, chain_end) + np.where(has_next, _distance(chain_start, to_padded), 0)
+        insert_cost = np.minimum(forward, backward) - edge_length
+        k = int(np.argmin(insert_cost))
+        if removal_gain - insert_cost[k] <= 1e-9:
+            return False
+
+        chain = slice(i, last + 1)
+        chain_order = order[chain].copy()
+        chain_flipped = flipped[chain].copy()
+        chain_starts = starts[chain].copy()
+        chain_ends = ends[chain].copy()
+        if backward[k] < forward[k]:
+            chain_order = chain_order[::-1]
+            chain_flipped = ~chain_flipped[::-1]
+            chain_starts, chain_ends = chain_ends[::-1], chain_starts[::-1]
+        head = rest[:k]
+        tail = rest[k:]
+        tour[0] = np.concatenate((order[head], chain_order, order[tail]))
+        tour[1] = np.concatenate((flipped[head], chain_flipped, flipped[tail]))
+        tour[2] = np.concatenate((starts[head], chain_starts, starts[tail]))
+        tour[3] = np.concatenate((ends[head], chain_ends, ends[tail]))
+        return True
@@ -0,0 +1,294 @@
+from math import ceil
+from datetime import timedelta
+
+import numpy as np
+from qrcodegen import QrCode
+
+from src.platform.vectorize_helper import Point, QrValueTable
+from src.platform.line_path import LinePath, Strategy
+from src.platform.kinematics import KinematicModel
+from src.platform.machinify_vector import MachinifyVector
+
+
+class PlateJob(MachinifyVector):
+    """Engraves several QR-codes on one plate of stock in a single program, with one tool change and one spindle
+    start. Codes are laid out on a grid within the stock, or placed at user-defined fixture positions. They are cut
+    in nearest-neighbour order, moving between codes at flyover height.
+    XY zero is the top left corner of the stock, which extends in +X and -Y like the QR-codes themselves.
+    Subprograms are not supported for plate jobs."""
+
+    def __init__(self, version, stock_width=100, stock_height=100, margin=2, gap=5):
+        super().__init__(version)
+        self._stock_width = stock_width
+        self._stock_height = stock_height
+        self._margin = margin  # distance of the codes to the stock's edges in mm
+        self._gap = gap  # distance between codes in mm
+        self._texts = []
+        self._fixtures = None  # list of Points: top left corner of each code relative to XY zero in mm
+        self._ecc = QrCode.Ecc.MEDIUM
+        self._strategy = Strategy.RUN_LENGTH
+        self._project_name = 'plate'
+        self._paths = None  # LinePath objects of the texts, in input order
+        self._paths_key = None  # texts and settings self._paths was encoded with
+        self._codes = None  # MachinifyVector objects of the last get_codes() call, in machining order
+        self._codes_key = None  # settings self._codes was built with
+        self._codes_objects = None  # objects self._codes share with the plate
+
+    def set_texts(self, texts):
+        """Setter function.
+        :param texts: a list of String objects, one per QR-code"""
+        self._texts = list(texts)
+
+    def get_texts(self):
+        return self._texts
+
+    def set_stock(self, width, height):
+        """Setter function.
+        :param width, height: the usable size of the stock in mm"""
+        self._stock_width = width
+        self._stock_height = height
+
+    def set_spacing(self, margin, gap):
+        """Setter function.
+        :param margin: distance of the codes to the stock's edges in mm
+        :param gap: distance between codes in mm"""
+        self._margin = margin
+        self._gap = gap
+
+    def set_fixtures(self, fixtures):
+        """Setter function. Places the codes at fixture positions instead of laying them out on a grid.
+        :param fixtures: a list of Points, the top left corner of each code relative to XY zero in mm
+        (Y is negative inside the stock), or None for grid layout"""
+        self._fixtures = None if fixtures is None else list(fixtures)
+
+    def get_fixtures(self):
+        return self._fixtures
+
+    def set_ecc(self, ecc):
+        """Setter function.
+        :param ecc: a QrCode.Ecc error correction level used for all codes"""
+        self._ecc = ecc
+
+    def set_strategy(self, strategy):
+        """Setter function.
+        :param strategy: a Strategy value used to plan all codes"""
+        self._strategy = strategy
+
+    def set_subprogram_dialect(self, dialect):
+        raise ValueError('Subprograms are not supported for plate jobs')
+
+    def get_coverage(self, pitch=None):
+        raise ValueError('Coverage is analyzed per code, see get_codes()')
+
+    def suggest_pitch(self, min_fraction=1.0):
+        """:returns the largest pitch in mm at which all codes on the plate reach min_fraction, a float"""
+        return min(code.suggest_pitch(min_fraction) for code in self.get_codes())
+
+    def report_data_missing(self):
+        """Reports to GUI in case there's data missing so that G-code cannot be generated.
+        :returns a String object that contains info about what's missing,
+        or an empty string when everything has been provided."""
+        if not self._texts:
+            return 'QR-code data'
+        if self._tool is None:
+            return 'Tool data'
+        if self._engrave_params is None:
+            return 'Engrave parameters'
+        if self._xy_zero is None:
+            return 'XY Zero offsets'
+        return ''
+
+    def get_placements(self):
+        """Lays out the codes on the stock.
+        :returns a list of (text, Point) tuples in input order: each code's top left corner relative to XY zero in mm
+        :raises ValueError if the codes do not fit on the stock or there are fewer fixtures than texts"""
+        return [(text, offset) for text, offset in zip(self._texts, self._get_offsets(self._get_paths()))]
+
+    def get_codes(self):
+        """Prepares one MachinifyVector per code. The codes are reused until the texts or a setting they depend on
+        change, so that their paths are planned once for duration, statistics, and G-code.
+        :returns a list of MachinifyVector objects in machining order"""
+        key = self._get_codes_key()
+        objects = tuple((self._tool, self._engrave_params, self._machine_profile, self._post_processor))
+        if self._codes is not None and key == self._codes_key and \
+                all(current is previous for current, previous in zip(objects, self._codes_objects)):
+            return list(self._codes)
+        paths = self._get_paths()
+        offsets = self._get_offsets(paths)
+        codes = []
+        for text, path, offset in zip(self._texts, paths, offsets):
+            code = MachinifyVector(self._version)
+            code.set_project_name(text)
+            code.set_qr_path(path)
+            code.set_tool(self._tool)
+            code.set_engrave_params(self._engrave_params)
+            code.set_xy_zero(self._get_code_xy_zero(offset))
+            code.set_pitch(self._pitch)
+            code.set_stay_down(self._stay_down)
+            code.set_compact(self._compact)
+            code.set_machine_profile(self._machine_profile)
+            code.set_post_processor(self._post_processor)
+            codes.append(code)
+        self._codes = self._order(codes)
+        self._codes_key = key
+        self._codes_objects = objects
+        return list(self._codes)
+
+    def _get_codes_key(self):
+        """:returns a tuple of the settings the codes and their layout depend on. Tool, engrave parameters, machine
+        profile, and post-processor are shared with the codes, only the values that change the layout are part of it"""
+        fixtures = None if self._fixtures is None else tuple((fixture.x, fixture.y) for fixture in self._fixtures)
+        return tuple((tuple(self._texts), self._version, self._ecc.ordinal, self._strategy, fixtures,
+                      self._stock_width, self._stock_height, self._margin, self._gap, self._xy_zero.x,
+                      self._xy_zero.y, self._pitch, self._get_xy_move_per_step(), self._stay_down, self._compact))
+
+    def get_plunge_count(self):
+        if not self._texts:
+            return 0
+        return sum(code.get_plunge_count() for code in self.get_codes())
+
+    def get_job_duration_sec(self):
+        """Calculates the estimated duration of the whole plate: all codes plus the moves between them.
+        :returns _job_duration: a timedelta object representing seconds."""
+        if not self._texts or self._tool is None:
+            return timedelta(0)
+        codes = self.get_codes()
+        duration = sum((code.get_job_duration_sec() for code in codes), timedelta(0))
+        position = (self._xy_zero.x, self._xy_zero.y)
+        xy_moves = []
+        for code in codes:
+            start = self._get_start_mm(code)
+            xy_moves.append((start[0] - position[0], start[1] - position[1]))
+            position = self._get_end_mm(code)
+        lift = self._engrave_params.z_flyover - self._engrave_params.z_hover
+        if self._machine_profile is not None:
+            # Per code: up to flyover height, rapid to its start, down to hover height
+            deltas = np.zeros((len(codes), 3, 3))
+            deltas[:, 0, 2] = lift
+            deltas[:, 1, :2] = xy_moves
+            deltas[:, 2, 2] = -lift
+            deltas = deltas.reshape(-1, 3)
+            deltas = deltas[np.any(deltas != 0, axis=1)]
+            seconds = KinematicModel(self._machine_profile).get_duration(deltas, np.full(len(deltas), np.inf))
+        else:
+            xy_moves_mm = sum((x ** 2 + y ** 2) ** 0.5 for x, y in xy_moves)
+            z_moves_mm = 2 * len(codes) * lift
+            xy_moves_sec = xy_moves_mm / self._tool.fxy * 60 * self._time_buffer
+            z_moves_sec = z_moves_mm / self._tool.fz * 60 * self._time_buffer
+            seconds = xy_moves_sec + z_moves_sec
+        self._job_duration = duration + timedelta(seconds=seconds)
+        self._job_duration -= timedelta(microseconds=self._job_duration.microseconds)
+        return self._job_duration
+
+    def get_dimension_info(self):
+        """Getter function.
+        :returns tuple: the largest code's engrave dimension and engrave bit size"""
+        if not self._texts or self._tool is None:
+            return tuple((0, 0))
+        step = self._get_xy_move_per_step()
+        return tuple((step * max(path.get_size() for path in self._get_paths()), step))
+
+    def _gcode_header(self):
+        header = super()._gcode_header()
+        header += self._post_processor.comment('Plate: ' + str(len(self._texts)) + ' codes on ' +
+                                               str(self._stock_width) + ' x ' + str(self._stock_height) + ' mm')
+        return header + self._post_processor.blank()
+
+    def _iter_engrave(self):
+        """Engraves the codes one after another, moving between them at flyover height.
+        :returns yields String objects"""
+        post = self._post_processor
+        for number, code in enumerate(self.get_codes()):
+            start = self._get_start_mm(code)
+            yield post.comment('Code ' + str(number + 1) + ': ' +
+                               code.get_project_name().replace('(', '').replace(')', ''))
+            yield 'G00 Z' + post.number(self._engrave_params.z_flyover) + '\n'
+            yield 'G00 X' + post.number(start[0]) + ' Y' + post.number(start[1]) + '\n'
+            yield 'G00 Z' + post.number(self._engrave_params.z_hover) + '\n'
+            yield from code._iter_engrave()
+
+    def _get_backplot_codes(self):
+        """Encodes the codes without planning their paths."""
+        paths = self._get_paths()
+        return [tuple((path.get_table(), self._get_code_xy_zero(offset)))
+                for path, offset in zip(paths, self._get_offsets(paths))]
+
+    def _get_code_xy_zero(self, offset):
+        """:returns a Point: the machine position of a code's top left module, given its offset in mm"""
+        return Point(round(self._xy_zero.x + offset.x, 3), round(self._xy_zero.y + offset.y, 3))
+
+    def _get_paths(self):
+        """:returns a list of LinePath objects in input order, encoded again only if texts, error correction level,
+        or strategy have changed"""
+        key = tuple((tuple(self._texts), self._ecc.ordinal, self._strategy))
+        if self._paths is None or key != self._paths_key:
+            self._paths = self._make_paths()
+            self._paths_key = key
+        return self._paths
+
+    def _make_paths(self):
+        paths = []
+        for text in self._texts:
+            table = QrValueTable()
+            table.set_qr(QrCode.encode_text(text, self._ecc))
+            paths.append(LinePath(table, self._strategy))
+        return paths
+
+    def _get_offsets(self, paths):
+        """:returns a list of Points: each code's top left corner relative to XY zero in mm, in input order"""
+        step = self._get_xy_move_per_step()
+        dimensions = [path.get_size() * step for path in paths]
+        if self._fixtures is not None:
+            if len(self._fixtures) < len(paths):
+                raise ValueError('{} codes but only {} fixtures'.format(len(paths), len(self._fixtures)))
+            for fixture, dimension in zip(self._fixtures, dimensions):
+                if fixture.x < 0 or fixture.y > 0 or fixture.x + dimension > self._stock_width or \
+                        -fixture.y + dimension > self._stock_height:
+                    raise ValueError('Code at fixture X{} Y{} exceeds the stock'.format(fixture.x, fixture.y))
+            return self._fixtures[:len(paths)]
+
+        if not paths:
+            return []
+        cell = max(dimensions) + self._gap
+        columns = int((self._stock_width - 2 * self._margin + self._gap) // cell)
+        rows = ceil(len(paths) / columns) if columns else 0
+        if not columns or rows * cell - self._gap > self._stock_height - 2 * self._margin:
+            raise ValueError('{} codes of {} mm do not fit on {} x {} mm stock'.format(
+                len(paths), round(max(dimensions), 3), self._stock_width, self._stock_height))
+        return [Point(self._margin + (index % columns) * cell, -(self._margin + (index // columns) * cell))
+                for index in range(len(paths))]
+
+    def _order(self, codes):
+        """Orders codes by nearest neighbour, starting from XY zero.
+        :returns a new list of MachinifyVector objects"""
+        remaining = list(codes)
+        ordered = []
+        position = (self._xy_zero.x, self._xy_zero.y)
+        while remaining:
+            starts = [self._get_start_mm(code) for code in remaining]
+            distances = [(start[0] - position[0]) ** 2 + (start[1] - position[1]) ** 2 for start in starts]
+            code = remaining.pop(distances.index(min(distances)))
+            ordered.append(code)
+            position = self._get_end_mm(code)
+        return ordered
+
+    def _get_start_mm(self, code):
+        """:returns tuple: the machine position in mm of the first segment of a code"""
+        return self._to_mm(code, self._get_segments(code)[0][0].position, 0, 0)
+
+    def _get_end_mm(self, code):
+        """:returns tuple: the machine position in mm of the end of the last segment of a code"""
+        last = self._get_segments(code)[-1][-1]
+        return self._to_mm(code, last.position, last.x_length, last.y_length)
+
+    def _get_segments(self, code):
+        """:returns a list of lists of LineSegments in the order the code's program cuts them: the linked polylines
+        with stay-down, else one list of the planned segments"""
+        if self._stay_down:
+            return code._get_polylines()
+        return [code._qr_path.get_vectors()]
+
+    def _to_mm(self, code, position, x_length, y_length):
+        step = self._get_xy_move_per_step()
+        return tuple((round((position.x + x_length) * step + code._xy_zero.x, 3),
+                      round(-(position.y + y_length) * step + code._xy_zero.y, 3)))
@@ -0,0 +1,28 @@
+from src.platform.postprocessor.post_processor import PostProcessor
+from src.platform.postprocessor.grbl import GrblPostProcessor
+from src.platform.postprocessor.linuxcnc import LinuxCncPostProcessor
+from src.platform.postprocessor.fanuc import FanucPostProcessor
+
+
+class PostDialect:
+    DEFAULT = 0
+    GRBL = 1
+    LINUXCNC = 2
+    FANUC = 3
+
+
+_POST_PROCESSORS = {PostDialect.DEFAULT: PostProcessor,
+                    PostDialect.GRBL: GrblPostProcessor,
+                    PostDialect.LINUXCNC: LinuxCncPostProcessor,
+                    PostDialect.FANUC: FanucPostProcessor}
+
+
+def make_post_processor(dialect=PostDialect.DEFAULT, **options):
+    """Creates the post-processor of a controller dialect.
+    :param dialect: a PostDialect value
+    :param options: keyword arguments of the dialect's post-processor, e.g. strip_comments=True
+    :returns a PostProcessor object
+    :raises ValueError for unknown dialects"""
+    if dialect not in _POST_PROCESSORS:
+        raise ValueError('Unknown post-processor dialect {}'.format(dialect))
+    return _POST_PROCESSORS[dialect](**options)
@@ -0,0 +1,54 @@
+from src.platform.gcode_emitter import CannedCycleEmitter
+from src.platform.subprogram import SubprogramDialect
+from src.platform.postprocessor.post_processor import PostProcessor
+
+
+class FanucPostProcessor(PostProcessor):
+    """Fanuc-style controllers read the program between % lines, starting with a program number. Numbers without
+    decimal point count in the least input increment (usually micrometres), so every coordinate has one, and numbers
+    are never written with an exponent. Comments are upper case. Subprograms are called with M98, single modules are
+    cut with G81 canned cycles unless canned_cycles is False.
+    The M98 subprograms (O1001, O1002, ...) are written after M30 in the same file. Many controls only accept one
+    program per file and need them loaded as separate programs."""
+
+    file_extension = '.nc'
+    subprogram_dialects = (SubprogramDialect.NONE, SubprogramDialect.M98)
+
+    def __init__(self, strip_comments=False, canned_cycles=True, program_number=1):
+        super().__init__(strip_comments)
+        self._canned_cycles = canned_cycles
+        self._program_number = program_number
+
+    def number(self, value):
+        """Formats with up to four decimals and always a decimal point, e.g. 3. or -0.4"""
+        text = '{:.4f}'.format(value).rstrip('0')
+        if text == '-0.':
+            return '0.'
+        return text
+
+    def comment(self, text):
+        return super().comment(text.upper().replace('(', '').replace(')', ''))
+
+    def message(self, text):
+        return self.comment(text)
+
+    def tool_change(self, tool):
+        return 'T' + str(tool.number) + ' M06\n'
+
+    def prologue(self, project_name):
+        program = 'O{:04d}'.format(self._program_number)
+        if self._strip_comments:
+            return '%\n' + program + '\n'
+        return '%\n' + program + ' ' + self.comment(project_name)
+
+    def epilogue(self):
+        return '%\n'
+
+    def prepare(self, tool, engrave_params, xy_zero):
+        return 'G17 G21 G40 G49 G80 ' + super().prepare(tool, engrave_params, xy_zero)
+
+    def make_emitter(self, size, tool_step, xy_zero, engrave_params, tool, compact=False):
+        emitter = super().make_emitter(size, tool_step, xy_zero, engrave_params, tool, compact)
+        if self._canned_cycles:
+            return CannedCycleEmitter(emitter, engrave_params, tool, self.number)
+        return emitter
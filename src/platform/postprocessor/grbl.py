@@ -0,0 +1,38 @@
+from src.platform.subprogram import SubprogramDialect
+from src.platform.postprocessor.post_processor import PostProcessor
+
+
+class GrblPostProcessor(PostProcessor):
+    """GRBL reads at most 80 characters per line and knows neither MSG, tool changes, subprograms, nor canned
+    cycles. Programs are streamed over a serial line, so trailing spaces and empty lines are left out, and long
+    comments are shortened to fit. The tool to insert is named in a comment."""
+
+    file_extension = '.nc'
+    subprogram_dialects = (SubprogramDialect.NONE,)
+    max_line_length = 80  # GRBL's line buffer, including the line break
+
+    def comment(self, text):
+        if self._strip_comments:
+            return ''
+        text = text.replace('(', '').replace(')', '')  # GRBL does not allow nested comments
+        return '(' + text[:self.max_line_length - 3] + ')\n'
+
+    def blank(self):
+        return ''
+
+    def message(self, text):
+        return self.comment(text)
+
+    def tool_change(self, tool):
+        return ''
+
+    def prepare(self, tool, engrave_params, xy_zero):
+        return 'G21 ' + _strip_spaces(super().prepare(tool, engrave_params, xy_zero))
+
+    def finalize(self, engrave_params):
+        return _strip_spaces(super().finalize(engrave_params))
+
+
+def _strip_spaces(text):
+    """:returns the lines of text without trailing spaces"""
+    return text.replace(' \n', '\n')
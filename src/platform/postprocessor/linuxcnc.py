@@ -0,0 +1,30 @@
+from src.platform.gcode_emitter import CannedCycleEmitter
+from src.platform.subprogram import SubprogramDialect
+from src.platform.postprocessor.post_processor import PostProcessor
+
+
+class LinuxCncPostProcessor(PostProcessor):
+    """LinuxCNC shows (MSG, ...) comments to the operator, calls subprograms with o-words, and cuts single modules
+    with G81 canned cycles unless canned_cycles is False."""
+
+    file_extension = '.ngc'
+    subprogram_dialects = (SubprogramDialect.NONE, SubprogramDialect.O_CALL)
+
+    def __init__(self, strip_comments=False, canned_cycles=True):
+        super().__init__(strip_comments)
+        self._canned_cycles = canned_cycles
+
+    def message(self, text):
+        return '(MSG, ' + text + ')\n'
+
+    def tool_change(self, tool):
+        return 'T' + str(tool.number) + ' M06\n'
+
+    def prepare(self, tool, engrave_params, xy_zero):
+        return 'G21 G94 ' + super().prepare(tool, engrave_params, xy_zero)
+
+    def make_emitter(self, size, tool_step, xy_zero, engrave_params, tool, compact=False):
+        emitter = super().make_emitter(size, tool_step, xy_zero, engrave_params, tool, compact)
+        if self._canned_cycles:
+            return CannedCycleEmitter(emitter, engrave_params, tool, self.number)
+        return emitter
@@ -0,0 +1,98 @@
+from src.platform.gcode_emitter import GcodeEmitter, CompactGcodeEmitter, SubprogramEmitter
+from src.platform.subprogram import SubprogramDialect
+
+
+class PostProcessor:
+    """Writes the G-code dialect QR-codengrave has always written: .tap files, MSG tool messages, and T.. M06 tool
+    changes. Post-processors for other controllers derive from it and override what their dialect does differently.
+    The engrave block is assembled by an emitter that formats all of a job's words once, in the dialect's number
+    format. A PostProcessor holds no job state, so one instance can serve any number of jobs."""
+
+    file_extension = '.tap'
+    subprogram_dialects = (SubprogramDialect.NONE, SubprogramDialect.M98, SubprogramDialect.O_CALL)
+
+    def __init__(self, strip_comments=False):
+        self._strip_comments = strip_comments  # leave out comments and empty lines, e.g. to speed up streaming
+
+    def get_file_extension(self):
+        return self.file_extension
+
+    def supports_subprograms(self, dialect):
+        """:returns True if the controller understands the SubprogramDialect value"""
+        return dialect in self.subprogram_dialects
+
+    def number(self, value):
+        """Formats a coordinate or Z height.
+        :returns a String object"""
+        return str(value)
+
+    def comment(self, text):
+        """:returns a comment line, or an empty string if comments are stripped"""
+        if self._strip_comments:
+            return ''
+        return '(' + text + ')\n'
+
+    def blank(self):
+        """:returns an empty line that structures the program, or an empty string if comments are stripped"""
+        if self._strip_comments:
+            return ''
+        return '\n'
+
+    def message(self, text):
+        """:returns a line that shows a message to the operator"""
+        return 'MSG "' + text + '"\n'
+
+    def tool_change(self, tool):
+        """:returns the lines that select and change to a tool"""
+        return 'T' + str(tool.number) + ' M06 \n'
+
+    def prologue(self, project_name):
+        """:returns what has to precede everything else in the file"""
+        return ''
+
+    def epilogue(self):
+        """:returns what has to follow everything else in the file, subprograms included"""
+        return ''
+
+    def header(self, project_name, version, job_duration, tool):
+        """Creates human-readable comments to identify project information.
+        :returns header: a String object"""
+        header = self.comment('Project: QR-codengrave_' + project_name)
+        header += self.comment('Created with Schallbert\'s QR-codengrave Version ' + str(version))
+        header += self.comment('Job duration ca. ' + str(job_duration)) + self.blank()
+        header += self.comment('Required tool: ' + tool.get_description()) + self.blank()
+        return header
+
+    def prepare(self, tool, engrave_params, xy_zero):
+        """Initializes the CNC with the correct tool and spindle speed and moves to the QR-code's position.
+        :returns prepare: a String object"""
+        prepare = 'G90 \n'  # Set absolute coordinates (modal)
+        prepare += self.message('Tool: ' + tool.get_description())  # Tool message for user
+        prepare += self.tool_change(tool)
+        prepare += 'M03 S' + str(tool.speed) + '\n'  # Set spindle speed
+
+        prepare += 'G00 Z' + self.number(engrave_params.z_flyover) + '\n' + self.blank()  # Go to flyover height
+        prepare += 'G00 Y0 X0 \n'  # Go to workpiece XY0
+        prepare += 'G00 X' + self.number(xy_zero.x) + ' Y' + \
+                   self.number(xy_zero.y) + ' \n'  # Go to QR-code begin position
+        prepare += 'G00 Z' + self.number(engrave_params.z_hover) + '\n' + self.blank()  # Go to hover Z height
+        return prepare
+
+    def finalize(self, engrave_params):
+        """Stops the spindle, returns to workpiece zero, and ends the program.
+        :returns finalize, a String object"""
+        finalize = self.blank() + 'M05 \n'  # Spindle Stop
+        finalize += 'G00 Z' + self.number(engrave_params.z_flyover) + '\n'  # Go to flyover height
+        finalize += 'G00 Y0 X0 \n'  # Go to workpiece XY0
+        finalize += 'M30 \n'  # End of Program
+        return finalize
+
+    def make_emitter(self, size, tool_step, xy_zero, engrave_params, tool, compact=False):
+        """:returns a GcodeEmitter, or an object with the same methods, that writes the engrave block"""
+        if compact:
+            return CompactGcodeEmitter(size, tool_step, xy_zero, engrave_params, tool, self.number)
+        return GcodeEmitter(size, tool_step, xy_zero, engrave_params, tool, self.number)
+
+    def make_subprogram_emitter(self, tool_step, engrave_params, tool, dialect):
+        """:returns a SubprogramEmitter for the dialect"""
+        return SubprogramEmitter(tool_step, engrave_params, tool, dialect, self.number)
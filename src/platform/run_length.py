@@ -0,0 +1,88 @@
+import numpy as np
+
+from src.platform.vectorize_helper import Point, LineSegment
+
+
+def vertical_run_ends(table):
+    """Helper function. Finds, for every dark module, the row index where its vertical run of dark modules ends.
+    :param table: a square numpy bool matrix indexed [y, x]
+    :returns an int matrix of the same shape. Values for light modules are meaningless."""
+    size = table.shape[0]
+    is_end = table.copy()
+    is_end[:-1] &= ~table[1:]
+    rows = np.arange(size).reshape(size, 1)
+    end_rows = np.where(is_end, rows, size)
+    return np.minimum.accumulate(end_rows[::-1], axis=0)[::-1]
+
+
+def find_runs(line):
+    """Helper function. Detects runs of True values in a 1-D bool array.
+    :param line: a numpy bool array
+    :returns starts, ends: int arrays with the first and last index (inclusive) of each run"""
+    edges = np.diff(np.concatenate(([0], line.view(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1) - 1
+    return starts, ends
+
+
+class RunLengthScanner:
+    """Scans a QR-code matrix row by row like LinePath's serpentine algorithm, but detects runs of dark modules
+    in bulk with numpy instead of probing the table one module at a time. It produces exactly the same LineSegments
+    in the same order. The input matrix is not modified."""
+
+    def __init__(self, table):
+        self._table = table
+        self._size = table.shape[0]
+        self._run_ends = vertical_run_ends(table)
+        # Last row cleared by a vertical segment per column, -1 if none.
+        self._blocked = np.full(self._size, -1)
+
+    def scan_row(self, row):
+        """Scans one row. Rows have to be scanned in ascending order as vertical segments clear rows below.
+        Uneven rows are scanned right-to-left.
+        :param row: the row in the QR-code to analyze
+        :returns a list of LineSegments"""
+        if row >= self._size:
+            return []
+        todo = self._table[row] & (self._blocked < row)
+        y_lengths = self._run_ends[row] - row
+        reverse = row % 2 == 1
+        if reverse:
+            todo = todo[::-1]
+            y_lengths = y_lengths[::-1]
+        starts, ends = find_runs(todo)
+        if not len(starts):
+            return []
+
+        # A module gets a horizontal segment as soon as the remaining run to the right is at least as long as
+        # the vertical run below it. All modules of a run before that one get vertical segments.
+        run_lengths = ends - starts + 1
+        index = np.arange(self._size)
+        run_end_of = np.zeros(self._size, dtype=int)
+        run_end_of[todo] = np.repeat(ends, run_lengths)
+        prefers_horizontal = np.flatnonzero(todo & (run_end_of - index >= y_lengths))
+        first = np.searchsorted(prefers_horizontal, starts)
+        first = np.append(prefers_horizontal, self._size)[first]
+        turn = np.minimum(first, ends + 1)
+
+        turn_of = np.zeros(self._size, dtype=int)
+        turn_of[todo] = np.repeat(turn, run_lengths)
+        vertical = np.flatnonzero(todo & (index < turn_of))
+        has_horizontal = turn <= ends
+        horizontal = turn[has_horizontal]
+        horizontal_lengths = (ends - turn)[has_horizontal]
+
+        positions = np.concatenate((vertical, horizontal))
+        order = np.argsort(positions, kind='stable')
+        positions = positions[order]
+        y_lengths = np.concatenate((y_lengths[vertical], np.zeros(len(horizontal), dtype=int)))[order]
+        x_lengths = np.concatenate((np.zeros(len(vertical), dtype=int), horizontal_lengths))[order]
+
+        if reverse:
+            positions = self._size - 1 - positions
+            vertical = self._size - 1 - vertical
+            x_lengths = -x_lengths
+        self._blocked[vertical] = self._run_ends[row, vertical]
+
+        return [LineSegment(x_length, y_length, Point(x, row)) for x_length, y_length, x in
+                zip(x_lengths.tolist(), y_lengths.tolist(), positions.tolist())]
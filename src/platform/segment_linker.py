@@ -0,0 +1,103 @@
+import numpy as np
+
+from src.platform.vectorize_helper import Point, LineSegment
+
+
+class SegmentLinker:
+    """Joins LineSegments into polylines that are engraved without lifting the tool. A segment is linked to the one
+    before if the straight move between them only crosses modules that get engraved anyway: all modules of the
+    rectangle spanned by the previous segment's end and the next segment's start have to be dark."""
+
+    def __init__(self, qr_value_table, search_radius=3):
+        self._table = qr_value_table.table
+        self._search_radius = search_radius
+
+    def is_linkable(self, end_x, end_y, start_x, start_y):
+        """Checks whether the tool may stay down while moving from a segment's end to the next segment's start.
+        :returns True if all modules the move crosses are dark"""
+        return bool(self._table[min(end_y, start_y):max(end_y, start_y) + 1,
+                                min(end_x, start_x):max(end_x, start_x) + 1].all())
+
+    def chain(self, segments):
+        """Reorders segments so that as many of them as possible can be linked. After each segment, the closest
+        unvisited segment within the search radius that can be linked to is cut next. If there is none, the tool
+        lifts and travels to the closest unvisited segment. Segments are reversed where their end is reached first.
+        :param segments: a list of LineSegments
+        :returns a new list of LineSegments, reversed segments are new objects"""
+        ends = {}  # module position -> list of (segment index, True if the position is the segment's end)
+        for index, segment in enumerate(segments):
+            start = (segment.position.x, segment.position.y)
+            end = (start[0] + segment.x_length, start[1] + segment.y_length)
+            ends.setdefault(start, []).append((index, False))
+            if end != start:
+                ends.setdefault(end, []).append((index, True))
+
+        offsets = sorted(((dx, dy) for dy in range(-self._search_radius, self._search_radius + 1)
+                          for dx in range(-self._search_radius, self._search_radius + 1)),
+                         key=lambda offset: abs(offset[0]) + abs(offset[1]))
+        visited = [False] * len(segments)
+        chained = []
+        xs = np.array([segment.position.x for segment in segments] +
+                      [segment.position.x + segment.x_length for segment in segments], dtype=float)
+        ys = np.array([segment.position.y for segment in segments] +
+                      [segment.position.y + segment.y_length for segment in segments], dtype=float)
+        unvisited = np.ones(2 * len(segments), dtype=bool)
+        position = None
+        while len(chained) < len(segments):
+            pick = None
+            if position is not None:
+                pick = self._find_linkable(position, offsets, ends, visited)
+            if pick is None:
+                pick = self._find_nearest(position, xs, ys, unvisited)
+            index, reverse = pick
+            visited[index] = True
+            unvisited[index] = unvisited[index + len(segments)] = False
+            segment = segments[index]
+            if reverse:
+                segment = LineSegment(-segment.x_length, -segment.y_length,
+                                      Point(segment.position.x + segment.x_length,
+                                            segment.position.y + segment.y_length))
+            chained.append(segment)
+            position = (segment.position.x + segment.x_length, segment.position.y + segment.y_length)
+        return chained
+
+    def iter_polylines(self, segments):
+        """Groups consecutive segments into polylines without changing their order.
+        A generator: polylines are delivered as soon as they are complete.
+        :param segments: an iterable of LineSegments in machining order
+        :returns yields lists of LineSegments"""
+        polyline = []
+        end_x = end_y = 0
+        for segment in segments:
+            if polyline and not self.is_linkable(end_x, end_y, segment.position.x, segment.position.y):
+                yield polyline
+                polyline = []
+            polyline.append(segment)
+            end_x = segment.position.x + segment.x_length
+            end_y = segment.position.y + segment.y_length
+        if polyline:
+            yield polyline
+
+    def link(self, segments):
+        """Reorders segments by chain() and groups them into polylines.
+        :returns a list of polylines, each one a list of LineSegments"""
+        return list(self.iter_polylines(self.chain(list(segments))))
+
+    def _find_nearest(self, position, xs, ys, unvisited):
+        """:returns tuple: (segment index, reverse) of the unvisited segment with the closest start or end"""
+        if position is None:
+            position = (0, 0)
+        distance = np.square(xs - position[0]) + np.square(ys - position[1])
+        distance[~unvisited] = np.inf
+        best = int(distance.argmin())
+        count = len(xs) // 2
+        return best % count, best >= count
+
+    def _find_linkable(self, position, offsets, ends, visited):
+        """:returns tuple: (segment index, reverse) of the closest linkable unvisited segment, or None"""
+        x, y = position
+        for dx, dy in offsets:
+            for index, reverse in ends.get((x + dx, y + dy), ()):
+                if not visited[index] and self.is_linkable(x, y, x + dx, y + dy):
+                    return index, reverse
+        return None
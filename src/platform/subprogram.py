@@ -0,0 +1,169 @@
+from collections import OrderedDict
+
+from src.platform.vectorize_helper import Point, LineSegment, QrValueTable
+from src.platform.line_path import LinePath, Strategy
+from src.platform.segment_linker import SegmentLinker
+
+FINDER_WIDTH = 7
+ALIGNMENT_WIDTH = 5
+
+
+class SubprogramDialect:
+    """Enum class associating a subprogram call syntax with a number"""
+    NONE = 0  # everything is expanded inline
+    M98 = 1  # O<n> program appended after M30, ended by M99, called with M98 P<n> (Fanuc, Mach3)
+    O_CALL = 2  # o<n> sub / o<n> endsub defined before the program, called with o<n> call (LinuxCNC)
+
+
+def function_pattern_regions(size):
+    """Lists the square regions a QR-code of the given size holds finder and alignment patterns in.
+    :param size: the number of modules per side
+    :returns a list of (x, y, width) tuples of the regions' top left module, empty if size is no QR-code size"""
+    if size < 21 or size > 177 or (size - 17) % 4:
+        return []
+    regions = [(0, 0, FINDER_WIDTH), (size - FINDER_WIDTH, 0, FINDER_WIDTH), (0, size - FINDER_WIDTH, FINDER_WIDTH)]
+    centers = _alignment_pattern_positions((size - 17) // 4, size)
+    last = len(centers) - 1
+    for row, y in enumerate(centers):
+        for column, x in enumerate(centers):
+            if (row, column) in ((0, 0), (0, last), (last, 0)):
+                continue  # covered by a finder pattern
+            regions.append((x - ALIGNMENT_WIDTH // 2, y - ALIGNMENT_WIDTH // 2, ALIGNMENT_WIDTH))
+    return regions
+
+
+def _alignment_pattern_positions(version, size):
+    """:returns the ascending center coordinates of alignment patterns, as defined by ISO/IEC 18004"""
+    if version == 1:
+        return []
+    count = version // 7 + 2
+    step = (version * 8 + count * 3 + 5) // (count * 4 - 4) * 2
+    return [6] + sorted(size - 7 - index * step for index in range(count - 1))
+
+
+class Cluster:
+    """POD container class representing a group of identical square regions of a QR-code. The regions' segments are
+    held once, relative to the region's top left module, as a list of polylines."""
+
+    def __init__(self, number, width, origins, polylines):
+        self.number = number  # subprogram number
+        self.width = width
+        self.origins = origins  # list of Points, top left module of each region
+        self.polylines = polylines
+
+
+class SubprogramCall:
+    """POD container class representing a call of a cluster's subprogram at one of its regions."""
+
+    def __init__(self, cluster, origin):
+        self.cluster = cluster
+        self.origin = origin
+
+    def get_start(self):
+        """:returns the Point in QR-code modules where the subprogram starts cutting"""
+        start = self.cluster.polylines[0][0].position
+        return Point(self.origin.x + start.x, self.origin.y + start.y)
+
+
+class SubprogramPlanner:
+    """Detects finder and alignment patterns that are repeated throughout a QR-code and plans them once as clusters.
+    The rest of the QR-code is planned with those regions masked out. Calls to the clusters' subprograms are inserted
+    into the main path after the polyline that ends closest to the call."""
+
+    _first_number = 1001
+
+    def __init__(self, qr_value_table, strategy=Strategy.SERPENTINE, optimizer=None, stay_down=False):
+        self._table = qr_value_table
+        self._strategy = strategy
+        self._optimizer = optimizer
+        self._stay_down = stay_down
+        self._clusters = None
+        self._items = None
+
+    def get_clusters(self):
+        """Getter function.
+        :returns a list of Cluster objects, empty if no region is repeated"""
+        if self._clusters is None:
+            self._plan()
+        return self._clusters
+
+    def get_items(self):
+        """Getter function.
+        :returns the main program in machining order: a list of polylines (lists of LineSegments) and
+        SubprogramCall objects"""
+        if self._items is None:
+            self._plan()
+        return self._items
+
+    def get_expanded_polylines(self):
+        """:returns all polylines in machining order, with calls replaced by their regions' polylines"""
+        polylines = []
+        for item in self.get_items():
+            if isinstance(item, SubprogramCall):
+                for polyline in item.cluster.polylines:
+                    polylines.append([LineSegment(segment.x_length, segment.y_length,
+                                                  Point(segment.position.x + item.origin.x,
+                                                        segment.position.y + item.origin.y))
+                                      for segment in polyline])
+            else:
+                polylines.append(item)
+        return polylines
+
+    def get_expanded_segments(self):
+        """:returns all segments in machining order, with calls replaced by their regions' segments"""
+        return [segment for polyline in self.get_expanded_polylines() for segment in polyline]
+
+    def get_plunge_count(self):
+        """:returns how often the tool is lowered into the workpiece, subprogram calls included"""
+        return sum(len(item.cluster.polylines) if isinstance(item, SubprogramCall) else 1 for item in self.get_items())
+
+    def _plan(self):
+        groups = OrderedDict()  # (width, module content) -> list of origins
+        for x, y, width in function_pattern_regions(self._table.size):
+            content = self._table.table[y:y + width, x:x + width]
+            groups.setdefault((width, content.tobytes()), []).append(Point(x, y))
+
+        self._clusters = []
+        masked = self._table.copy()
+        for (width, _), origins in groups.items():
+            if len(origins) < 2:
+                continue
+            crop = QrValueTable(width)
+            crop.table = self._table.table[origins[0].y:origins[0].y + width, origins[0].x:origins[0].x + width].copy()
+            polylines = self._make_polylines(crop, LinePath(crop, self._strategy).get_vectors())
+            if not polylines:
+                continue
+            for origin in origins:
+                masked.table[origin.y:origin.y + width, origin.x:origin.x + width] = False
+            self._clusters.append(Cluster(self._first_number + len(self._clusters), width, origins, polylines))
+
+        polylines = self._make_polylines(masked, LinePath(masked, self._strategy, self._optimizer).get_vectors())
+        self._items = self._insert_calls(polylines)
+
+    def _make_polylines(self, table, segments):
+        if self._stay_down:
+            return SegmentLinker(table).link(segments)
+        return [[segment] for segment in segments]
+
+    def _insert_calls(self, polylines):
+        """Puts each call behind the polyline whose end is closest to the call's start.
+        :returns a list of polylines and SubprogramCall objects"""
+        ends = [Point(polyline[-1].position.x + polyline[-1].x_length, polyline[-1].position.y + polyline[-1].y_length)
+                for polyline in polylines]
+        following = [[] for _ in range(len(polylines) + 1)]  # calls to insert behind polyline index - 1
+        for cluster in self._clusters:
+            for origin in cluster.origins:
+                call = SubprogramCall(cluster, origin)
+                start = call.get_start()
+                distances = [(end.x - start.x) ** 2 + (end.y - start.y) ** 2 for end in ends]
+                index = distances.index(min(distances)) + 1 if distances else 0
+                following[index].append(call)
+
+        items = list(following[0])
+        for polyline, calls in zip(polylines, following[1:]):
+            items.append(polyline)
+            end = Point(polyline[-1].position.x + polyline[-1].x_length,
+                        polyline[-1].position.y + polyline[-1].y_length)
+            items.extend(sorted(calls, key=lambda call: (call.get_start().x - end.x) ** 2 +
+                                                        (call.get_start().y - end.y) ** 2))
+        return items
@@ -0,0 +1,139 @@
+from collections import OrderedDict
+
+import numpy as np
+from qrcodegen import QrCode, QrSegment
+
+from src.platform.vectorize_helper import QrValueTable, LineSegment
+from src.platform.line_path import LinePath, Strategy
+from src.platform.subprogram import function_pattern_regions
+
+_TEMPLATE_CACHE_SIZE = 16
+_template_cache = OrderedDict()  # (version, ecc ordinal, mask, strategy) -> SerialTemplate, least recently used first
+
+
+def function_module_mask(version):
+    """Marks the modules every QR-code of a version has in common, given the same error correction level and mask:
+    finder patterns with their separators and the format information next to them, timing patterns, alignment
+    patterns, and the version information.
+    :returns a size x size numpy bool array indexed [y, x], True for function modules"""
+    size = version * 4 + 17
+    mask = np.zeros((size, size), dtype=bool)
+    mask[6, :] = True  # timing patterns
+    mask[:, 6] = True
+    mask[:9, :9] = True  # finder patterns, separators, format information
+    mask[:9, size - 8:] = True
+    mask[size - 8:, :9] = True
+    for x, y, width in function_pattern_regions(size):
+        mask[y:y + width, x:x + width] = True
+    if version >= 7:  # version information
+        mask[:6, size - 11:size - 8] = True
+        mask[size - 11:size - 8, :6] = True
+    return mask
+
+
+def get_template(version, ecc, mask, strategy=Strategy.RUN_LENGTH):
+    """Returns the template for a version, error correction level, mask, and strategy, creating it on first use.
+    Templates are kept in a small memo shared by all callers.
+    :returns a SerialTemplate object"""
+    key = (version, ecc.ordinal, mask, strategy)
+    template = _template_cache.get(key)
+    if template is None:
+        template = SerialTemplate(version, ecc, mask, strategy)
+        _template_cache[key] = template
+        while len(_template_cache) > _TEMPLATE_CACHE_SIZE:
+            _template_cache.popitem(last=False)
+    else:
+        _template_cache.move_to_end(key)
+    return template
+
+
+def _join_runs(segments):
+    """Joins horizontal segments that continue each other within a row, as split at the border of the function
+    modules.
+    :returns a new list of LineSegments"""
+    joined = []
+    for segment in segments:
+        if joined:
+            last = joined[-1]
+            if segment.y_length == 0 and last.y_length == 0 and segment.position.y == last.position.y:
+                direction = -1 if last.x_length < 0 or segment.x_length < 0 else 1
+                if segment.position.x == last.position.x + last.x_length + direction and \
+                        segment.x_length * direction >= 0 and last.x_length * direction >= 0:
+                    joined[-1] = LineSegment(last.x_length + segment.x_length + direction, 0, last.position)
+                    continue
+        joined.append(segment)
+    return joined
+
+
+class SerialTemplate:
+    """Plans series of QR-codes that share version, error correction level, and mask, e.g. serial number labels.
+    Such codes only differ in their data region: the function modules are planned once, with the first code, and
+    only the data region is planned per code. Encoding with a fixed version and mask also skips the encoder's search
+    for the best mask. Runs that cross from function modules into the data region are split in two."""
+
+    def __init__(self, version, ecc, mask, strategy=Strategy.RUN_LENGTH):
+        self._version = version
+        self._ecc = ecc
+        self._mask = mask
+        self._strategy = strategy
+        self._function = function_module_mask(version)
+        self._fixed_modules = None  # values of the function modules
+        self._fixed_segments = None
+        self._planned = 0
+
+    def get_version(self):
+        return self._version
+
+    def get_mask(self):
+        return self._mask
+
+    def get_strategy(self):
+        return self._strategy
+
+    def get_planned_count(self):
+        """Getter function.
+        :returns the number of codes planned with this template"""
+        return self._planned
+
+    def get_fixed_segments(self):
+        """Getter function.
+        :returns the segments of the function modules, or None before the first code has been planned"""
+        return self._fixed_segments
+
+    def encode(self, text):
+        """Encodes a text with the template's version, error correction level, and mask.
+        :param text: the String object to encode
+        :returns a QrCode object
+        :raises ValueError if the text does not fit the template's version"""
+        return QrCode.encode_segments(QrSegment.make_segments(text), self._ecc, minversion=self._version,
+                                      maxversion=self._version, mask=self._mask, boostecl=False)
+
+    def make_path(self, qr):
+        """Plans a QR-code of the template's version, error correction level, and mask.
+        :param qr: a QrCode object, e.g. from encode()
+        :returns a LinePath object whose vectors are available without planning"""
+        if qr.get_version() != self._version or qr.get_mask() != self._mask or \
+                qr.get_error_correction_level().ordinal != self._ecc.ordinal:
+            raise ValueError('QR-code does not match the template')
+        table = QrValueTable()
+        table.set_qr(qr)
+        fixed = table.table[self._function]
+        if self._fixed_segments is None:
+            self._fixed_modules = fixed
+            fixed_table = table.copy()
+            fixed_table.table &= self._function
+            self._fixed_segments = LinePath(fixed_table, self._strategy).get_vectors()
+        elif not np.array_equal(fixed, self._fixed_modules):
+            raise ValueError('QR-code function modules do not match the template')
+
+        variable_table = table.copy()
+        variable_table.table &= ~self._function
+        variable_segments = LinePath(variable_table, self._strategy).get_vectors(memoize=False)  # unique per code
+        segments = list(self._fixed_segments) + list(variable_segments)
+        # Back into serpentine order: rows top to bottom, even rows left to right, odd rows right to left
+        segments.sort(key=lambda segment: (segment.position.y,
+                                           -segment.position.x if segment.position.y % 2 else segment.position.x))
+        path = LinePath(table, self._strategy)
+        path.preload(_join_runs(segments), memoize=False)
+        self._planned += 1
+        return path
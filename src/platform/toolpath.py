@@ -0,0 +1,79 @@
+import numpy as np
+
+from src.platform.vectorize_helper import Point, LineSegment
+
+TOOLPATH_DTYPE = np.dtype([('x', np.int16), ('y', np.int16), ('dx', np.int16), ('dy', np.int16)])
+
+
+class Toolpath:
+    """Compact container for LineSegments in machining order. Segments are held in one structured int16 array of
+    start position (x, y) and length (dx, dy), 8 bytes per segment. Offers vectorized path metrics and yields
+    LineSegment objects for callers that expect them."""
+
+    def __init__(self, data=None):
+        if data is None:
+            data = np.empty(0, dtype=TOOLPATH_DTYPE)
+        self._data = data
+
+    @classmethod
+    def from_segments(cls, segments):
+        """Creates a Toolpath from LineSegments.
+        :param segments: an iterable of LineSegment objects
+        :returns a Toolpath object"""
+        flat = [value for segment in segments
+                for value in (segment.position.x, segment.position.y, segment.x_length, segment.y_length)]
+        return cls(np.array(flat, dtype=np.int16).view(TOOLPATH_DTYPE))
+
+    def __len__(self):
+        return len(self._data)
+
+    def __getitem__(self, index):
+        x, y, dx, dy = self._data[index].tolist()
+        return LineSegment(dx, dy, Point(x, y))
+
+    def __iter__(self):
+        for x, y, dx, dy in self._data.tolist():
+            yield LineSegment(dx, dy, Point(x, y))
+
+    def get_array(self):
+        """Getter function.
+        :returns the structured numpy array with fields x, y, dx, dy"""
+        return self._data
+
+    def get_starts(self):
+        """:returns an (n, 2) int array of segment start positions"""
+        return np.stack((self._data['x'], self._data['y']), axis=1).astype(int)
+
+    def get_ends(self):
+        """:returns an (n, 2) int array of segment end positions"""
+        return self.get_starts() + np.stack((self._data['dx'], self._data['dy']), axis=1)
+
+    def get_cut_lengths(self):
+        """:returns an int array holding each segment's length in modules"""
+        return np.abs(self._data['dx'].astype(int)) + np.abs(self._data['dy'].astype(int))
+
+    def get_travel_lengths(self, start=Point(0, 0)):
+        """Calculates the rapid moves needed to reach each segment from the end of the one before.
+        :param start: the Point the tool starts from
+        :returns a float array holding each move's length in modules"""
+        if not len(self._data):
+            return np.zeros(0)
+        previous_ends = np.vstack(([start.x, start.y], self.get_ends()[:-1]))
+        delta = self.get_starts() - previous_ends
+        return np.hypot(delta[:, 0], delta[:, 1])
+
+    def get_cut_length(self):
+        return int(self.get_cut_lengths().sum())
+
+    def get_travel_length(self, start=Point(0, 0)):
+        return float(self.get_travel_lengths(start).sum())
+
+    def get_bounding_box(self):
+        """Calculates the area touched by the toolpath.
+        :returns tuple: min x, min y, max x, max y in modules, or None if the toolpath is empty"""
+        if not len(self._data):
+            return None
+        corners = np.vstack((self.get_starts(), self.get_ends()))
+        low = corners.min(axis=0).tolist()
+        high = corners.max(axis=0).tolist()
+        return tuple((low[0], low[1], high[0], high[1]))
@@ -0,0 +1,155 @@
+import os
+import pickle
+import tempfile
+from collections import OrderedDict
+from hashlib import sha256
+
+import numpy as np
+from qrcodegen import QrCode, QrSegment
+
+from src.platform import line_path
+from src.platform.line_path import LinePath, Strategy
+from src.platform.vectorize_helper import Point, LineSegment, QrValueTable
+
+
+class ToolpathCache:
+    """Content-addressed on-disk cache of encoded QR-code matrices and their planned segment lists.
+    Entries are keyed by text, error correction level, mask, strategy and planner version. Entries of other planner
+    versions are deleted when the cache is opened. The least recently used entries are evicted once the cache
+    exceeds its size limit."""
+
+    _suffix = '.qrp'
+
+    def __init__(self, directory, max_bytes=32 * 1024 * 1024):
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self._hits = 0
+        self._misses = 0
+        self._entries = OrderedDict()  # file name -> size in bytes, least recently used first
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def get_hits(self):
+        return self._hits
+
+    def get_misses(self):
+        return self._misses
+
+    def get_size_bytes(self):
+        return sum(self._entries.values())
+
+    def get_path(self, text, ecc=QrCode.Ecc.MEDIUM, mask=-1, strategy=Strategy.SERPENTINE):
+        """Returns a planned path for the text. Encodes and plans it on a cache miss and stores the result.
+        :param text: the String object to encode
+        :param ecc: a QrCode.Ecc error correction level
+        :param mask: the QR-code mask 0..7, or -1 to have the encoder choose
+        :param strategy: a Strategy value
+        :returns a LinePath object whose vectors are available without planning"""
+        name = self._make_name(text, ecc, mask, strategy)
+        entry = self._read(name)
+        if entry is not None:
+            self._hits += 1
+            table, segments = entry
+            path = LinePath(table, strategy)
+            path.preload(segments)
+            return path
+
+        self._misses += 1
+        qr = QrCode.encode_segments(QrSegment.make_segments(text), ecc, mask=mask)
+        table = QrValueTable()
+        table.set_qr(qr)
+        path = LinePath(table, strategy)
+        segments = path.get_vectors()
+        self._write(name, {'planner_version': line_path.PLANNER_VERSION,
+                           'size': table.size,
+                           'modules': np.packbits(table.table),
+                           'segments': np.array([[s.position.x, s.position.y, s.x_length, s.y_length]
+                                                 for s in segments], dtype=np.int16).reshape((-1, 4))})
+        return path
+
+    def clear(self):
+        """Deletes all cache entries."""
+        for name in list(self._entries):
+            self._remove(name)
+
+    def _make_name(self, text, ecc, mask, strategy):
+        key = '\n'.join((str(line_path.PLANNER_VERSION), str(ecc.ordinal), str(mask), str(strategy), text))
+        return 'v' + str(line_path.PLANNER_VERSION) + '_' + sha256(key.encode('utf-8')).hexdigest() + self._suffix
+
+    def _load_index(self):
+        """Indexes the entries found on disk by last access and deletes those of other planner versions."""
+        current = 'v' + str(line_path.PLANNER_VERSION) + '_'
+        found = []
+        for item in os.scandir(self._directory):
+            if not item.name.endswith(self._suffix):
+                continue
+            if not item.name.startswith(current):
+                self._delete_file(item.name)
+                continue
+            stat = item.stat()
+            found.append((stat.st_mtime, item.name, stat.st_size))
+        for _, name, size in sorted(found):
+            self._entries[name] = size
+
+    def _read(self, name):
+        """Reads and decodes an entry and marks it as recently used. Entries that cannot be read or decoded, e.g.
+        truncated or written by another version of the program, are deleted.
+        :returns tuple: a QrValueTable object and a list of LineSegments, or None if the entry is missing, broken,
+        or stale"""
+        if name not in self._entries:
+            return None
+        try:
+            with open(os.path.join(self._directory, name), 'rb') as file:
+                entry = pickle.load(file)
+            if entry['planner_version'] != line_path.PLANNER_VERSION:
+                raise ValueError('Stale planner version')
+            size = entry['size']
+            if len(entry['modules']) * 8 < size ** 2:
+                raise ValueError('Truncated modules')
+            table = QrValueTable(size)
+            table.table = np.unpackbits(entry['modules'], count=size ** 2).astype(bool).reshape((size, size))
+            segments = [LineSegment(x_length, y_length, Point(x, y))
+                        for x, y, x_length, y_length in entry['segments'].tolist()]
+        except Exception:
+            self._remove(name)
+            return None
+        self._entries.move_to_end(name)
+        try:
+            os.utime(os.path.join(self._directory, name))
+        except OSError:
+            pass
+        return tuple((table, segments))
+
+    def _write(self, name, entry):
+        """Writes an entry atomically and evicts least recently used entries if the cache grows too large. The
+        temporary file is unique, so processes sharing the cache do not collide. If the entry cannot be written,
+        e.g. on a full or read-only disk, it is not cached and the temporary file is removed.
+        :returns True if the entry has been written"""
+        path = os.path.join(self._directory, name)
+        temp_path = None
+        try:
+            handle, temp_path = tempfile.mkstemp(prefix='.' + name, suffix='.tmp', dir=self._directory)
+            with os.fdopen(handle, 'wb') as file:
+                pickle.dump(entry, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, path)
+            temp_path = None
+            size = os.path.getsize(path)
+        except OSError:
+            if temp_path is not None:
+                self._delete_file(os.path.basename(temp_path))
+            return False
+        self._entries[name] = size
+        self._entries.move_to_end(name)
+        while len(self._entries) > 1 and self.get_size_bytes() > self._max_bytes:
+            self._remove(next(iter(self._entries)))
+        return True
+
+    def _remove(self, name):
+        self._entries.pop(name, None)
+        self._delete_file(name)
+
+    def _delete_file(self, name):
+        try:
+            os.remove(os.path.join(self._directory, name))
+        except OSError:
+            pass
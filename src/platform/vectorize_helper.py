@@ -1,3 +1,9 @@
+from hashlib import blake2b
+from itertools import chain
+
+import numpy as np
+
+
 class Point:
     """Defines a point in the XY-plane. POD: No methods, parameters are public."""
     def __init__(self, x=0, y=0):
@@ -10,6 +16,8 @@ class Point:
 
 class LineSegment:
     """Defines a LineSegment in the XY-plane. POD: No Methods, parameters are public."""
+    __slots__ = ('x_length', 'y_length', 'position')
+
     def __init__(self, x_length, y_length, position):
         self.x_length = x_length
         self.y_length = y_length
@@ -24,14 +32,45 @@ class LineSegment:
 
 
 class QrValueTable:
-    def __init__(self):
-        self.table = {}
-        self.size = 0
+    """Holds the module values of a QR-code as a contiguous 2-D boolean matrix.
+    The matrix is indexed [y, x] (row, column), True representing a dark module."""
+    def __init__(self, size=0):
+        self.size = size
+        self.table = np.zeros((size, size), dtype=bool)
 
     def set_qr(self, qr):
-        """Takes a QR-code object and copies its values into a dictionary.
+        """Takes a QR-code object and copies its values into the boolean matrix in one go.
         :param qr: a QrCode object"""
         self.size = qr.get_size()
-        for y in range(self.size):
-            for x in range(self.size):
-                self.table[y, x] = qr.get_module(x, y)
+        # qrcodegen offers no bulk accessor, get_module() would cost a call per module. Its rows are [y][x].
+        self.table = np.fromiter(chain.from_iterable(qr._modules), dtype=bool, count=self.size * self.size).reshape(
+            (self.size, self.size))
+
+    def row(self, y):
+        """Getter function.
+        :param y: the row index
+        :returns a read-only view on the row's module values"""
+        view = self.table[y, :]
+        view.flags.writeable = False
+        return view
+
+    def column(self, x):
+        """Getter function.
+        :param x: the column index
+        :returns a read-only view on the column's module values"""
+        view = self.table[:, x]
+        view.flags.writeable = False
+        return view
+
+    def digest(self):
+        """Calculates a hash of the module values that identifies QR-codes with identical content.
+        :returns a bytes object"""
+        return blake2b(np.packbits(self.table).tobytes() + self.size.to_bytes(2, 'big'), digest_size=16).digest()
+
+    def copy(self):
+        """Creates an independent copy of the table. Copies a single memory block.
+        :returns a QrValueTable object"""
+        duplicate = QrValueTable()
+        duplicate.size = self.size
+        duplicate.table = self.table.copy()
+        return duplicate
@@ -13,3 +13,4 @@ elif sys.platform.startswith('win32'):
 
 app_image_path = asset_path + '/qruwu.png'
 app_persistence_path = asset_path + '/persistence.dat'
+app_cache_path = asset_path + '/cache'
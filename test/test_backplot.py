@@ -0,0 +1,158 @@
+import unittest
+from io import StringIO
+
+import numpy as np
+from qrcodegen import QrCode
+
+from src.platform.backplot import BackplotVerifier, BackplotReport, parse_moves
+from src.platform.line_path import LinePath, Strategy
+from src.platform.machinify_vector import MachinifyVector, Tool, EngraveParams
+from src.platform.subprogram import SubprogramDialect
+from src.platform.vectorize_helper import QrValueTable, Point
+from src.platform.postprocessor.grbl import GrblPostProcessor
+from src.platform.postprocessor.linuxcnc import LinuxCncPostProcessor
+from src.platform.postprocessor.fanuc import FanucPostProcessor
+from test.test_plate_job import make_plate
+
+
+def make_machinify(strategy=Strategy.RUN_LENGTH, text='schallbert.de'):
+    table = QrValueTable()
+    table.set_qr(QrCode.encode_text(text, QrCode.Ecc.MEDIUM))
+    machinify = MachinifyVector(1.2)
+    machinify.set_qr_path(LinePath(table, strategy))
+    machinify.set_tool(Tool(dia=1))
+    machinify.set_engrave_params(EngraveParams())
+    machinify.set_xy_zero(Point(3, -2))
+    return machinify
+
+
+def make_verifier(machinify, table=None, xy_zero=Point(3, -2)):
+    verifier = BackplotVerifier(1)
+    verifier.add_code(table or machinify._qr_path.get_table(), xy_zero)
+    return verifier
+
+
+class TestParseMoves(unittest.TestCase):
+    def test_absolute_moves(self):
+        starts, ends, rapid = parse_moves('G90\nG00 X1.5 Y-2\nG01 Z-.25 F100\nX-3. (comment)\n')
+        np.testing.assert_allclose([[0, 0, 0], [1.5, -2, 0], [1.5, -2, -0.25]], starts)
+        np.testing.assert_allclose([[1.5, -2, 0], [1.5, -2, -0.25], [-3, -2, -0.25]], ends)
+        self.assertEqual([True, False, False], list(rapid))
+
+    def test_incremental_moves(self):
+        _, ends, _ = parse_moves('G00 X1 Y1\nG91\nG01 X2\nY-0.5\nG90\nX0\n')
+        np.testing.assert_allclose([[1, 1, 0], [3, 1, 0], [3, 0.5, 0], [0, 0.5, 0]], ends)
+
+    def test_canned_cycle_drills_each_position(self):
+        starts, ends, rapid = parse_moves('G00 Z1\nG99 G81 X2 Y3 Z-0.4 R0.5 F100\nX4\nG80\nG00 Z5\n')
+        np.testing.assert_allclose([[0, 0, 1], [2, 3, 1], [2, 3, 0.5], [2, 3, -0.4], [2, 3, 0.5], [4, 3, 0.5],
+                                    [4, 3, -0.4], [4, 3, 0.5], [4, 3, 5]], ends)
+        self.assertEqual([True, True, True, False, True, True, False, True, True], list(rapid))
+        np.testing.assert_allclose([2, 3, -0.4], starts[4])
+
+    def test_m98_subprogram_is_called_after_main_program(self):
+        gcode = 'G00 X1\nM98 P1001\nG00 X5\nM30\n\nO1001\nG91\nG01 Y1\nG90\nM99\n'
+        _, ends, _ = parse_moves(gcode)
+        np.testing.assert_allclose([[1, 0, 0], [1, 1, 0], [5, 1, 0]], ends)
+
+    def test_o_call_subprogram(self):
+        gcode = 'o1001 sub\nG91\nG01 Y1\nG90\no1001 endsub\n\nG00 X1\no1001 call\no1001 call\nM30\n'
+        _, ends, _ = parse_moves(gcode)
+        np.testing.assert_allclose([[1, 0, 0], [1, 1, 0], [1, 2, 0]], ends)
+
+    def test_fanuc_program_number_and_messages_skipped(self):
+        _, ends, _ = parse_moves('%\nO0001 (NAME)\nMSG "X9"\nG00 X1.\nM30\n%\n')
+        np.testing.assert_allclose([[1, 0, 0]], ends)
+
+    def test_lines_after_program_end_ignored(self):
+        _, ends, _ = parse_moves(['G00 X1', 'M30', 'G00 X2'])
+        self.assertEqual(1, len(ends))
+
+    def test_undefined_subprogram_raises(self):
+        with self.assertRaises(ValueError):
+            parse_moves('M98 P1234\nM30\n')
+
+    def test_empty_program(self):
+        starts, ends, rapid = parse_moves('')
+        self.assertEqual((0, 3), starts.shape)
+        self.assertEqual(0, len(rapid))
+
+
+class TestBackplotVerifier(unittest.TestCase):
+    def test_generated_gcode_matches(self):
+        for strategy in (Strategy.SERPENTINE, Strategy.RUN_LENGTH):
+            machinify = make_machinify(strategy)
+            report = machinify.verify_gcode()
+            self.assertTrue(report.is_ok(), report.get_summary())
+            self.assertEqual([], report.double_cut)
+            self.assertGreater(report.cut_moves, 0)
+
+    def test_every_emitter_and_dialect_matches(self):
+        configurations = [('set_stay_down', True), ('set_compact', True),
+                          ('set_subprogram_dialect', SubprogramDialect.M98),
+                          ('set_subprogram_dialect', SubprogramDialect.O_CALL),
+                          ('set_post_processor', GrblPostProcessor()),
+                          ('set_post_processor', LinuxCncPostProcessor()),
+                          ('set_post_processor', FanucPostProcessor())]
+        for setter, value in configurations:
+            machinify = make_machinify()
+            getattr(machinify, setter)(value)
+            report = machinify.verify_gcode()
+            self.assertTrue(report.is_ok(), setter + ': ' + report.get_summary())
+
+    def test_min_plunge_crossings_are_double_cuts(self):
+        report = make_machinify(Strategy.MIN_PLUNGE).verify_gcode()
+        self.assertTrue(report.is_ok())
+        self.assertGreater(len(report.double_cut), 0)
+
+    def test_missed_and_stray_modules_reported(self):
+        machinify = make_machinify()
+        table = machinify._qr_path.get_table().copy()
+        light = tuple(np.argwhere(~table.table)[0])
+        dark = tuple(np.argwhere(table.table)[0])
+        table.table[light] = True
+        table.table[dark] = False
+        report = make_verifier(machinify, table).verify(machinify.generate_gcode().getvalue())
+        self.assertFalse(report.is_ok())
+        self.assertEqual([(0, light[1], light[0])], report.missed)
+        self.assertEqual([(0, dark[1], dark[0])], report.stray)
+
+    def test_offset_code_reports_outside_moves(self):
+        machinify = make_machinify()
+        report = make_verifier(machinify, xy_zero=Point(100, 100)).verify(machinify.generate_gcode().getvalue())
+        self.assertEqual(report.cut_moves, report.outside_moves)
+        self.assertEqual(int(machinify._qr_path.get_table().table.sum()), len(report.missed))
+
+    def test_rapid_cut_reported(self):
+        machinify = make_machinify()
+        gcode = machinify.generate_gcode().getvalue().replace('G01 X', 'G00 X', 1)
+        report = machinify.verify_gcode(gcode)
+        self.assertEqual(1, report.rapid_cuts)
+        self.assertFalse(report.is_ok())
+
+    def test_tapered_tool_width(self):
+        machinify = make_machinify()
+        machinify.set_tool(Tool(dia=3, angle=90, tip=0.2))
+        self.assertTrue(machinify.verify_gcode().is_ok())
+
+    def test_file_object_is_accepted(self):
+        machinify = make_machinify()
+        self.assertTrue(machinify.verify_gcode(StringIO(machinify.generate_gcode().getvalue())).is_ok())
+
+    def test_plate_job_matches(self):
+        plate = make_plate()
+        gcode = plate.generate_gcode().getvalue()
+        report = plate.verify_gcode(gcode)
+        self.assertTrue(report.is_ok(), report.get_summary())
+        verifier = BackplotVerifier(1)
+        for table, xy_zero in plate._get_backplot_codes()[1:]:
+            verifier.add_code(table, xy_zero)
+        self.assertGreater(verifier.verify(gcode).outside_moves, 0)
+
+    def test_report_summary(self):
+        report = BackplotReport()
+        self.assertTrue(report.is_ok())
+        report.missed.append((0, 1, 2))
+        self.assertFalse(report.is_ok())
+        self.assertEqual('1 missed, 0 stray, 0 double-cut modules, 0 cutting moves outside the codes, 0 rapid cuts',
+                         report.get_summary())
@@ -0,0 +1,114 @@
+import os
+import unittest
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from qrcodegen import QrCode
+
+from src.platform.vectorize_helper import Point
+from src.platform.machinify_vector import Tool, EngraveParams
+from src.platform.batch_planner import BatchPlanner, BatchResult, plan_item, safe_file_name
+from src.platform.postprocessor.fanuc import FanucPostProcessor
+from src.platform.template_planner import get_template
+
+
+class TestBatchPlanner(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = TemporaryDirectory()
+        self.planner_args = (Tool(), EngraveParams(), Point(0, 0), self.temp_dir.name)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_planitem_writes_gcode_file(self):
+        planner = BatchPlanner(*self.planner_args)
+        result = plan_item(3, 'schallbert.de', planner._settings)
+        self.assertTrue(result.is_ok())
+        self.assertEqual(os.path.join(self.temp_dir.name, '00003_qr_schallbert_de.tap'), result.file_path)
+        with open(result.file_path) as file:
+            gcode = file.read()
+        self.assertTrue(gcode.startswith('(Project: QR-codengrave_schallbert_de)'))
+        self.assertTrue(gcode.endswith('M30 \n'))
+
+    def test_planitem_error_is_reported(self):
+        planner = BatchPlanner(*self.planner_args)
+        result = plan_item(0, 'A' * 5000, planner._settings)
+        self.assertFalse(result.is_ok())
+        self.assertTrue(result.error.startswith('DataTooLongError'))
+
+    def test_run_ordered_returns_results_in_input_order(self):
+        texts = ['SN-{:04d}'.format(number) for number in range(12)]
+        planner = BatchPlanner(*self.planner_args, max_workers=2, max_in_flight=3)
+        results = list(planner.run(texts))
+        self.assertEqual(list(range(12)), [result.index for result in results])
+        self.assertEqual(texts, [result.text for result in results])
+        self.assertEqual(12, len(os.listdir(self.temp_dir.name)))
+
+    def test_run_ordered_bounds_items_waiting_for_slow_item(self):
+        consumed = []
+
+        def texts():
+            for number in range(16):
+                consumed.append(number)
+                yield 'x' * 1500 if number == 0 else 'SN-{:04d}'.format(number)
+        delivered = 0
+        for _ in BatchPlanner(*self.planner_args, max_workers=2, max_in_flight=3).run(texts()):
+            self.assertLessEqual(len(consumed) - delivered, 3)
+            delivered += 1
+        self.assertEqual(16, delivered)
+
+    def test_planitem_sanitizes_file_name(self):
+        planner = BatchPlanner(*self.planner_args)
+        result = plan_item(1, 'a:b?c*"<d>|e\n\\..f', planner._settings)
+        self.assertTrue(result.is_ok())
+        self.assertEqual(os.path.join(self.temp_dir.name, '00001_qr_a_b_c___d__e____f.tap'), result.file_path)
+        self.assertEqual('SN-0001_x', safe_file_name('SN-0001 x'))
+
+    def test_run_unordered_returns_every_item_once(self):
+        texts = ['SN-{:04d}'.format(number) for number in range(8)]
+        planner = BatchPlanner(*self.planner_args, max_workers=2, ordered=False)
+        results = list(planner.run(iter(texts)))
+        self.assertEqual(list(range(8)), sorted(result.index for result in results))
+
+    def test_run_isolates_failing_item(self):
+        texts = ['first', 'A' * 5000, 'third']
+        results = list(BatchPlanner(*self.planner_args, max_workers=2).run(texts))
+        self.assertEqual([True, False, True], [result.is_ok() for result in results])
+
+    def test_run_empty_input_returns_nothing(self):
+        self.assertEqual([], list(BatchPlanner(*self.planner_args, max_workers=1).run([])))
+
+    def test_batchresult_ok_without_error(self):
+        self.assertTrue(BatchResult(0, 'text', file_path='file').is_ok())
+
+    def test_planitem_fixed_mask_writes_gcode_file(self):
+        planner = BatchPlanner(*self.planner_args, mask=2)
+        result = plan_item(1, 'SN-000001', planner._settings)
+        self.assertTrue(result.is_ok())
+        with open(result.file_path) as file:
+            self.assertTrue(file.read().endswith('M30 \n'))
+
+    def test_fixed_mask_boosts_error_correction_like_automatic_mask(self):
+        planner = BatchPlanner(*self.planner_args, ecc=QrCode.Ecc.LOW, mask=2)
+        with patch('src.platform.batch_planner.get_template', wraps=get_template) as template:
+            self.assertTrue(plan_item(0, 'SN-1', planner._settings).is_ok())
+        boosted = QrCode.encode_text('SN-1', QrCode.Ecc.LOW).get_error_correction_level()
+        self.assertEqual(QrCode.Ecc.HIGH, boosted)
+        self.assertEqual(boosted, template.call_args[0][1])
+
+    def test_run_fixed_mask(self):
+        texts = ['SN-{:04d}'.format(number) for number in range(6)]
+        results = list(BatchPlanner(*self.planner_args, max_workers=2, mask=0).run(texts))
+        self.assertTrue(all(result.is_ok() for result in results))
+
+    def test_planitem_uses_post_processor_extension(self):
+        planner = BatchPlanner(*self.planner_args, post_processor=FanucPostProcessor())
+        result = plan_item(2, 'schallbert.de', planner._settings)
+        self.assertTrue(result.file_path.endswith('00002_qr_schallbert_de.nc'))
+        with open(result.file_path) as file:
+            self.assertTrue(file.read().startswith('%\nO0001'))
+
+    def test_planitem_verify_backplots_file(self):
+        planner = BatchPlanner(*self.planner_args, mask=1, post_processor=FanucPostProcessor(), verify=True)
+        result = plan_item(0, 'SN-000001', planner._settings)
+        self.assertTrue(result.is_ok(), result.error)
@@ -0,0 +1,135 @@
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+from io import StringIO
+from unittest.mock import patch
+
+from qrcodegen import QrCode
+
+from src.cli import main
+from src.helpers.persistence import Persistence
+from src.platform.line_path import LinePath
+from src.platform.machinify_vector import MachinifyVector, Tool, EngraveParams, ToolList
+from src.platform.vectorize_helper import QrValueTable, Point
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def expected_gcode(text, tool, engrave, xy0):
+    table = QrValueTable()
+    table.set_qr(QrCode.encode_text(text, QrCode.Ecc.MEDIUM))
+    machinify = MachinifyVector(1.2)
+    machinify.set_project_name(text)
+    machinify.set_qr_path(LinePath(table))
+    machinify.set_tool(tool)
+    machinify.set_engrave_params(engrave)
+    machinify.set_xy_zero(xy0)
+    machinify.get_job_duration_sec()
+    return machinify.generate_gcode().getvalue()
+
+
+def run_cli(argv, stdin=''):
+    stdout = StringIO()
+    status = main(argv, StringIO(stdin), stdout)
+    return status, stdout.getvalue()
+
+
+class TestCli(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self._persistence_path = Persistence.get_path()
+
+    def tearDown(self):
+        Persistence.set_path(self._persistence_path)
+        self._directory.cleanup()
+
+    def _path(self, name):
+        return os.path.join(self._directory.name, name)
+
+    def test_text_from_arguments_to_stdout(self):
+        status, gcode = run_cli(['--no-persistence', 'schallbert.de', 'rocks'])
+        self.assertEqual(0, status)
+        self.assertEqual(expected_gcode('schallbert.de rocks', Tool(), EngraveParams(), Point()), gcode)
+
+    def test_text_from_stdin_and_file(self):
+        _, from_stdin = run_cli(['--no-persistence'], stdin='schallbert.de\n')
+        with open(self._path('text.txt'), 'w') as file:
+            file.write('schallbert.de\n')
+        _, from_file = run_cli(['--no-persistence', '-i', self._path('text.txt')])
+        self.assertEqual(expected_gcode('schallbert.de', Tool(), EngraveParams(), Point()), from_stdin)
+        self.assertEqual(from_stdin, from_file)
+
+    def test_flags_override_persisted_settings(self):
+        tool_list = ToolList()
+        tool_list.add_or_update(Tool(number=3, name='Vbit', dia=3, angle=60, tip=0.1))
+        tool_list.add_or_update(Tool(number=5, name='Mill', dia=1))
+        tool_list.select_tool(3)
+        with open(self._path('persistence.dat'), 'wb') as file:
+            pickle.dump([tool_list, EngraveParams(0.3, 1, 10), Point(4, 5)], file, protocol=2)
+        _, gcode = run_cli(['--persistence', self._path('persistence.dat'), 'text'])
+        self.assertEqual(expected_gcode('text', Tool(number=3, name='Vbit', dia=3, angle=60, tip=0.1),
+                                        EngraveParams(0.3, 1, 10), Point(4, 5)), gcode)
+        _, gcode = run_cli(['--persistence', self._path('persistence.dat'), '--tool', '5', '--fxy', '800',
+                            '--speed', '20000', '--engrave', '0.2', '--xy0', '-1', '2', 'text'])
+        self.assertEqual(expected_gcode('text', Tool(number=5, name='Mill', dia=1, fxy=800, s=20000),
+                                        EngraveParams(0.2, 1, 10), Point(-1.0, 2.0)), gcode)
+        self.assertIn('M03 S20000', gcode)
+        self.assertIn(' F800', gcode)
+        self.assertNotIn('S20000.0', gcode)
+        self.assertNotIn('F800.0', gcode)
+        status, _ = run_cli(['--persistence', self._path('persistence.dat'), '--tool', '7', 'text'])
+        self.assertEqual(1, status)
+
+    def test_corrupt_persistence_file_is_reported(self):
+        for content in (b'garbage', b'', pickle.dumps(['not', 'settings'], protocol=2)):
+            with open(self._path('persistence.dat'), 'wb') as file:
+                file.write(content)
+            stderr = StringIO()
+            with redirect_stderr(stderr):
+                status, gcode = run_cli(['--persistence', self._path('persistence.dat'), 'text'])
+            self.assertEqual((1, ''), (status, gcode))
+            self.assertIn('Cannot read persistence file', stderr.getvalue())
+
+    def test_output_file_and_verify(self):
+        status, gcode = run_cli(['--no-persistence', '--post', 'grbl', '--verify', '-o', self._path('qr.nc'), 'text'])
+        self.assertEqual(0, status)
+        self.assertEqual('', gcode)
+        with open(self._path('qr.nc')) as file:
+            self.assertIn('G21', file.read())
+
+    def test_verify_reads_back_output_file(self):
+        class TruncatingFile:
+            """Loses everything written after the first 1000 characters, like a full disk."""
+            def __init__(self, file):
+                self._file = file
+                self._left = 1000
+
+            def write(self, text):
+                self._file.write(text[:max(self._left, 0)])
+                self._left -= len(text)
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc_info):
+                self._file.close()
+
+        def truncating_open(path, mode='r', *args, **kwargs):
+            file = open(path, mode, *args, **kwargs)
+            return TruncatingFile(file) if 'w' in mode else file
+        with patch('src.cli.open', truncating_open, create=True):
+            status, _ = run_cli(['--no-persistence', '--verify', '-o', self._path('qr.nc'), 'text'])
+        self.assertEqual(1, status)
+
+    def test_empty_text_is_rejected(self):
+        with self.assertRaises(SystemExit):
+            run_cli(['--no-persistence'], stdin='\n')
+
+    def test_does_not_import_tk(self):
+        script = 'import sys, src.cli; print("tkinter" in sys.modules)'
+        output = subprocess.run([sys.executable, '-c', script], cwd=ROOT, capture_output=True, text=True, check=True)
+        self.assertEqual('False', output.stdout.strip())
@@ -0,0 +1,116 @@
+import unittest
+from math import pi, sqrt
+
+import numpy as np
+
+from src.platform.coverage import CoverageAnalysis
+from src.platform.line_path import LinePath, Strategy
+from src.platform.machinify_vector import MachinifyVector, Tool, EngraveParams
+from src.platform.vectorize_helper import QrValueTable, Point
+from test.test_backplot import make_machinify
+from test.test_plate_job import make_plate
+
+
+def make_table(rows):
+    table = QrValueTable(len(rows))
+    table.table = np.array([[module == '#' for module in row] for row in rows])
+    table.size = len(rows)
+    return table
+
+
+def make_analysis(rows, strategy=Strategy.RUN_LENGTH, stay_down=False):
+    machinify = MachinifyVector(1.2)
+    machinify.set_qr_path(LinePath(make_table(rows), strategy))
+    machinify.set_tool(Tool(dia=1))
+    machinify.set_engrave_params(EngraveParams())
+    machinify.set_xy_zero(Point(0, 0))
+    machinify.set_stay_down(stay_down)
+    stats = machinify._get_stats()
+    return CoverageAnalysis(machinify._qr_path.get_table(), stats.toolpath, stats.plunges)
+
+
+class TestCoverageAnalysis(unittest.TestCase):
+    def test_single_module_is_cut_round(self):
+        report = make_analysis(['...', '.#.', '...']).analyze(1, 1)
+        self.assertAlmostEqual(pi / 4, report.fractions[1, 1], delta=0.05)
+        self.assertAlmostEqual(1 - pi / 4, report.uncut_area, delta=0.05)
+        self.assertEqual(0, report.overcut_area)
+        self.assertEqual(0, report.redundant_area)
+
+    def test_run_is_cut_fully_between_its_ends(self):
+        report = make_analysis(['.....', '.###.', '.....', '.....', '.....']).analyze(1, 1)
+        self.assertEqual(1, report.fractions[1, 2])
+        self.assertLess(report.fractions[1, 1], 1)
+        self.assertEqual(report.fractions[1, 1], report.fractions[1, 3])
+        self.assertEqual(report.min_dark_fraction, report.fractions[1, 1])
+
+    def test_areas_scale_with_pitch(self):
+        analysis = make_analysis(['...', '.#.', '...'])
+        self.assertAlmostEqual(4 * analysis.analyze(1, 1).uncut_area, analysis.analyze(2, 2).uncut_area)
+
+    def test_crossing_passes_are_redundant(self):
+        rows = ['.....', '..#..', '.###.', '..#..', '.....']
+        report = make_analysis(rows, Strategy.MIN_PLUNGE).analyze(1, 1)
+        self.assertGreater(report.crossing_area, 0)
+        self.assertEqual(report.redundant_area, report.crossing_area)
+        self.assertEqual(0, make_analysis(rows, Strategy.SERPENTINE).analyze(1, 1).crossing_area)
+
+    def test_linking_moves_belong_to_their_pass(self):
+        rows = ['#.#', '###', '...']
+        self.assertEqual(0, make_analysis(rows, stay_down=True).analyze(1, 1).redundant_area)
+
+    def test_smaller_pitch_cuts_into_light_modules(self):
+        analysis = make_analysis(['.....', '.###.', '.....', '.....', '.....'])
+        report = analysis.analyze(0.7, 1)
+        self.assertGreater(report.overcut_area, 0)
+        self.assertEqual(0, analysis.analyze(1, 1).overcut_area)
+        self.assertGreater(report.min_dark_fraction, analysis.analyze(1, 1).min_dark_fraction)
+
+    def test_suggested_pitch_covers_every_dark_module(self):
+        analysis = make_analysis(['.....', '.#.#.', '..##.', '.....', '.....'])
+        pitch = analysis.suggest_pitch(1)
+        self.assertGreater(pitch, 1 / sqrt(2))  # a round tool covers a square module up to its sampled corners
+        self.assertLess(pitch, 1)
+        self.assertEqual(1, analysis.get_min_dark_fraction(pitch, 1))
+        self.assertLess(analysis.get_min_dark_fraction(pitch + 0.01, 1), 1)
+
+    def test_suggested_pitch_grows_with_tolerated_gaps(self):
+        analysis = make_analysis(['...', '.#.', '...'])
+        pitches = [analysis.suggest_pitch(1, fraction) for fraction in (1.0, 0.9, 0.5)]
+        self.assertEqual(sorted(pitches), pitches)
+        self.assertGreater(pitches[2], 1)
+
+    def test_empty_code(self):
+        analysis = make_analysis(['...', '...', '...'])
+        self.assertEqual(1, analysis.suggest_pitch(1))
+        self.assertEqual(1, analysis.analyze(1, 1).min_dark_fraction)
+
+
+class TestMachinifyPitch(unittest.TestCase):
+    def test_pitch_defaults_to_cut_width(self):
+        machinify = make_machinify()
+        machinify.set_tool(Tool(dia=3, angle=60, tip=0.1))
+        self.assertIsNone(machinify.get_pitch())
+        self.assertAlmostEqual(machinify._get_cut_width(), machinify.get_coverage().pitch)
+
+    def test_pitch_scales_program_and_still_verifies(self):
+        machinify = make_machinify()
+        pitch = machinify.suggest_pitch()
+        self.assertLess(pitch, 1)
+        size = machinify.get_dimension_info()[0]
+        duration = machinify.get_job_duration_sec()
+        machinify.set_pitch(pitch)
+        self.assertAlmostEqual(size * pitch, machinify.get_dimension_info()[0])
+        self.assertLess(machinify.get_job_duration_sec(), duration)
+        self.assertEqual(1, machinify.get_coverage().min_dark_fraction)
+        self.assertTrue(machinify.verify_gcode().is_ok())
+
+    def test_plate_suggests_pitch_for_all_codes(self):
+        plate = make_plate()
+        pitch = plate.suggest_pitch()
+        self.assertEqual(min(code.suggest_pitch() for code in plate.get_codes()), pitch)
+        plate.set_pitch(pitch)
+        self.assertTrue(all(code.get_pitch() == pitch for code in plate.get_codes()))
+        self.assertTrue(plate.verify_gcode().is_ok())
+        with self.assertRaises(ValueError):
+            plate.get_coverage()
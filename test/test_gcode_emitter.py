@@ -0,0 +1,105 @@
+import unittest
+
+from src.platform.gcode_emitter import GcodeEmitter, CompactGcodeEmitter
+from src.platform.machinify_vector import Tool, EngraveParams
+from src.platform.vectorize_helper import LineSegment, Point
+
+
+def trace_moves(program):
+    """Interprets G-code lines with modal motion mode, position, and feed.
+    :returns list of (motion, x, y, z, feed) states after each line that changes the position"""
+    state = {'G': '00', 'X': None, 'Y': None, 'Z': '0.5', 'F': None}
+    trace = []
+    for line in program.splitlines():
+        before = (state['X'], state['Y'], state['Z'])
+        for word in line.split():
+            state[word[0]] = word[1:]
+        if (state['X'], state['Y'], state['Z']) != before:
+            trace.append((state['G'], state['X'], state['Y'], state['Z'], state['F'] if state['G'] == '01' else None))
+    return trace
+
+
+class TestGcodeEmitter(unittest.TestCase):
+    def setUp(self):
+        self.emitter = GcodeEmitter(5, 2, Point(0, 0), EngraveParams(), Tool())
+
+    def test_get_size(self):
+        self.assertEqual(5, self.emitter.get_size())
+
+    def test_segment_horizontal(self):
+        self.assertEqual('G00 X2 Y-4\n'
+                         'G01 Z-0.4 F500\n'
+                         'G01 X8 F1000\n'
+                         'G00 Z0.5\n', self.emitter.segment(LineSegment(3, 0, Point(1, 2))))
+
+    def test_segment_vertical_negative_length(self):
+        self.assertEqual('G00 X0 Y-8\n'
+                         'G01 Z-0.4 F500\n'
+                         'G01 Y-2 F1000\n'
+                         'G00 Z0.5\n', self.emitter.segment(LineSegment(0, -3, Point(0, 4))))
+
+    def test_segment_single_module_has_no_cut(self):
+        self.assertEqual('G00 X4 Y-4\n'
+                         'G01 Z-0.4 F500\n'
+                         'G00 Z0.5\n', self.emitter.segment(LineSegment(0, 0, Point(2, 2))))
+
+    def test_polyline_links_segments(self):
+        polyline = [LineSegment(2, 0, Point(0, 0)), LineSegment(0, 2, Point(2, 1)), LineSegment(0, 0, Point(2, 3))]
+        self.assertEqual('G00 X0 Y0\n'
+                         'G01 Z-0.4 F500\n'
+                         'G01 X4 F1000\n'
+                         'G01 X4 Y-2 F1000\n'
+                         'G01 Y-6 F1000\n'
+                         'G00 Z0.5\n', self.emitter.polyline(polyline))
+
+    def test_segment_end_lies_on_grid_for_uneven_step(self):
+        emitter = GcodeEmitter(30, 0.1234567, Point(6.21, -17.21), EngraveParams(), Tool())
+        first = emitter.segment(LineSegment(20, 0, Point(3, 0)))
+        second = emitter.segment(LineSegment(0, 0, Point(23, 0)))
+        self.assertEqual(first.split('G01 X')[1].split(' ')[0], second.split('G00 X')[1].split(' ')[0])
+
+
+class TestCompactGcodeEmitter(unittest.TestCase):
+    def setUp(self):
+        self.args = (5, 2, Point(0, 0), EngraveParams(), Tool())
+        self.segments = [LineSegment(0, 0, Point(0, 0)), LineSegment(0, 2, Point(2, 0)), LineSegment(0, 0, Point(3, 0)),
+                         LineSegment(0, 1, Point(1, 1)), LineSegment(0, 0, Point(0, 2)), LineSegment(1, 0, Point(3, 2))]
+
+    def test_segment_leaves_out_unchanged_words(self):
+        emitter = CompactGcodeEmitter(*self.args)
+        self.assertEqual('X4 Y-4\n'
+                         'G01 Z-0.4 F500\n'
+                         'X8 F1000\n'
+                         'G00 Z0.5\n', emitter.segment(LineSegment(2, 0, Point(2, 2))))
+        self.assertEqual('Y-6\n'
+                         'G01 Z-0.4 F500\n'
+                         'G00 Z0.5\n', emitter.segment(LineSegment(0, 0, Point(4, 3))))
+        self.assertEqual('X6\n'
+                         'G01 Z-0.4\n'
+                         'G00 Z0.5\n', emitter.segment(LineSegment(0, 0, Point(3, 3))))
+
+    def test_segments_trace_same_moves(self):
+        full = GcodeEmitter(*self.args)
+        compact = CompactGcodeEmitter(*self.args)
+        full_program = ''.join(full.segment(segment) for segment in self.segments)
+        compact_program = ''.join(compact.segment(segment) for segment in self.segments)
+        self.assertLess(len(compact_program), len(full_program))
+        self.assertEqual(trace_moves(full_program), trace_moves(compact_program))
+
+    def test_polyline_merges_moves_in_same_direction(self):
+        polyline = [LineSegment(0, 1, Point(0, 0)), LineSegment(0, 2, Point(0, 2)), LineSegment(2, 0, Point(0, 4)),
+                    LineSegment(0, -1, Point(2, 4))]
+        self.assertEqual('X0 Y0\n'
+                         'G01 Z-0.4 F500\n'
+                         'Y-8 F1000\n'
+                         'X4\n'
+                         'Y-6\n'
+                         'G00 Z0.5\n', CompactGcodeEmitter(*self.args).polyline(polyline))
+
+    def test_polyline_keeps_reversals(self):
+        polyline = [LineSegment(2, 0, Point(0, 0)), LineSegment(-1, 0, Point(2, 0))]
+        self.assertEqual('X0 Y0\n'
+                         'G01 Z-0.4 F500\n'
+                         'X4 F1000\n'
+                         'X2\n'
+                         'G00 Z0.5\n', CompactGcodeEmitter(*self.args).polyline(polyline))
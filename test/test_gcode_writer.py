@@ -0,0 +1,54 @@
+import unittest
+from io import StringIO, BytesIO
+
+from src.platform.gcode_writer import GcodeWriter
+
+
+class ChunkRecorder(StringIO):
+    def __init__(self):
+        super().__init__()
+        self.chunks = []
+
+    def write(self, text):
+        self.chunks.append(len(text))
+        return super().write(text)
+
+
+class TestGcodeWriter(unittest.TestCase):
+    def test_write_buffers_until_flush(self):
+        file = StringIO()
+        writer = GcodeWriter(file)
+        writer.write('G90 \n')
+        self.assertEqual('', file.getvalue())
+        writer.flush()
+        self.assertEqual('G90 \n', file.getvalue())
+        self.assertEqual(5, writer.get_chars_written())
+
+    def test_write_binary_file_encodes_ascii(self):
+        file = BytesIO()
+        writer = GcodeWriter(file)
+        writer.write('G00 X1 Y2\n')
+        writer.flush()
+        self.assertEqual(b'G00 X1 Y2\n', file.getvalue())
+
+    def test_write_binary_file_replaces_non_ascii(self):
+        file = BytesIO()
+        writer = GcodeWriter(file)
+        writer.write('(Project: Müller Café)\n')
+        writer.flush()
+        self.assertEqual(b'(Project: M?ller Caf?)\n', file.getvalue())
+
+    def test_write_emits_chunks_of_buffer_size(self):
+        file = ChunkRecorder()
+        writer = GcodeWriter(file, buffer_size=100)
+        for _ in range(50):
+            writer.write('G01 Z-0.4 F500\n')
+        writer.flush()
+        self.assertEqual(50 * 15, writer.get_chars_written())
+        self.assertTrue(all(chunk < 100 + 15 for chunk in file.chunks))
+        self.assertEqual(8, len(file.chunks))
+
+    def test_flush_empty_buffer_writes_nothing(self):
+        file = ChunkRecorder()
+        GcodeWriter(file).flush()
+        self.assertEqual([], file.chunks)
@@ -0,0 +1,210 @@
+import os
+import threading
+import time
+import unittest
+
+from src.platform.grbl_sender import GrblSender, StreamProtocol, clean_line, feed_override_commands, open_port, \
+    FEED_OVERRIDE_RESET, FEED_OVERRIDE_PLUS_10, FEED_OVERRIDE_MINUS_10, FEED_OVERRIDE_PLUS_1, FEED_OVERRIDE_MINUS_1
+from src.platform.grbl_simulator import GrblSimulator
+
+PROGRAM = ['(Project: test)', '', 'G21 G90', 'M03 S24000', 'G00 Z0.5'] + \
+          ['G00 X{} Y-1\nG01 Z-0.1 F500\nG01 X{} F1000\nG00 Z0.5'.format(index, index + 0.5)
+           for index in range(40)] + ['M05', 'M30']
+PROGRAM = [line for block in PROGRAM for line in block.split('\n')]
+
+
+class FakePort:
+    """Answers every received line with ok, but only when the sender reads. Records how many bytes were waiting
+    for an answer at most."""
+
+    def __init__(self, answers=None):
+        self.written = b''
+        self.outstanding = []
+        self.max_outstanding_bytes = 0
+        self.max_outstanding_lines = 0
+        self.answers = answers or {}
+
+    def write(self, data):
+        self.written += data
+        if data.endswith(b'\n'):
+            self.outstanding.append(data)
+        self.max_outstanding_bytes = max(self.max_outstanding_bytes, sum(len(line) for line in self.outstanding))
+        self.max_outstanding_lines = max(self.max_outstanding_lines, len(self.outstanding))
+        return len(data)
+
+    def read(self, size=1):
+        if not self.outstanding:
+            return b''
+        line = self.outstanding.pop(0).decode().strip()
+        answer = self.answers.get(line, 'ok')
+        if not answer.startswith('ok') and not answer.startswith('error'):
+            self.outstanding.clear()  # alarm or reset: GRBL discards its receive buffer
+        return (answer + '\r\n').encode()
+
+
+class TestHelpers(unittest.TestCase):
+    def test_clean_line(self):
+        self.assertEqual('G01X1.5F1000', clean_line('G01 X1.5 F1000 (cut) ; move\n'))
+        self.assertEqual('', clean_line('(Project: QR-codengrave)\n'))
+        self.assertEqual('G90', clean_line('g90 \n'))
+
+    def test_feed_override_commands(self):
+        self.assertEqual(b'', feed_override_commands(100, 100))
+        self.assertEqual(FEED_OVERRIDE_PLUS_10 * 2 + FEED_OVERRIDE_PLUS_1 * 3, feed_override_commands(100, 123))
+        self.assertEqual(FEED_OVERRIDE_MINUS_1, feed_override_commands(150, 149))
+        self.assertEqual(FEED_OVERRIDE_RESET + FEED_OVERRIDE_MINUS_10, feed_override_commands(180, 90))
+        self.assertEqual(FEED_OVERRIDE_MINUS_10 * 9, feed_override_commands(100, 5))  # clamped to 10 %
+
+
+class TestGrblSender(unittest.TestCase):
+    def test_character_counting_fills_receive_buffer(self):
+        port = FakePort()
+        self.assertTrue(GrblSender(port).stream(PROGRAM))
+        self.assertLessEqual(port.max_outstanding_bytes, 128)
+        self.assertGreater(port.max_outstanding_bytes, 100)
+
+    def test_send_response_waits_for_each_line(self):
+        port = FakePort()
+        sender = GrblSender(port, StreamProtocol.SEND_RESPONSE)
+        self.assertTrue(sender.stream(PROGRAM))
+        self.assertEqual(1, port.max_outstanding_lines)
+
+    def test_comments_and_spaces_not_sent(self):
+        port = FakePort()
+        GrblSender(port).stream(PROGRAM)
+        self.assertTrue(port.written.startswith(b'G21G90\nM03S24000\n'))
+        self.assertEqual(len(PROGRAM) - 2, port.written.count(b'\n'))
+
+    def test_progress_reports_every_answer(self):
+        reports = []
+        sender = GrblSender(FakePort())
+        sender.stream(PROGRAM, total=len(PROGRAM), progress=lambda *report: reports.append(report))
+        self.assertEqual(len(PROGRAM) - 2, len(reports))
+        self.assertEqual((len(PROGRAM) - 2, len(PROGRAM) - 2, len(PROGRAM)), reports[-1])
+
+    def test_error_stops_stream(self):
+        port = FakePort({'M06': 'error:20'})
+        sender = GrblSender(port)
+        self.assertFalse(sender.stream(['G90', 'M06'] + ['G00X1'] * 300))
+        self.assertEqual(1, len(sender.get_errors()))
+        self.assertEqual((1, 'M06', 'error:20'), (sender.get_errors()[0].line_number, sender.get_errors()[0].line,
+                                                  sender.get_errors()[0].message))
+        self.assertLess(sender.get_sent_count(), 100)
+
+    def test_next_stream_starts_afresh(self):
+        port = FakePort({'G38X1': 'error:20'})
+        sender = GrblSender(port)
+        self.assertFalse(sender.stream(['G90', 'G38 X1']))
+        self.assertTrue(sender.stream(['G90', 'G00 X1']))
+        self.assertEqual((2, 2, []), (sender.get_sent_count(), sender.get_acknowledged_count(), sender.get_errors()))
+
+    def test_alarm_and_reset_end_stream(self):
+        for message in ('ALARM:1', 'Grbl 1.1h [\'$\' for help]'):
+            port = FakePort({'G00X3': message})
+            sender = GrblSender(port, response_timeout=1)
+            self.assertFalse(sender.stream(['G00 X{}'.format(index) for index in range(300)], stop_on_error=False))
+            self.assertTrue(sender.is_aborted())
+            self.assertEqual(sender.get_sent_count(), sender.get_acknowledged_count())
+            self.assertLess(sender.get_sent_count(), 100)
+            self.assertEqual('G00X3', sender.get_errors()[0].line)
+            self.assertEqual({message}, {error.message for error in sender.get_errors()})
+
+    def test_too_long_line_raises(self):
+        with self.assertRaises(ValueError):
+            GrblSender(FakePort()).stream(['G01X' + '1' * 200])
+
+    def test_timeout_raises(self):
+        class SilentPort(FakePort):
+            def read(self, size=1):
+                return b''
+        with self.assertRaises(TimeoutError):
+            GrblSender(SilentPort(), response_timeout=0.01).stream(['G90'])
+
+    def test_feed_override_sent_as_realtime_command(self):
+        port = FakePort()
+        sender = GrblSender(port)
+        sender.set_feed_override(80)
+        self.assertEqual(FEED_OVERRIDE_MINUS_10 * 2, port.written)
+        self.assertEqual(80, sender.get_feed_override())
+
+
+@unittest.skipUnless(hasattr(os, 'openpty'), 'needs pseudo terminals')
+class TestGrblSimulator(unittest.TestCase):
+    def stream(self, simulator, lines, protocol=StreamProtocol.CHARACTER_COUNTING):
+        port = open_port(simulator.get_port_path())
+        self.addCleanup(port.close)
+        sender = GrblSender(port, protocol, response_timeout=5)
+        return sender, sender.stream(lines)
+
+    def test_program_executes_without_overflow(self):
+        with GrblSimulator(time_scale=0.01) as simulator:
+            sender, ok = self.stream(simulator, PROGRAM)
+            self.assertTrue(ok)
+            self.assertEqual(0, simulator.get_overflow_count())
+            self.assertEqual([clean_line(line) for line in PROGRAM if clean_line(line)],
+                             simulator.get_executed_lines())
+
+    def test_unsupported_command_reported(self):
+        with GrblSimulator(time_scale=0) as simulator:
+            # Lines in GRBL's receive buffer are answered even after an error
+            sender, ok = self.stream(simulator, ['G90', 'T1 M06', 'MSG "Tool"', 'G81 X1 Y1 Z-1 R1'])
+            self.assertFalse(ok)
+            self.assertEqual(['error:20', 'error:1', 'error:20'], [error.message for error in sender.get_errors()])
+            self.assertEqual(['G90'], simulator.get_executed_lines())
+
+    def test_send_response_stops_at_error(self):
+        with GrblSimulator(time_scale=0) as simulator:
+            sender, ok = self.stream(simulator, ['G90', 'T1 M06', 'G00 X1'], StreamProtocol.SEND_RESPONSE)
+            self.assertFalse(ok)
+            self.assertEqual(2, sender.get_sent_count())
+
+    def test_pause_holds_and_resume_finishes(self):
+        with GrblSimulator(time_scale=0.05) as simulator:
+            port = open_port(simulator.get_port_path())
+            self.addCleanup(port.close)
+            sender = GrblSender(port, response_timeout=5)
+            sender.pause()
+            thread = threading.Thread(target=sender.stream, args=(PROGRAM,))
+            thread.start()
+            time.sleep(0.2)
+            self.assertTrue(simulator.is_held())
+            acknowledged = sender.get_acknowledged_count()
+            time.sleep(0.1)
+            self.assertEqual(acknowledged, sender.get_acknowledged_count())
+            self.assertLess(acknowledged, len(PROGRAM) - 2)
+            sender.resume()
+            thread.join(5)
+            self.assertFalse(thread.is_alive())
+            self.assertEqual(len(PROGRAM) - 2, sender.get_acknowledged_count())
+
+    def test_feed_override_and_status(self):
+        with GrblSimulator(time_scale=0) as simulator:
+            port = open_port(simulator.get_port_path())
+            self.addCleanup(port.close)
+            sender = GrblSender(port, response_timeout=5)
+            sender.set_feed_override(137)
+            sender.stream(['G01 X1 F500'])
+            sender.request_status()
+            sender.stream(['G90'])
+            self.assertEqual(137, simulator.get_feed_override())
+            self.assertTrue(sender.get_last_status().startswith('<Idle|MPos:1.000,0.000,0.000|'))
+            self.assertIn('|Ov:137,', sender.get_last_status())
+
+    def test_rejected_line_changes_no_modal_state(self):
+        with GrblSimulator(time_scale=0) as simulator:
+            port = open_port(simulator.get_port_path())
+            self.addCleanup(port.close)
+            sender = GrblSender(port, response_timeout=5)
+            self.assertFalse(sender.stream(['G01 F600 X1 G99']))
+            sender.request_status()
+            sender.stream(['G90'])
+            self.assertTrue(sender.get_last_status().startswith('<Idle|MPos:0.000,0.000,0.000|'))
+            self.assertIn('|FS:0,0|', sender.get_last_status())
+
+    def test_stop_wakes_idle_controller(self):
+        simulator = GrblSimulator()
+        simulator.start()
+        time.sleep(0.05)
+        start = time.monotonic()
+        simulator.stop()
+        self.assertLess(time.monotonic() - start, 0.5)
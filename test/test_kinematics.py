@@ -0,0 +1,127 @@
+import unittest
+from datetime import timedelta
+
+import numpy as np
+from qrcodegen import QrCode
+
+from src.platform.vectorize_helper import QrValueTable, LineSegment, Point
+from src.platform.line_path import LinePath
+from src.platform.toolpath import Toolpath
+from src.platform.machinify_vector import MachinifyVector, Tool, EngraveParams
+from src.platform.kinematics import MachineProfile, KinematicModel, engrave_moves, _min_plus_scan
+
+
+def make_machinify(text='schallbert.de'):
+    table = QrValueTable()
+    table.set_qr(QrCode.encode_text(text, QrCode.Ecc.MEDIUM))
+    machinify = MachinifyVector(1.2)
+    machinify.set_qr_path(LinePath(table))
+    machinify.set_tool(Tool(dia=1))
+    machinify.set_engrave_params(EngraveParams())
+    machinify.set_xy_zero(Point(0, 0))
+    return machinify
+
+
+class TestKinematicModel(unittest.TestCase):
+    def setUp(self):
+        self.model = KinematicModel(MachineProfile(accel_xy=500, accel_z=200))
+
+    def test_long_move_cruises_at_feed(self):
+        # 10 mm at 10 mm/s: 1 s plus 2 * 0.01 s ramps, half of which are lost to the lower mean speed
+        self.assertAlmostEqual(1.02, self.model.get_duration([[10, 0, 0]], [600]))
+
+    def test_short_move_never_reaches_feed(self):
+        # Triangle profile: 2 * sqrt(L / a)
+        self.assertAlmostEqual(2 * (0.1 / 500) ** 0.5, self.model.get_duration([[0.1, 0, 0]], [6000]))
+
+    def test_collinear_moves_do_not_stop(self):
+        single = self.model.get_duration([[0.5, 0, 0]], [6000])
+        self.assertAlmostEqual(single, self.model.get_duration([[0.1, 0, 0]] * 5, [6000] * 5))
+
+    def test_reversal_stops(self):
+        forth = self.model.get_duration([[0.1, 0, 0]], [6000])
+        self.assertAlmostEqual(2 * forth, self.model.get_duration([[0.1, 0, 0], [-0.1, 0, 0]], [6000] * 2))
+
+    def test_corner_faster_than_stop(self):
+        corner = self.model.get_duration([[5, 0, 0], [0, 5, 0]], [3000] * 2)
+        stop = 2 * self.model.get_duration([[5, 0, 0]], [3000])
+        straight = self.model.get_duration([[10, 0, 0]], [3000])
+        self.assertLess(straight, corner)
+        self.assertLess(corner, stop)
+
+    def test_rapid_limited_by_axis_rate(self):
+        profile = MachineProfile(rapid_xy=6000, rapid_z=600, accel_xy=1e9, accel_z=1e9)
+        model = KinematicModel(profile)
+        self.assertAlmostEqual(1, model.get_duration([[100, 0, 0]], [np.inf]), places=3)
+        self.assertAlmostEqual(1, model.get_duration([[0, 0, 10]], [np.inf]), places=3)
+        # Diagonal: each axis at its own limit
+        self.assertAlmostEqual(1, model.get_duration([[100, 100, 0]], [np.inf]), places=3)
+        self.assertAlmostEqual(1, model.get_duration([[100, 0, 1]], [np.inf]), places=3)
+
+    def test_no_moves(self):
+        self.assertEqual(0, self.model.get_duration(np.zeros((0, 3)), []))
+
+    def test_min_plus_scan_matches_loop(self):
+        limits = np.array([0, 5, 1, 9, 9, 0], dtype=float)
+        gains = np.array([2, 3, 1, 4, 2], dtype=float)
+        expected = [limits[0]]
+        for limit, gain in zip(limits[1:], gains):
+            expected.append(min(limit, expected[-1] + gain))
+        self.assertEqual(expected, _min_plus_scan(limits, gains).tolist())
+
+
+class TestEngraveMoves(unittest.TestCase):
+    def test_segment_moves(self):
+        toolpath = Toolpath.from_segments([LineSegment(2, 0, Point(1, 0)), LineSegment(0, 0, Point(1, 1))])
+        deltas, feeds = engrave_moves(toolpath, [True, True], 0.5, EngraveParams(), Tool())
+        np.testing.assert_allclose([[0.5, 0, 0], [0, 0, -0.9], [1, 0, 0], [0, 0, 0.9],
+                                    [-1, -0.5, 0], [0, 0, -0.9], [0, 0, 0.9]], deltas)
+        self.assertEqual([np.inf, 500, 1000, np.inf, np.inf, 500, np.inf], feeds.tolist())
+
+    def test_polyline_links_are_cut(self):
+        toolpath = Toolpath.from_segments([LineSegment(1, 0, Point(0, 0)), LineSegment(0, 1, Point(1, 1))])
+        deltas, feeds = engrave_moves(toolpath, [True, False], 1, EngraveParams(), Tool())
+        np.testing.assert_allclose([[0, 0, -0.9], [1, 0, 0], [0, -1, 0], [0, -1, 0], [0, 0, 0.9]], deltas)
+        self.assertEqual([500, 1000, 1000, 1000, np.inf], feeds.tolist())
+
+
+class TestMachinifyKinematics(unittest.TestCase):
+    def test_default_has_no_profile(self):
+        self.assertIsNone(MachinifyVector(1.0).get_machine_profile())
+
+    def test_profile_changes_estimate(self):
+        machinify = make_machinify()
+        fudged = machinify.get_job_duration_sec()
+        machinify.set_machine_profile(MachineProfile())
+        kinematic = machinify.get_job_duration_sec()
+        self.assertGreater(kinematic, timedelta(0))
+        self.assertNotEqual(fudged, kinematic)
+        machinify.set_machine_profile(None)
+        self.assertEqual(fudged, machinify.get_job_duration_sec())
+
+    def test_slow_acceleration_takes_longer(self):
+        machinify = make_machinify()
+        machinify.set_machine_profile(MachineProfile(accel_xy=2000, accel_z=1000))
+        fast = machinify.get_job_duration_sec()
+        machinify.set_machine_profile(MachineProfile(accel_xy=50, accel_z=20))
+        self.assertGreater(machinify.get_job_duration_sec(), fast)
+
+    def test_stay_down_uses_profile(self):
+        machinify = make_machinify('https://github.com/Schallbert/QR-codengrave')
+        machinify.set_machine_profile(MachineProfile())
+        plain = machinify.get_job_duration_sec()
+        machinify.set_stay_down(True)
+        self.assertLess(machinify.get_job_duration_sec(), plain)
+
+    def test_feed_change_reuses_geometry(self):
+        machinify = make_machinify()
+        machinify.set_machine_profile(MachineProfile())
+        slow = machinify.get_job_duration_sec()
+        self.assertEqual(slow, machinify.get_job_duration_sec())
+        machinify.set_tool(Tool(dia=1, fxy=2000))
+        self.assertLess(machinify.get_job_duration_sec(), slow)
+        self.assertEqual(1, machinify.get_stats_recomputed())
+
+    def test_profile_equality(self):
+        self.assertEqual(MachineProfile(), MachineProfile())
+        self.assertFalse(MachineProfile() == MachineProfile(accel_z=100))
@@ -3,36 +3,63 @@ from unittest.mock import MagicMock
 
 from qrcodegen import QrCode
 from src.platform.vectorize_helper import QrValueTable, LineSegment, Point
-from src.platform.line_path import LinePath
+from src.platform import line_path
+from src.platform.line_path import LinePath, Strategy, clear_plan_cache
 
 
 class TestQrValueTable(unittest.TestCase):
     def setUp(self):
         self.mock_qr = QrCode.encode_text("schallbert.de", QrCode.Ecc.MEDIUM)
-        self.mock_qr.get_module = MagicMock()
         self.mock_qr.get_size = MagicMock()
 
     def test_qrvaluetable_setqr_size_matches(self):
-        self.mock_qr.get_module.return_value = True
+        self.mock_qr._modules = [[True] * 21 for _ in range(21)]
         self.mock_qr.get_size.return_value = 21
         table = QrValueTable()
         table.set_qr(self.mock_qr)
         self.assertEqual(21, table.size)
 
     def test_qrvaluetable_setqr_table_matches_size(self):
-        self.mock_qr.get_module.return_value = True
+        self.mock_qr._modules = [[True] * 21 for _ in range(21)]
         self.mock_qr.get_size.return_value = 21
         table = QrValueTable()
         table.set_qr(self.mock_qr)
         self.assertEqual(True, table.table[20, 20])
 
     def test_qrvaluetable_setqr_indexoutofrange_throws(self):
-        self.mock_qr.get_module.return_value = False
+        self.mock_qr._modules = [[False] * 21 for _ in range(21)]
         self.mock_qr.get_size.return_value = 21
         table = QrValueTable()
         table.set_qr(self.mock_qr)
         self.assertRaises(Exception, table.table, [21, 21])
 
+    def test_qrvaluetable_setqr_copies_module_layout(self):
+        qr = QrCode.encode_text("schallbert.de", QrCode.Ecc.MEDIUM)
+        table = QrValueTable()
+        table.set_qr(qr)
+        for y in range(qr.get_size()):
+            for x in range(qr.get_size()):
+                self.assertEqual(qr.get_module(x, y), table.table[y, x])
+
+    def test_qrvaluetable_row_column_return_slices(self):
+        table = QrValueTable(3)
+        table.table[1, 0] = True
+        table.table[1, 2] = True
+        self.assertEqual([True, False, True], table.row(1).tolist())
+        self.assertEqual([False, True, False], table.column(0).tolist())
+
+    def test_qrvaluetable_row_is_readonly(self):
+        table = QrValueTable(3)
+        self.assertRaises(ValueError, table.row(0).__setitem__, 0, True)
+
+    def test_qrvaluetable_copy_is_independent(self):
+        table = QrValueTable(3)
+        table.table[0, 0] = True
+        duplicate = table.copy()
+        duplicate.table[0, 0] = False
+        self.assertEqual(3, duplicate.size)
+        self.assertTrue(table.table[0, 0])
+
 
 class TestScanQr(unittest.TestCase):
     def setUp(self):
@@ -41,7 +68,7 @@ class TestScanQr(unittest.TestCase):
         # 1 1 1 1 1
         # 0 0 0 0 0
         # 0 1 0 1 1
-        self.sim_qr = QrValueTable()
+        self.sim_qr = QrValueTable(5)
         self.sim_qr.table[0, 0] = True
         self.sim_qr.table[0, 1] = False
         self.sim_qr.table[0, 2] = True
@@ -69,141 +96,142 @@ class TestScanQr(unittest.TestCase):
         self.sim_qr.table[4, 4] = True
         self.sim_qr.size = 5
         self.scan_qr = LinePath(self.sim_qr)
+        self.todo = self.sim_qr.table.copy()
 
     def test_rowoutofrange_returns_0vectors(self):
-        vectors = self.scan_qr._get_line_left_to_right(5)
+        vectors = self.scan_qr._get_line_left_to_right(self.todo, 5)
         self.assertEqual(0, len(vectors))
 
     def test_getlinel2r_line0_returns_3vectors(self):
-        vectors = self.scan_qr._get_line_left_to_right(0)
+        vectors = self.scan_qr._get_line_left_to_right(self.todo, 0)
         self.assertEqual(3, len(vectors))
 
     def test_getlinel2r_line0_vector0_contents_ok(self):
-        vectors = self.scan_qr._get_line_left_to_right(0)
+        vectors = self.scan_qr._get_line_left_to_right(self.todo, 0)
         expect = LineSegment(0, 0, Point(0, 0))
         self.assertEqual(expect, vectors[0])
 
     def test_getlinel2r_line0_vector1_contents_ok(self):
-        vectors = self.scan_qr._get_line_left_to_right(0)
+        vectors = self.scan_qr._get_line_left_to_right(self.todo, 0)
         expect = LineSegment(0, 2, Point(2, 0))
         self.assertEqual(expect, vectors[1])
 
     def test_getlinel2r_line0_vector2_contents_ok(self):
-        vectors = self.scan_qr._get_line_left_to_right(0)
+        vectors = self.scan_qr._get_line_left_to_right(self.todo, 0)
         expect = LineSegment(0, 0, Point(3, 0))
         self.assertEqual(expect, vectors[2])
 
     def test_getlinel2r_line1_returns_1vector(self):
-        vectors = self.scan_qr._get_line_left_to_right(1)
+        vectors = self.scan_qr._get_line_left_to_right(self.todo, 1)
         self.assertEqual(1, len(vectors))
 
     def test_getlinel2r_line1_vector0_contents_ok(self):
-        vectors = self.scan_qr._get_line_left_to_right(1)
+        vectors = self.scan_qr._get_line_left_to_right(self.todo, 1)
         expect = LineSegment(1, 0, Point(1, 1))
         self.assertEqual(expect, vectors[0])
 
     def test_getlinel2r_line2_returns_1vector(self):
-        vectors = self.scan_qr._get_line_left_to_right(2)
+        vectors = self.scan_qr._get_line_left_to_right(self.todo, 2)
         self.assertEqual(1, len(vectors))
 
     def test_getlinel2r_line2_vector0_contents_ok(self):
-        vectors = self.scan_qr._get_line_left_to_right(2)
+        vectors = self.scan_qr._get_line_left_to_right(self.todo, 2)
         expect = LineSegment(4, 0, Point(0, 2))
         self.assertEqual(expect, vectors[0])
 
     def test_getlinel2r_line3_returns_0vector(self):
-        vectors = self.scan_qr._get_line_left_to_right(3)
+        vectors = self.scan_qr._get_line_left_to_right(self.todo, 3)
         self.assertEqual(0, len(vectors))
 
     def test_getlinel2r_line4_returns_2vectors(self):
-        vectors = self.scan_qr._get_line_left_to_right(4)
+        vectors = self.scan_qr._get_line_left_to_right(self.todo, 4)
         self.assertEqual(2, len(vectors))
 
     def test_getlinel2r_line4_vector0_contents_ok(self):
-        vectors = self.scan_qr._get_line_left_to_right(4)
+        vectors = self.scan_qr._get_line_left_to_right(self.todo, 4)
         expect = LineSegment(0, 0, Point(1, 4))
         self.assertEqual(expect, vectors[0])
 
     def test_getlinel2r_line4_vector1_contents_ok(self):
-        vectors = self.scan_qr._get_line_left_to_right(4)
+        vectors = self.scan_qr._get_line_left_to_right(self.todo, 4)
         expect = LineSegment(1, 0, Point(3, 4))
         self.assertEqual(expect, vectors[1])
 
     def test_getliner2l_line0_returns_2vectors(self):
-        vectors = self.scan_qr._get_line_right_to_left(0)
+        vectors = self.scan_qr._get_line_right_to_left(self.todo, 0)
         self.assertEqual(2, len(vectors))
 
     def test_getliner2l_line0_vector0_contents_ok(self):
-        vectors = self.scan_qr._get_line_right_to_left(0)
+        vectors = self.scan_qr._get_line_right_to_left(self.todo, 0)
         expect = LineSegment(-1, 0, Point(3, 0))
         self.assertEqual(expect, vectors[0])
 
     def test_getliner2l_line0_vector1_contents_ok(self):
-        vectors = self.scan_qr._get_line_right_to_left(0)
+        vectors = self.scan_qr._get_line_right_to_left(self.todo, 0)
         expect = LineSegment(0, 0, Point(0, 0))
         self.assertEqual(expect, vectors[1])
 
     def test_getliner2l_line1_returns_1vector(self):
-        vectors = self.scan_qr._get_line_right_to_left(1)
+        vectors = self.scan_qr._get_line_right_to_left(self.todo, 1)
         self.assertEqual(1, len(vectors))
 
     def test_getliner2l_line1_vector0_contents_ok(self):
-        vectors = self.scan_qr._get_line_right_to_left(1)
+        vectors = self.scan_qr._get_line_right_to_left(self.todo, 1)
         expect = LineSegment(-1, 0, Point(2, 1))
         self.assertEqual(expect, vectors[0])
 
     def test_getliner2l_line2_returns_1vector(self):
-        vectors = self.scan_qr._get_line_right_to_left(2)
+        vectors = self.scan_qr._get_line_right_to_left(self.todo, 2)
         self.assertEqual(1, len(vectors))
 
     def test_getliner2l_line2_vector0_contents_ok(self):
-        vectors = self.scan_qr._get_line_right_to_left(2)
+        vectors = self.scan_qr._get_line_right_to_left(self.todo, 2)
         expect = LineSegment(-4, 0, Point(4, 2))
         self.assertEqual(expect, vectors[0])
 
     def test_getliner2l_line3_returns_0vector(self):
-        vectors = self.scan_qr._get_line_right_to_left(3)
+        vectors = self.scan_qr._get_line_right_to_left(self.todo, 3)
         self.assertEqual(0, len(vectors))
 
     def test_getliner2l_line4_returns_2vector(self):
-        vectors = self.scan_qr._get_line_right_to_left(4)
+        vectors = self.scan_qr._get_line_right_to_left(self.todo, 4)
         self.assertEqual(2, len(vectors))
 
     def test_getliner2l_line4_vector0_contents_ok(self):
-        vectors = self.scan_qr._get_line_right_to_left(4)
+        vectors = self.scan_qr._get_line_right_to_left(self.todo, 4)
         expect = LineSegment(-1, 0, Point(4, 4))
         self.assertEqual(expect, vectors[0])
 
     def test_getliner2l_line4_vector1_contents_ok(self):
-        vectors = self.scan_qr._get_line_right_to_left(4)
+        vectors = self.scan_qr._get_line_right_to_left(self.todo, 4)
         expect = LineSegment(0, 0, Point(1, 4))
         self.assertEqual(expect, vectors[1])
 
     def test_cleartodo_singlepixel_ok(self):
         to_be_cleared = LineSegment(0, 0, Point(0, 0))
-        self.scan_qr._clear_todo(to_be_cleared)
-        vectors = self.scan_qr._get_line_left_to_right(0)
+        self.scan_qr._clear_todo(self.todo, to_be_cleared)
+        vectors = self.scan_qr._get_line_left_to_right(self.todo, 0)
         self.assertEqual(2, len(vectors))
         self.assertEqual(2, vectors[0].position.x)
         self.assertEqual(3, vectors[1].position.x)
 
     def test_cleartodo_line_horizontal_ok(self):
         to_be_cleared = LineSegment(2, 0, Point(2, 0))
-        self.scan_qr._clear_todo(to_be_cleared)
-        vectors = self.scan_qr._get_line_left_to_right(0)
+        self.scan_qr._clear_todo(self.todo, to_be_cleared)
+        vectors = self.scan_qr._get_line_left_to_right(self.todo, 0)
         self.assertEqual(1, len(vectors))
         self.assertEqual(0, vectors[0].position.x)
 
     def test_cleartodo_fullline_horizontal_ok(self):
         to_be_cleared = LineSegment(5, 0, Point(0, 2))
-        self.scan_qr._clear_todo(to_be_cleared)
-        vectors = self.scan_qr._get_line_left_to_right(2)
+        self.scan_qr._clear_todo(self.todo, to_be_cleared)
+        vectors = self.scan_qr._get_line_left_to_right(self.todo, 2)
         self.assertEqual(0, len(vectors))
 
     def test_cleartodo_line_vertical_ok(self):
         to_be_cleared = LineSegment(0, 3, Point(2, 0))
-        self.scan_qr._clear_todo(to_be_cleared)
-        vectors = self.scan_qr._get_line_left_to_right(0)
+        self.scan_qr._clear_todo(self.todo, to_be_cleared)
+        vectors = self.scan_qr._get_line_left_to_right(self.todo, 0)
         self.assertEqual(2, len(vectors))
         self.assertEqual(0, vectors[0].position.x)
         self.assertEqual(3, vectors[1].position.x)
@@ -239,3 +267,120 @@ class TestScanQr(unittest.TestCase):
         vectors = self.scan_qr.get_vectors()
         self.assertEqual(expect0, vectors[6])
         self.assertEqual(expect1, vectors[7])
+
+
+class TestLinePathMemo(unittest.TestCase):
+    def setUp(self):
+        clear_plan_cache()
+        self.sim_qr = QrValueTable(3)
+        self.sim_qr.table[0, 0] = True
+        self.sim_qr.table[0, 1] = True
+        self.sim_qr.table[2, 2] = True
+
+    def test_getvectors_leaves_input_table_intact(self):
+        before = self.sim_qr.table.copy()
+        LinePath(self.sim_qr).get_vectors()
+        self.assertTrue((before == self.sim_qr.table).all())
+
+    def test_getvectors_same_content_is_not_rescanned(self):
+        expect = LinePath(self.sim_qr).get_vectors()
+        second = LinePath(self.sim_qr.copy())
+        second._get_line_left_to_right = MagicMock()
+        second._get_line_right_to_left = MagicMock()
+        self.assertEqual(expect, second.get_vectors())
+        second._get_line_left_to_right.assert_not_called()
+
+    def test_getvectors_blank_code_is_planned_once(self):
+        path = LinePath(QrValueTable(3))
+        self.assertEqual([], path.get_vectors())
+        path._plan = MagicMock()
+        self.assertEqual([], path.get_vectors())
+        path._plan.assert_not_called()
+
+    def test_getvectors_memo_distinguishes_strategies(self):
+        path = LinePath(self.sim_qr)
+        serpentine = path.get_vectors()
+        path.set_strategy(Strategy.MIN_PLUNGE)
+        path.get_vectors()
+        self.assertEqual(2, len(line_path._plan_cache))
+        path.set_strategy(Strategy.SERPENTINE)
+        self.assertEqual(serpentine, path.get_vectors())
+        self.assertEqual(2, len(line_path._plan_cache))
+
+    def test_getvectors_without_memo(self):
+        memoized = LinePath(self.sim_qr).get_vectors()
+        line_path.clear_plan_cache()
+        self.assertEqual(memoized, LinePath(self.sim_qr).get_vectors(memoize=False))
+        self.assertEqual(0, len(line_path._plan_cache))
+
+    def test_getvectors_returned_list_does_not_alter_memo(self):
+        LinePath(self.sim_qr).get_vectors().clear()
+        self.assertEqual(2, len(LinePath(self.sim_qr).get_vectors()))
+
+    def test_getvectors_changed_segments_do_not_alter_memo(self):
+        expected = [LineSegment(segment.x_length, segment.y_length, Point(segment.position.x, segment.position.y))
+                    for segment in LinePath(self.sim_qr).get_vectors()]
+        for segment in LinePath(self.sim_qr).get_vectors():
+            segment.x_length += 1
+            segment.position.y += 1
+        self.assertEqual(expected, LinePath(self.sim_qr).get_vectors())
+
+    def test_digest_differs_for_different_content(self):
+        other = self.sim_qr.copy()
+        self.assertEqual(self.sim_qr.digest(), other.digest())
+        other.table[1, 1] = True
+        self.assertNotEqual(self.sim_qr.digest(), other.digest())
+
+
+class TestLinePathStream(unittest.TestCase):
+    def setUp(self):
+        clear_plan_cache()
+        self.table = QrValueTable()
+        self.table.set_qr(QrCode.encode_text('schallbert.de', QrCode.Ecc.MEDIUM))
+
+    def test_itervectors_matches_getvectors_for_all_strategies(self):
+        for strategy in (Strategy.SERPENTINE, Strategy.RUN_LENGTH, Strategy.MIN_PLUNGE):
+            streamed = list(LinePath(self.table, strategy).iter_vectors(materialize=False))
+            self.assertEqual(LinePath(self.table, strategy).get_vectors(), streamed)
+
+    def test_itervectors_yields_before_scanning_all_rows(self):
+        path = LinePath(self.table)
+        original = path._get_line_right_to_left
+        path._get_line_right_to_left = MagicMock(side_effect=original)
+        next(path.iter_vectors())
+        path._get_line_right_to_left.assert_not_called()
+        self.assertIsNone(path.get_vector_count())
+
+    def test_interleaved_scans_do_not_share_scratch_state(self):
+        expected = LinePath(self.table).get_vectors()
+        clear_plan_cache()
+        path = LinePath(self.table)
+        first = path.iter_vectors(materialize=False)
+        second = path.iter_vectors(materialize=False)
+        streamed = [next(first), next(first), next(second)]
+        self.assertEqual(expected, path.get_vectors())
+        streamed += list(first)
+        self.assertEqual(expected, streamed[:2] + streamed[3:])
+        self.assertEqual(expected, streamed[2:3] + list(second))
+
+    def test_itervectors_materializes_after_complete_run(self):
+        path = LinePath(self.table)
+        streamed = list(path.iter_vectors())
+        self.assertEqual(len(streamed), path.get_vector_count())
+        path._scan_rows = MagicMock()
+        self.assertEqual(streamed, path.get_vectors())
+        path._scan_rows.assert_not_called()
+
+    def test_itervectors_without_materialize_keeps_nothing(self):
+        path = LinePath(self.table)
+        list(path.iter_vectors(materialize=False))
+        self.assertIsNone(path.get_vector_count())
+        self.assertEqual(0, len(line_path._plan_cache))
+
+    def test_itervectors_stopped_early_does_not_cache_partial_result(self):
+        path = LinePath(self.table)
+        stream = path.iter_vectors()
+        next(stream)
+        stream.close()
+        self.assertIsNone(path.get_vector_count())
+        self.assertEqual(0, len(line_path._plan_cache))
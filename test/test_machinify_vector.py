@@ -1,4 +1,5 @@
 import unittest
+from io import StringIO, BytesIO
 from datetime import timedelta
 from math import tan, pi
 
@@ -7,13 +8,20 @@ from src.platform.machinify_vector import MachinifyVector, Tool, EngraveParams
 from src.platform.vectorize_helper import LineSegment, Point, QrValueTable
 
 
+def engrave(machinify, line_segment):
+    """Emits a single segment with the emitter MachinifyVector writes its program with."""
+    emitter = machinify.get_post_processor().make_emitter(10, machinify._get_xy_move_per_step(), machinify._xy_zero,
+                                                          machinify._engrave_params, machinify._tool)
+    return emitter.segment(line_segment)
+
+
 def set_path_tool(tool):
     # 1 0 1 1 0
     # 0 1 1 0 0
     # 1 1 1 1 1
     # 0 0 0 0 1
     # 0 0 0 1 1
-    sim_qr = QrValueTable()
+    sim_qr = QrValueTable(5)
     sim_qr.table[0, 0] = True
     sim_qr.table[0, 1] = False
     sim_qr.table[0, 2] = True
@@ -106,6 +114,40 @@ class TestMachinify(unittest.TestCase):
         machinify = set_path_tool(t)
         self.assertEqual(timedelta(seconds=7), machinify.get_job_duration_sec())
 
+    def test_duration_repeated_reuses_stats(self):
+        machinify = set_path_tool(Tool())
+        first = machinify.get_job_duration_sec()
+        self.assertEqual(first, machinify.get_job_duration_sec())
+        self.assertEqual(1, machinify.get_stats_recomputed())
+        self.assertEqual(1, machinify.get_stats_reused())
+
+    def test_duration_feed_change_rescales_without_recompute(self):
+        machinify = set_path_tool(Tool(fxy=1000, fz=500))
+        slow = machinify.get_job_duration_sec()
+        machinify.set_tool(Tool(fxy=2000, fz=1000))
+        self.assertEqual(slow / 2, machinify.get_job_duration_sec())
+        self.assertEqual(1, machinify.get_stats_recomputed())
+
+    def test_duration_path_change_recomputes(self):
+        machinify = set_path_tool(Tool())
+        machinify.get_job_duration_sec()
+        machinify.set_stay_down(True)
+        machinify.get_job_duration_sec()
+        machinify.set_qr_path(LinePath(QrValueTable(3)))
+        self.assertEqual(0, machinify.get_plunge_count())
+        self.assertEqual(3, machinify.get_stats_recomputed())
+        self.assertEqual(0, machinify.get_stats_reused())
+
+    def test_polylines_linked_once_per_geometry(self):
+        machinify = set_path_tool(Tool())
+        machinify.set_stay_down(True)
+        polylines = machinify._get_polylines()
+        machinify.get_job_duration_sec()
+        machinify.generate_gcode()
+        self.assertIs(polylines, machinify._get_polylines())
+        machinify.set_qr_path(LinePath(QrValueTable(3)))
+        self.assertEqual([], machinify._get_polylines())
+
     def test_dimensions_no_tool_defined_returns_0(self):
         machinify = MachinifyVector(1.0)
         self.assertEqual(tuple((0, 0)), machinify.get_dimension_info())
@@ -156,39 +198,39 @@ class TestMachinify(unittest.TestCase):
         machinify.set_tool(t)
         machinify.set_engrave_params(EngraveParams(0, 0.5, 5))
         vector = LineSegment(5, 0, Point(0, 0))
-        self.assertTrue('G01 X0.5 F1000\n' in machinify._engrave(vector))
+        self.assertTrue('G01 X0.5 F1000\n' in engrave(machinify, vector))
 
     def test_engrave_length5_tool8mm_returns40mm(self):
         t = Tool(number=1, name='big', dia=8, fxy=1000, fz=500, angle=0, tip=0)
         machinify = set_path_tool(t)
         machinify.set_tool(t)
         vector = LineSegment(5, 0, Point(0, 0))
-        self.assertTrue('G01 X40 F1000\n' in machinify._engrave(vector))
+        self.assertTrue('G01 X40 F1000\n' in engrave(machinify, vector))
 
     def test_engrave_returns_offset_zero_returns_zero(self):
         machinify = set_path_tool(Tool())
         vector = LineSegment(2, 0, Point(0, 0))
-        self.assertTrue('G00 X0 Y0\n' in machinify._engrave(vector))
+        self.assertTrue('G00 X0 Y0\n' in engrave(machinify, vector))
 
     def test_engrave_returns_xypositioning(self):
         machinify = set_path_tool(Tool())
         vector = LineSegment(-5, 0, Point(9, 4))
-        self.assertTrue('G00 X18 Y-8\n' in machinify._engrave(vector))
+        self.assertTrue('G00 X18 Y-8\n' in engrave(machinify, vector))
 
     def test_engrave_returns_g01negz_engrave_param(self):
         machinify = set_path_tool(Tool())
         vector = LineSegment(2, 0, Point(0, 0))
-        self.assertTrue('G01 Z-0.4 F500\n' in machinify._engrave(vector))
+        self.assertTrue('G01 Z-0.4 F500\n' in engrave(machinify, vector))
 
     def test_engrave_returns_linearmovecommand(self):
         machinify = set_path_tool(Tool())
         vector = LineSegment(-5, 0, Point(9, 4))
-        self.assertTrue('G01 X8 F1000\n' in machinify._engrave(vector))
+        self.assertTrue('G01 X8 F1000\n' in engrave(machinify, vector))
 
     def test_engrave_returns_g00z_hover_param(self):
         machinify = set_path_tool(Tool())
         vector = LineSegment(2, 0, Point(0, 0))
-        self.assertTrue('G00 Z0.5\n' in machinify._engrave(vector))
+        self.assertTrue('G00 Z0.5\n' in engrave(machinify, vector))
 
     def test_gcode_engrave_dummyqr_offset_returns_correct_path_offsets(self):
         machinify = set_path_tool(Tool())
@@ -227,6 +269,32 @@ class TestMachinify(unittest.TestCase):
                          'G01 Z-0.4 F500\n'
                          'G00 Z0.5\n', machinify._gcode_engrave())
 
+    def test_write_gcode_matches_generate_gcode(self):
+        machinify = set_path_tool(Tool())
+        file = StringIO()
+        written = machinify.write_gcode(file)
+        self.assertEqual(machinify.generate_gcode().getvalue(), file.getvalue())
+        self.assertEqual(len(file.getvalue()), written)
+
+    def test_write_gcode_binary_file(self):
+        machinify = set_path_tool(Tool())
+        file = BytesIO()
+        machinify.write_gcode(file)
+        self.assertEqual(machinify.generate_gcode().getvalue().encode('ascii'), file.getvalue())
+
+    def test_compact_default_off(self):
+        self.assertFalse(MachinifyVector(1.0).get_compact())
+
+    def test_compact_gcode_engrave_dummyqr_is_shorter(self):
+        machinify = set_path_tool(Tool())
+        full = machinify._gcode_engrave()
+        machinify.set_compact(True)
+        compact = machinify._gcode_engrave()
+        self.assertLess(len(compact), len(full))
+        self.assertEqual(full.count('\n'), compact.count('\n'))
+        self.assertNotIn('F1000\nG01 Y', compact)
+        self.assertTrue(compact.startswith('X0 Y0\nG01 Z-0.4 F500\nG00 Z0.5\nX4\nG01 Z-0.4\nY-4 F1000\n'))
+
     def test_gcode_prepare_sets_correct_tool_number(self):
         tool = Tool(4, 'TestTool', 8, 5200, 2600, 20000)
         engrave_params = EngraveParams(0.5, 1, 10)
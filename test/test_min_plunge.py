@@ -0,0 +1,88 @@
+import unittest
+
+import numpy as np
+from qrcodegen import QrCode
+
+from src.platform.vectorize_helper import QrValueTable, LineSegment, Point
+from src.platform.line_path import LinePath, Strategy
+from src.platform.min_plunge import MinPlungeDecomposer, hopcroft_karp, minimum_vertex_cover
+
+
+def cut_count(segments, size):
+    """Helper function that counts how often each module gets cut."""
+    count = np.zeros((size, size), dtype=int)
+    for segment in segments:
+        xs = sorted((segment.position.x, segment.position.x + segment.x_length))
+        ys = sorted((segment.position.y, segment.position.y + segment.y_length))
+        count[ys[0]:ys[1] + 1, xs[0]:xs[1] + 1] += 1
+    return count
+
+
+class TestHopcroftKarp(unittest.TestCase):
+    def test_matching_empty_graph(self):
+        self.assertEqual(([], []), hopcroft_karp([], 0))
+
+    def test_matching_needs_augmenting_path(self):
+        # left 0 - right 0, 1; left 1 - right 0
+        match_left, match_right = hopcroft_karp([[0, 1], [0]], 2)
+        self.assertEqual([1, 0], match_left)
+        self.assertEqual([1, 0], match_right)
+
+    def test_matching_is_maximum(self):
+        adjacency = [[0, 1], [0], [1, 2], [2]]
+        match_left, _ = hopcroft_karp(adjacency, 3)
+        self.assertEqual(3, sum(match != -1 for match in match_left))
+
+    def test_vertex_cover_size_equals_matching(self):
+        adjacency = [[0, 1, 2], [0], [0]]
+        left_cover, right_cover = minimum_vertex_cover(adjacency, 3)
+        self.assertEqual(2, sum(left_cover) + sum(right_cover))
+        for u, neighbours in enumerate(adjacency):
+            for v in neighbours:
+                self.assertTrue(left_cover[u] or right_cover[v])
+
+
+class TestMinPlungeDecomposer(unittest.TestCase):
+    def setUp(self):
+        # 1 0 1 1 0
+        # 0 1 1 0 0
+        # 1 1 1 1 1
+        # 0 0 0 0 0
+        # 0 1 0 1 1
+        self.sim_qr = QrValueTable(5)
+        self.sim_qr.table[:, :] = np.array([[1, 0, 1, 1, 0],
+                                             [0, 1, 1, 0, 0],
+                                             [1, 1, 1, 1, 1],
+                                             [0, 0, 0, 0, 0],
+                                             [0, 1, 0, 1, 1]], dtype=bool)
+
+    def test_fixture_returns_6segments_in_row_order(self):
+        vectors = LinePath(self.sim_qr, Strategy.MIN_PLUNGE).get_vectors()
+        self.assertEqual([LineSegment(0, 0, Point(0, 0)),
+                          LineSegment(1, 0, Point(2, 0)),
+                          LineSegment(-1, 0, Point(2, 1)),
+                          LineSegment(4, 0, Point(0, 2)),
+                          LineSegment(0, 0, Point(1, 4)),
+                          LineSegment(1, 0, Point(3, 4))], vectors)
+
+    def test_fixture_does_not_modify_table(self):
+        before = self.sim_qr.table.copy()
+        MinPlungeDecomposer(self.sim_qr.table).get_segments()
+        self.assertTrue((before == self.sim_qr.table).all())
+
+    def test_uneven_row_horizontal_runs_right_to_left(self):
+        table = np.zeros((3, 3), dtype=bool)
+        table[1, :] = True
+        self.assertEqual([LineSegment(-2, 0, Point(2, 1))], MinPlungeDecomposer(table).get_segments())
+
+    def test_empty_table_returns_no_segments(self):
+        self.assertEqual([], MinPlungeDecomposer(np.zeros((4, 4), dtype=bool)).get_segments())
+
+    def test_real_codes_cover_exactly_dark_modules_with_fewer_segments(self):
+        for text in ('schallbert.de', 'https://github.com/Schallbert/QR-codengrave', 'A' * 300):
+            table = QrValueTable()
+            table.set_qr(QrCode.encode_text(text, QrCode.Ecc.MEDIUM))
+            greedy = LinePath(table.copy(), Strategy.SERPENTINE).get_vectors()
+            minimal = LinePath(table.copy(), Strategy.MIN_PLUNGE).get_vectors()
+            self.assertTrue((table.table == (cut_count(minimal, table.size) > 0)).all())
+            self.assertLessEqual(len(minimal), len(greedy))
@@ -0,0 +1,89 @@
+import unittest
+from datetime import timedelta
+
+from qrcodegen import QrCode
+
+from src.platform.vectorize_helper import QrValueTable, LineSegment, Point
+from src.platform.line_path import LinePath, Strategy
+from src.platform.machinify_vector import MachinifyVector, Tool, EngraveParams
+from src.platform.path_optimizer import PathOptimizer, get_travel
+
+
+def covered_modules(segments):
+    modules = []
+    for segment in segments:
+        for step in range(abs(segment.x_length + segment.y_length) + 1):
+            dx = step if segment.x_length > 0 else -step if segment.x_length < 0 else 0
+            dy = step if segment.y_length > 0 else -step if segment.y_length < 0 else 0
+            modules.append((segment.position.x + dx, segment.position.y + dy))
+    return sorted(modules)
+
+
+def plan_qr(text):
+    table = QrValueTable()
+    table.set_qr(QrCode.encode_text(text, QrCode.Ecc.MEDIUM))
+    return LinePath(table, Strategy.RUN_LENGTH).get_vectors()
+
+
+class TestPathOptimizer(unittest.TestCase):
+    def test_get_travel_starts_at_origin(self):
+        segments = [LineSegment(2, 0, Point(3, 4)), LineSegment(0, 0, Point(5, 4))]
+        self.assertEqual(5, get_travel(segments))
+
+    def test_optimize_empty_list_returns_empty(self):
+        optimizer = PathOptimizer()
+        self.assertEqual([], optimizer.optimize([]))
+        self.assertEqual(0, optimizer.get_travel_saved())
+
+    def test_optimize_flips_segment_pointing_away(self):
+        segments = [LineSegment(-4, 0, Point(4, 0))]
+        result = PathOptimizer().optimize(segments)
+        self.assertEqual([LineSegment(4, 0, Point(0, 0))], result)
+
+    def test_optimize_reorders_far_segment(self):
+        segments = [LineSegment(0, 0, Point(9, 0)), LineSegment(0, 0, Point(1, 0)), LineSegment(0, 0, Point(10, 0))]
+        result = PathOptimizer().optimize(segments)
+        self.assertEqual([Point(1, 0), Point(9, 0), Point(10, 0)], [segment.position for segment in result])
+
+    def test_optimize_does_not_modify_input(self):
+        segments = [LineSegment(-4, 0, Point(4, 0)), LineSegment(0, 2, Point(0, 3))]
+        PathOptimizer().optimize(segments)
+        self.assertEqual([LineSegment(-4, 0, Point(4, 0)), LineSegment(0, 2, Point(0, 3))], segments)
+
+    def test_optimize_real_code_keeps_modules_and_reduces_travel(self):
+        segments = plan_qr('https://github.com/Schallbert/QR-codengrave')
+        optimizer = PathOptimizer(time_budget_sec=0.2)
+        result = optimizer.optimize(segments)
+        self.assertEqual(covered_modules(segments), covered_modules(result))
+        self.assertLess(optimizer.get_travel_after(), optimizer.get_travel_before())
+        self.assertAlmostEqual(get_travel(result), optimizer.get_travel_after())
+        self.assertAlmostEqual(get_travel(segments), optimizer.get_travel_before())
+
+    def test_optimize_zero_budget_still_returns_nearest_neighbour_tour(self):
+        segments = plan_qr('schallbert.de')
+        optimizer = PathOptimizer(time_budget_sec=0)
+        result = optimizer.optimize(segments)
+        self.assertEqual(len(segments), len(result))
+        self.assertGreater(optimizer.get_travel_saved(), 0)
+
+
+class TestTravelSavings(unittest.TestCase):
+    def setUp(self):
+        table = QrValueTable()
+        table.set_qr(QrCode.encode_text('schallbert.de', QrCode.Ecc.MEDIUM))
+        self.table = table
+        self.machinify = MachinifyVector(1.2)
+        self.machinify.set_tool(Tool(dia=2, fxy=1000))
+        self.machinify.set_engrave_params(EngraveParams())
+        self.machinify.set_xy_zero(Point(0, 0))
+
+    def test_savings_without_optimizer_returns_0(self):
+        self.machinify.set_qr_path(LinePath(self.table))
+        self.assertEqual(tuple((0, timedelta(0))), self.machinify.get_travel_savings())
+
+    def test_savings_with_optimizer_reports_mm_and_seconds(self):
+        optimizer = PathOptimizer(time_budget_sec=0.1)
+        self.machinify.set_qr_path(LinePath(self.table, optimizer=optimizer))
+        saved_mm, saved_time = self.machinify.get_travel_savings()
+        self.assertAlmostEqual(optimizer.get_travel_saved() * 2, saved_mm)
+        self.assertAlmostEqual(saved_mm / 1000 * 60 * 1.6, saved_time.total_seconds(), places=5)
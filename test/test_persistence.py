@@ -0,0 +1,115 @@
+import os
+import pickle
+import tempfile
+import time
+import unittest
+
+from src.helpers.persistence import Persistence, WRITE_DELAY
+from src.platform.machinify_vector import Tool, ToolList, EngraveParams
+from src.platform.vectorize_helper import Point
+
+
+def read_file():
+    with open(Persistence.get_path(), 'rb') as file:
+        return pickle.load(file)
+
+
+class TestPersistence(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self._path = Persistence.get_path()
+        Persistence.set_path(os.path.join(self._directory.name, 'persistence.dat'))
+        Persistence.set_write_delay(60)
+
+    def tearDown(self):
+        Persistence.set_write_delay(WRITE_DELAY)
+        Persistence.set_path(self._path)
+        self._directory.cleanup()
+
+    def test_preload_reads_file_for_load(self):
+        tool_list = ToolList()
+        tool_list.add_or_update(Tool(number=7))
+        with open(Persistence.get_path(), 'wb') as file:
+            pickle.dump([tool_list, EngraveParams(0.2), Point(1, 2)], file, protocol=2)
+        Persistence.preload()
+        os.remove(Persistence.get_path())
+        self.assertTrue(Persistence.load(ToolList()).is_tool_in_list(7))
+        self.assertEqual(EngraveParams(0.2), Persistence.load(EngraveParams()))
+        self.assertEqual(2, Persistence.load(Point()).y)
+
+    def test_preload_leaves_missing_file_to_load(self):
+        Persistence.preload()
+        self.assertFalse(Persistence._has_loaded)
+
+    def test_save_is_written_on_flush(self):
+        writes = Persistence.get_write_count()
+        Persistence.save(Point(3, 4))
+        self.assertTrue(Persistence.is_dirty())
+        self.assertFalse(os.path.exists(Persistence.get_path()))
+        Persistence.flush()
+        self.assertFalse(Persistence.is_dirty())
+        self.assertEqual(3, read_file()[2].x)
+        self.assertEqual(writes + 1, Persistence.get_write_count())
+        self.assertEqual(['persistence.dat'], os.listdir(self._directory.name))
+
+    def test_saves_within_delay_are_coalesced(self):
+        writes = Persistence.get_write_count()
+        coalesced = Persistence.get_coalesced_count()
+        for x in range(5):
+            Persistence.save(Point(x, 0))
+        Persistence.flush()
+        self.assertEqual(writes + 1, Persistence.get_write_count())
+        self.assertEqual(coalesced + 4, Persistence.get_coalesced_count())
+        self.assertEqual(4, read_file()[2].x)
+
+    def test_unchanged_saves_are_not_written(self):
+        Persistence.save(EngraveParams(0.3))
+        Persistence.flush()
+        writes = Persistence.get_write_count()
+        avoided = Persistence.get_writes_avoided()
+        Persistence.save(EngraveParams(0.3))
+        Persistence.save(Persistence.load(ToolList()))
+        self.assertFalse(Persistence.is_dirty())
+        self.assertEqual(avoided + 2, Persistence.get_writes_avoided())
+        Persistence.flush()
+        self.assertEqual(writes, Persistence.get_write_count())
+
+    def test_file_contents_count_as_written(self):
+        with open(Persistence.get_path(), 'wb') as file:
+            pickle.dump([ToolList(), EngraveParams(), Point(5, 6)], file, protocol=2)
+        Persistence.load(Point())
+        Persistence.save(Point(5, 6))
+        self.assertFalse(Persistence.is_dirty())
+
+    def test_save_takes_a_snapshot(self):
+        point = Point(1, 1)
+        Persistence.save(point)
+        point.x = 9
+        Persistence.flush()
+        self.assertEqual(1, read_file()[2].x)
+
+    def test_written_in_background_after_delay(self):
+        Persistence.set_write_delay(0.01)
+        Persistence.save(Point(7, 8))
+        deadline = time.monotonic() + 5
+        while Persistence.is_dirty() and time.monotonic() < deadline:
+            time.sleep(0.005)
+        self.assertFalse(Persistence.is_dirty())
+        self.assertEqual(8, read_file()[2].y)
+
+    def test_no_delay_writes_within_save(self):
+        Persistence.set_write_delay(0)
+        Persistence.save(Point(2, 2))
+        self.assertFalse(Persistence.is_dirty())
+        self.assertEqual(2, read_file()[2].x)
+
+    def test_failed_write_stays_pending(self):
+        path = Persistence.get_path()
+        Persistence.set_path(os.path.join(self._directory.name, 'missing', 'persistence.dat'))
+        Persistence.save(Point(1, 2))
+        with self.assertRaises(OSError):
+            Persistence.flush()
+        self.assertTrue(Persistence.is_dirty())
+        Persistence._path = path
+        Persistence.flush()
+        self.assertEqual(2, read_file()[2].y)
@@ -0,0 +1,123 @@
+import unittest
+from datetime import timedelta
+from unittest.mock import patch
+
+from src.platform.line_path import Strategy
+from src.platform.machinify_vector import MachinifyVector, Tool, EngraveParams
+from src.platform.plate_job import PlateJob
+from src.platform.subprogram import SubprogramDialect
+from src.platform.vectorize_helper import Point
+
+TEXTS = ['schallbert.de', 'ASSET-000001', 'ASSET-000002', 'x']
+
+
+def make_plate(width=90, height=80):
+    plate = PlateJob(1.2, width, height)
+    plate.set_tool(Tool(dia=1))
+    plate.set_engrave_params(EngraveParams())
+    plate.set_xy_zero(Point(10, -5))
+    plate.set_texts(TEXTS)
+    return plate
+
+
+class TestPlateJob(unittest.TestCase):
+    def test_report_data_missing_no_texts(self):
+        plate = make_plate()
+        plate.set_texts([])
+        self.assertEqual('QR-code data', plate.report_data_missing())
+        plate.set_texts(TEXTS)
+        self.assertEqual('', plate.report_data_missing())
+
+    def test_grid_layout_fills_rows(self):
+        offsets = [(offset.x, offset.y) for _, offset in make_plate().get_placements()]
+        self.assertEqual([(2, -2), (28, -2), (54, -2), (2, -28)], offsets)
+
+    def test_grid_layout_does_not_fit_raises(self):
+        with self.assertRaises(ValueError):
+            make_plate(40, 40).get_placements()
+
+    def test_fixtures_place_codes(self):
+        plate = make_plate()
+        fixtures = [Point(0, -50), Point(30, -50), Point(60, -50), Point(60, -20)]
+        plate.set_fixtures(fixtures)
+        self.assertEqual(fixtures, [offset for _, offset in plate.get_placements()])
+
+    def test_fixtures_too_few_or_outside_raise(self):
+        plate = make_plate()
+        plate.set_fixtures([Point(0, 0)])
+        with self.assertRaises(ValueError):
+            plate.get_placements()
+        plate.set_fixtures([Point(0, 0), Point(0, -30), Point(0, -60), Point(100, 0)])
+        with self.assertRaises(ValueError):
+            plate.get_placements()
+
+    def test_codes_ordered_by_nearest_neighbour(self):
+        codes = make_plate().get_codes()
+        self.assertEqual(['schallbert_de', 'x', 'ASSET-000001', 'ASSET-000002'],
+                         [code.get_project_name() for code in codes])
+
+    def test_codes_reused_until_settings_change(self):
+        plate = make_plate()
+        codes = plate.get_codes()
+        plate.get_job_duration_sec()
+        plate.generate_gcode()
+        self.assertEqual([id(code) for code in codes], [id(code) for code in plate.get_codes()])
+        plate.set_texts(TEXTS[:2])
+        self.assertEqual(2, len(plate.get_codes()))
+        codes = plate.get_codes()
+        plate.set_tool(Tool(dia=1.5))
+        self.assertIsNot(codes[0], plate.get_codes()[0])
+        codes = plate.get_codes()
+        plate.set_xy_zero(Point(0, 0))
+        self.assertIsNot(codes[0], plate.get_codes()[0])
+
+    def test_texts_encoded_once_until_they_change(self):
+        plate = make_plate()
+        with patch.object(plate, '_make_paths', wraps=plate._make_paths) as make_paths:
+            plate.get_placements()
+            plate.get_dimension_info()
+            plate.get_codes()
+            plate.set_tool(Tool(dia=1.5))
+            plate.get_job_duration_sec()
+            self.assertTrue(plate.verify_gcode().is_ok())
+            self.assertEqual(1, make_paths.call_count)
+            plate.set_texts(TEXTS[1:])
+            plate.get_placements()
+            plate.set_strategy(Strategy.MIN_PLUNGE)
+            plate.get_dimension_info()
+            self.assertEqual(3, make_paths.call_count)
+
+    def test_gcode_has_one_tool_change_and_spindle_start(self):
+        gcode = make_plate().generate_gcode().getvalue()
+        self.assertEqual(1, gcode.count('M06'))
+        self.assertEqual(1, gcode.count('M03'))
+        self.assertEqual(1, gcode.count('M30'))
+        self.assertEqual(4, gcode.count('(Code '))
+
+    def test_gcode_contains_each_code(self):
+        plate = make_plate()
+        gcode = plate.generate_gcode().getvalue()
+        for code in plate.get_codes():
+            self.assertIn(code._gcode_engrave(), gcode)
+
+    def test_stay_down_moves_to_first_polyline(self):
+        plate = make_plate()
+        plate.set_stay_down(True)
+        for code in plate.get_codes():
+            start = plate._get_start_mm(code)
+            self.assertTrue(code._gcode_engrave().startswith('G00 X{} Y{}\n'.format(*start)))
+            last = code._get_polylines()[-1][-1]
+            self.assertEqual(plate._to_mm(code, last.position, last.x_length, last.y_length), plate._get_end_mm(code))
+
+    def test_duration_exceeds_sum_of_codes(self):
+        plate = make_plate()
+        codes = sum((code.get_job_duration_sec() for code in plate.get_codes()), timedelta(0))
+        self.assertGreater(plate.get_job_duration_sec(), codes)
+        self.assertEqual(sum(code.get_plunge_count() for code in plate.get_codes()), plate.get_plunge_count())
+
+    def test_subprograms_not_supported(self):
+        with self.assertRaises(ValueError):
+            make_plate().set_subprogram_dialect(SubprogramDialect.M98)
+
+    def test_is_a_machinify_vector(self):
+        self.assertIsInstance(make_plate(), MachinifyVector)
@@ -0,0 +1,152 @@
+import unittest
+from io import StringIO
+
+from qrcodegen import QrCode
+
+from src.platform.vectorize_helper import QrValueTable, LineSegment, Point
+from src.platform.line_path import LinePath
+from src.platform.machinify_vector import MachinifyVector, Tool, EngraveParams
+from src.platform.gcode_emitter import GcodeEmitter, CompactGcodeEmitter, CannedCycleEmitter
+from src.platform.subprogram import SubprogramDialect
+from src.platform.postprocessor.post_processor import PostProcessor
+from src.platform.postprocessor.grbl import GrblPostProcessor
+from src.platform.postprocessor.linuxcnc import LinuxCncPostProcessor
+from src.platform.postprocessor.fanuc import FanucPostProcessor
+from src.platform.postprocessor.dialects import PostDialect, make_post_processor
+
+
+def make_machinify(post_processor=None, text='schallbert.de'):
+    table = QrValueTable()
+    table.set_qr(QrCode.encode_text(text, QrCode.Ecc.MEDIUM))
+    machinify = MachinifyVector(1.2)
+    machinify.set_qr_path(LinePath(table))
+    machinify.set_tool(Tool(dia=1))
+    machinify.set_engrave_params(EngraveParams())
+    machinify.set_xy_zero(Point(3, -2))
+    machinify.set_project_name(text)
+    if post_processor is not None:
+        machinify.set_post_processor(post_processor)
+    return machinify
+
+
+def lines_of(machinify):
+    return machinify.generate_gcode().getvalue().split('\n')
+
+
+class TestPostProcessor(unittest.TestCase):
+    def test_default_is_post_processor(self):
+        machinify = MachinifyVector(1.0)
+        self.assertIs(PostProcessor, type(machinify.get_post_processor()))
+        self.assertEqual('.tap', machinify.get_post_processor().get_file_extension())
+
+    def test_default_prepare_is_unchanged(self):
+        prepare = PostProcessor().prepare(Tool(), EngraveParams(), Point(3, -2))
+        self.assertEqual('G90 \nMSG "Tool: 01_Default_2mm"\nT1 M06 \nM03 S24000\nG00 Z5\n\n'
+                         'G00 Y0 X0 \nG00 X3 Y-2 \nG00 Z0.5\n\n', prepare)
+
+    def test_strip_comments(self):
+        gcode = make_machinify(PostProcessor(strip_comments=True)).generate_gcode().getvalue()
+        self.assertNotIn('(', gcode)
+        self.assertNotIn('\n\n', gcode)
+
+    def test_make_post_processor(self):
+        self.assertIsInstance(make_post_processor(PostDialect.GRBL), GrblPostProcessor)
+        self.assertIsInstance(make_post_processor(PostDialect.FANUC, program_number=7), FanucPostProcessor)
+        with self.assertRaises(ValueError):
+            make_post_processor(42)
+
+    def test_unsupported_subprograms_raise(self):
+        machinify = make_machinify(GrblPostProcessor())
+        machinify.set_subprogram_dialect(SubprogramDialect.M98)
+        with self.assertRaises(ValueError):
+            machinify.write_gcode(StringIO())
+
+
+class TestGrblPostProcessor(unittest.TestCase):
+    def test_lines_fit_grbl_buffer(self):
+        machinify = make_machinify(GrblPostProcessor(), 'https://schallbert.de/' + 'x' * 100)
+        for line in lines_of(machinify):
+            self.assertLess(len(line), GrblPostProcessor.max_line_length)
+            self.assertFalse(line.endswith(' '))
+
+    def test_no_unsupported_commands(self):
+        gcode = make_machinify(GrblPostProcessor()).generate_gcode().getvalue()
+        for word in ('MSG', 'M06', 'G81', '\n\n'):
+            self.assertNotIn(word, gcode)
+
+    def test_nested_comment_removed(self):
+        self.assertEqual('(a b)\n', GrblPostProcessor().comment('a (b)'))
+
+
+class TestLinuxCncPostProcessor(unittest.TestCase):
+    def test_message_and_extension(self):
+        machinify = make_machinify(LinuxCncPostProcessor())
+        self.assertIn('(MSG, Tool: 01_Default_1mm)', lines_of(machinify))
+        self.assertEqual('.ngc', machinify.get_post_processor().get_file_extension())
+
+    def test_o_call_only(self):
+        post = LinuxCncPostProcessor()
+        self.assertTrue(post.supports_subprograms(SubprogramDialect.O_CALL))
+        self.assertFalse(post.supports_subprograms(SubprogramDialect.M98))
+
+    def test_canned_cycles_shorten_program(self):
+        canned = make_machinify(LinuxCncPostProcessor()).generate_gcode().getvalue()
+        plain = make_machinify(LinuxCncPostProcessor(canned_cycles=False)).generate_gcode().getvalue()
+        self.assertLess(len(canned), len(plain))
+        self.assertEqual(canned.count('G81'), canned.count('G80'))
+
+
+class TestFanucPostProcessor(unittest.TestCase):
+    def test_program_delimiters(self):
+        lines = lines_of(make_machinify(FanucPostProcessor(program_number=12)))
+        self.assertEqual('%', lines[0])
+        self.assertEqual('O0012 (SCHALLBERT_DE)', lines[1])
+        self.assertEqual(['%', ''], lines[-2:])
+
+    def test_coordinates_have_decimal_point(self):
+        post = FanucPostProcessor()
+        self.assertEqual('3.', post.number(3))
+        self.assertEqual('-0.4', post.number(-0.4))
+        self.assertEqual('0.', post.number(0.00001))
+        self.assertEqual('0.0001', post.number(1e-4))
+        self.assertEqual('0.', post.number(-1e-6))
+        self.assertEqual('120000000.', post.number(1.2e8))
+        for line in lines_of(make_machinify(post)):
+            for word in line.split():
+                if word[0] in 'XYZR' and word[1:] != '0':
+                    self.assertIn('.', word)
+
+    def test_subprograms_before_end_delimiter(self):
+        machinify = make_machinify(FanucPostProcessor(), 'https://github.com/Schallbert/QR-codengrave')
+        machinify.set_subprogram_dialect(SubprogramDialect.M98)
+        gcode = machinify.generate_gcode().getvalue()
+        self.assertLess(gcode.index('M30'), gcode.index('O1001'))
+        self.assertTrue(gcode.endswith('M99\n%\n'))
+
+
+class TestCannedCycleEmitter(unittest.TestCase):
+    def setUp(self):
+        self.dots = [LineSegment(0, 0, Point(1, 0)), LineSegment(0, 0, Point(2, 1))]
+        self.line = LineSegment(2, 0, Point(0, 2))
+
+    def emit(self, emitter_class):
+        emitter = CannedCycleEmitter(emitter_class(3, 1, Point(0, 0), EngraveParams(), Tool()), EngraveParams(), Tool())
+        return ''.join([emitter.segment(dot) for dot in self.dots] + [emitter.segment(self.line), emitter.finish()])
+
+    def test_dots_use_cycle(self):
+        self.assertEqual('G99 G81 X1 Y0 Z-0.4 R0.5 F500\n'
+                         'X2 Y-1\n'
+                         'G80\n'
+                         'G00 X0 Y-2\nG01 Z-0.4 F500\nG01 X2 F1000\nG00 Z0.5\n', self.emit(GcodeEmitter))
+
+    def test_compact_state_reset_after_cycle(self):
+        self.assertEqual('G99 G81 X1 Y0 Z-0.4 R0.5 F500\n'
+                         'X2 Y-1\n'
+                         'G80\n'
+                         'G00 X0 Y-2\nG01 Z-0.4 F500\nX2 F1000\nG00 Z0.5\n', self.emit(CompactGcodeEmitter))
+
+    def test_finish_cancels_running_cycle(self):
+        emitter = CannedCycleEmitter(GcodeEmitter(3, 1, Point(0, 0), EngraveParams(), Tool()), EngraveParams(), Tool())
+        emitter.segment(self.dots[0])
+        self.assertEqual('G80\n', emitter.finish())
+        self.assertEqual('', emitter.finish())
@@ -0,0 +1,92 @@
+import unittest
+
+import numpy as np
+from qrcodegen import QrCode
+
+from src.platform.vectorize_helper import QrValueTable, LineSegment, Point
+from src.platform.line_path import LinePath, Strategy
+from src.platform.run_length import RunLengthScanner, find_runs, vertical_run_ends
+
+
+def make_table(rows):
+    table = QrValueTable(len(rows))
+    table.table[:, :] = np.array(rows, dtype=bool)
+    return table
+
+
+def plan(table, strategy):
+    return LinePath(table.copy(), strategy).get_vectors()
+
+
+class TestRunLengthHelpers(unittest.TestCase):
+    def test_find_runs_returns_inclusive_bounds(self):
+        starts, ends = find_runs(np.array([1, 1, 0, 1, 0, 1, 1, 1], dtype=bool))
+        self.assertEqual([0, 3, 5], starts.tolist())
+        self.assertEqual([1, 3, 7], ends.tolist())
+
+    def test_find_runs_empty_line_returns_no_runs(self):
+        starts, ends = find_runs(np.zeros(4, dtype=bool))
+        self.assertEqual(0, len(starts))
+        self.assertEqual(0, len(ends))
+
+    def test_vertical_run_ends_dark_modules(self):
+        table = np.array([[1, 0], [1, 1], [0, 1]], dtype=bool)
+        ends = vertical_run_ends(np.pad(table, ((0, 0), (0, 1))))
+        self.assertEqual(1, ends[0, 0])
+        self.assertEqual(1, ends[1, 0])
+        self.assertEqual(2, ends[1, 1])
+
+
+class TestRunLengthScanner(unittest.TestCase):
+    def setUp(self):
+        # 1 0 1 1 0
+        # 0 1 1 0 0
+        # 1 1 1 1 1
+        # 0 0 0 0 0
+        # 0 1 0 1 1
+        self.sim_qr = make_table([[1, 0, 1, 1, 0],
+                                  [0, 1, 1, 0, 0],
+                                  [1, 1, 1, 1, 1],
+                                  [0, 0, 0, 0, 0],
+                                  [0, 1, 0, 1, 1]])
+
+    def test_rowoutofrange_returns_0vectors(self):
+        scanner = RunLengthScanner(self.sim_qr.table)
+        self.assertEqual([], scanner.scan_row(5))
+
+    def test_scanrow_line0_matches_serpentine(self):
+        scanner = RunLengthScanner(self.sim_qr.table)
+        expect = [LineSegment(0, 0, Point(0, 0)), LineSegment(0, 2, Point(2, 0)), LineSegment(0, 0, Point(3, 0))]
+        self.assertEqual(expect, scanner.scan_row(0))
+
+    def test_scanrow_line1_reverse_skips_cleared_module(self):
+        scanner = RunLengthScanner(self.sim_qr.table)
+        scanner.scan_row(0)
+        self.assertEqual([LineSegment(0, 1, Point(1, 1))], scanner.scan_row(1))
+
+    def test_scanrow_does_not_modify_table(self):
+        before = self.sim_qr.table.copy()
+        scanner = RunLengthScanner(self.sim_qr.table)
+        for row in range(5):
+            scanner.scan_row(row)
+        self.assertTrue((before == self.sim_qr.table).all())
+
+    def test_getvectors_fixture_matches_serpentine(self):
+        self.assertEqual(plan(self.sim_qr, Strategy.SERPENTINE), plan(self.sim_qr, Strategy.RUN_LENGTH))
+
+    def test_getvectors_random_tables_match_serpentine(self):
+        generator = np.random.default_rng(7)
+        for size in (1, 2, 5, 8, 13):
+            for density in (0.2, 0.5, 0.8):
+                table = make_table(generator.random((size, size)) < density)
+                self.assertEqual(plan(table, Strategy.SERPENTINE), plan(table, Strategy.RUN_LENGTH))
+
+    def test_getvectors_real_codes_match_serpentine(self):
+        for text in ('schallbert.de', 'https://github.com/Schallbert/QR-codengrave', 'A' * 300):
+            table = QrValueTable()
+            table.set_qr(QrCode.encode_text(text, QrCode.Ecc.MEDIUM))
+            self.assertEqual(plan(table, Strategy.SERPENTINE), plan(table, Strategy.RUN_LENGTH))
+
+    def test_getvectors_returns_plain_ints(self):
+        vectors = plan(self.sim_qr, Strategy.RUN_LENGTH)
+        self.assertTrue(all(type(v.x_length) is int and type(v.position.x) is int for v in vectors))
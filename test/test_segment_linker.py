@@ -0,0 +1,115 @@
+import unittest
+
+from qrcodegen import QrCode
+
+from src.platform.vectorize_helper import QrValueTable, LineSegment, Point
+from src.platform.line_path import LinePath
+from src.platform.machinify_vector import MachinifyVector, Tool, EngraveParams
+from src.platform.segment_linker import SegmentLinker
+
+
+def make_table(rows):
+    table = QrValueTable(len(rows))
+    for y, row in enumerate(rows):
+        for x, value in enumerate(row):
+            table.table[y, x] = value == '#'
+    return table
+
+
+def covered_modules(segments):
+    modules = []
+    for segment in segments:
+        for step in range(abs(segment.x_length + segment.y_length) + 1):
+            dx = step if segment.x_length > 0 else -step if segment.x_length < 0 else 0
+            dy = step if segment.y_length > 0 else -step if segment.y_length < 0 else 0
+            modules.append((segment.position.x + dx, segment.position.y + dy))
+    return sorted(modules)
+
+
+def connectors_are_dark(table, polylines):
+    for polyline in polylines:
+        for before, after in zip(polyline, polyline[1:]):
+            end_x = before.position.x + before.x_length
+            end_y = before.position.y + before.y_length
+            box = table.table[min(end_y, after.position.y):max(end_y, after.position.y) + 1,
+                              min(end_x, after.position.x):max(end_x, after.position.x) + 1]
+            if not box.all():
+                return False
+    return True
+
+
+class TestSegmentLinker(unittest.TestCase):
+    def test_is_linkable_dark_line_returns_true(self):
+        linker = SegmentLinker(make_table(['###', '...', '...']))
+        self.assertTrue(linker.is_linkable(0, 0, 2, 0))
+
+    def test_is_linkable_light_module_between_returns_false(self):
+        linker = SegmentLinker(make_table(['#.#', '...', '...']))
+        self.assertFalse(linker.is_linkable(0, 0, 2, 0))
+
+    def test_is_linkable_diagonal_needs_both_corners(self):
+        self.assertTrue(SegmentLinker(make_table(['##.', '##.', '...'])).is_linkable(0, 0, 1, 1))
+        self.assertFalse(SegmentLinker(make_table(['#..', '##.', '...'])).is_linkable(0, 0, 1, 1))
+
+    def test_iter_polylines_keeps_order_and_splits_on_light_modules(self):
+        table = make_table(['#.#', '#.#', '###'])
+        segments = [LineSegment(0, 2, Point(0, 0)), LineSegment(2, 0, Point(0, 2)), LineSegment(0, -2, Point(2, 2)),
+                    LineSegment(0, 0, Point(0, 0))]
+        polylines = list(SegmentLinker(table).iter_polylines(segments))
+        self.assertEqual([segments[:3], segments[3:]], polylines)
+
+    def test_chain_reverses_segment_to_link(self):
+        table = make_table(['###', '...', '###'])
+        segments = [LineSegment(2, 0, Point(0, 0)), LineSegment(2, 0, Point(0, 2))]
+        chained = SegmentLinker(table).chain(segments)
+        self.assertEqual(LineSegment(-2, 0, Point(2, 2)), chained[1])
+
+    def test_chain_prefers_linkable_over_closer_segment(self):
+        table = make_table(['##.#', '.#..', '.#..', '....'])
+        segments = [LineSegment(1, 0, Point(0, 0)), LineSegment(0, 0, Point(3, 0)), LineSegment(0, 1, Point(1, 1))]
+        chained = SegmentLinker(table).chain(segments)
+        self.assertEqual(segments[2], chained[1])
+
+    def test_link_real_qr_covers_same_modules_with_fewer_plunges(self):
+        table = QrValueTable()
+        table.set_qr(QrCode.encode_text('https://schallbert.de', QrCode.Ecc.HIGH))
+        segments = LinePath(table).get_vectors()
+        polylines = SegmentLinker(table).link(segments)
+        linked = [segment for polyline in polylines for segment in polyline]
+        self.assertEqual(covered_modules(segments), covered_modules(linked))
+        self.assertTrue(connectors_are_dark(table, polylines))
+        self.assertLess(len(polylines), 0.8 * len(segments))
+
+
+class TestMachinifyStayDown(unittest.TestCase):
+    def setUp(self):
+        self.table = make_table(['#.##.', '.##..', '#####', '....#', '...##'])
+        self.machinify = MachinifyVector(1.1)
+        self.machinify.set_tool(Tool())
+        self.machinify.set_qr_path(LinePath(self.table))
+        self.machinify.set_xy_zero(Point(0, 0))
+        self.machinify.set_engrave_params(EngraveParams())
+
+    def test_stay_down_default_off(self):
+        self.assertFalse(self.machinify.get_stay_down())
+        self.assertEqual(8, self.machinify.get_plunge_count())
+
+    def test_stay_down_reduces_plunges_and_duration(self):
+        duration = self.machinify.get_job_duration_sec()
+        self.machinify.set_stay_down(True)
+        self.assertEqual(3, self.machinify.get_plunge_count())
+        self.assertLess(self.machinify.get_job_duration_sec(), duration)
+
+    def test_stay_down_gcode_plunges_once_per_polyline(self):
+        self.machinify.set_stay_down(True)
+        engrave = self.machinify._gcode_engrave()
+        self.assertEqual(3, engrave.count('G01 Z-0.4 F500\n'))
+        self.assertEqual(3, engrave.count('G00 Z0.5\n'))
+        self.assertEqual('G00 X2 Y-2\n'
+                         'G01 Z-0.4 F500\n'
+                         'G01 Y-4 F1000\n'
+                         'G01 X0 Y-4 F1000\n'
+                         'G01 X4 Y-4 F1000\n'
+                         'G01 Y0 F1000\n'
+                         'G01 X6 Y0 F1000\n'
+                         'G00 Z0.5\n', engrave.split('G00 Z0.5\n', 1)[1].split('G00 X6 Y-4')[0])
@@ -0,0 +1,35 @@
+import sys
+import unittest
+
+from src.helpers.startup_report import StartupReport
+
+
+class TestStartupReport(unittest.TestCase):
+    def test_phases_are_timed_in_order(self):
+        report = StartupReport()
+        first = report.mark('first')
+        second = report.mark('second')
+        self.assertEqual(['first', 'second'], [phase.name for phase in report.get_phases()])
+        self.assertGreaterEqual(first.seconds, 0)
+        self.assertAlmostEqual(first.seconds + second.seconds, second.elapsed)
+        self.assertEqual(second.elapsed, report.get_elapsed('second'))
+        self.assertIsNone(report.get_elapsed('third'))
+
+    def test_imported_modules_are_listed(self):
+        sys.modules.pop('colorsys', None)
+        report = StartupReport()
+        import colorsys  # noqa: F401
+        phase = report.mark('import colorsys')
+        self.assertEqual(['colorsys'], phase.modules)
+        self.assertEqual([], report.mark('nothing').modules)
+        self.assertIn('| import colorsys (colorsys)', report.format())
+
+    def test_gui_defers_the_platform_layer(self):
+        import subprocess
+        script = 'import sys, src.gui.gui; print(any(m.startswith(("src.platform", "numpy", "turtle")) ' \
+                 'for m in sys.modules))'
+        try:
+            output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True)
+        except subprocess.CalledProcessError as error:
+            self.skipTest(error.stderr)
+        self.assertEqual('False', output.stdout.strip())
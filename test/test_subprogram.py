@@ -0,0 +1,155 @@
+import unittest
+from io import StringIO
+
+from qrcodegen import QrCode
+
+from src.platform.vectorize_helper import QrValueTable, LineSegment, Point
+from src.platform.line_path import LinePath, Strategy
+from src.platform.machinify_vector import MachinifyVector, Tool, EngraveParams
+from src.platform.gcode_emitter import SubprogramEmitter
+from src.platform.subprogram import SubprogramDialect, SubprogramPlanner, SubprogramCall, Cluster, \
+    function_pattern_regions
+
+
+def make_table(version):
+    qr = QrCode.encode_segments([], QrCode.Ecc.LOW, minversion=version, maxversion=version)
+    table = QrValueTable()
+    table.set_qr(qr)
+    return table
+
+
+def covered_modules(segments):
+    modules = set()
+    for segment in segments:
+        for step in range(abs(segment.x_length + segment.y_length) + 1):
+            dx = step if segment.x_length > 0 else -step if segment.x_length < 0 else 0
+            dy = step if segment.y_length > 0 else -step if segment.y_length < 0 else 0
+            modules.add((segment.position.x + dx, segment.position.y + dy))
+    return modules
+
+
+class TestFunctionPatternRegions(unittest.TestCase):
+    def test_no_qr_size_returns_empty(self):
+        self.assertEqual([], function_pattern_regions(5))
+        self.assertEqual([], function_pattern_regions(22))
+
+    def test_version1_has_finders_only(self):
+        self.assertEqual([(0, 0, 7), (14, 0, 7), (0, 14, 7)], function_pattern_regions(21))
+
+    def test_version7_alignment_patterns(self):
+        regions = function_pattern_regions(45)
+        self.assertEqual(3 + 6, len(regions))
+        self.assertIn((20, 20, 5), regions)
+        self.assertIn((36, 36, 5), regions)
+        self.assertNotIn((36, 4, 5), regions)  # would overlap the top right finder pattern
+
+    def test_regions_are_identical_in_real_code(self):
+        table = make_table(10)
+        contents = set()
+        for x, y, width in function_pattern_regions(table.size):
+            if width == 5:
+                contents.add(table.table[y:y + width, x:x + width].tobytes())
+        self.assertEqual(1, len(contents))
+
+
+class TestSubprogramPlanner(unittest.TestCase):
+    def test_small_table_has_no_clusters(self):
+        table = QrValueTable(5)
+        table.table[2, :] = True
+        planner = SubprogramPlanner(table)
+        self.assertEqual([], planner.get_clusters())
+        self.assertEqual([[LineSegment(4, 0, Point(0, 2))]], planner.get_items())
+
+    def test_version7_clusters(self):
+        planner = SubprogramPlanner(make_table(7))
+        clusters = planner.get_clusters()
+        self.assertEqual([7, 5], [cluster.width for cluster in clusters])
+        self.assertEqual([3, 6], [len(cluster.origins) for cluster in clusters])
+        calls = [item for item in planner.get_items() if isinstance(item, SubprogramCall)]
+        self.assertEqual(9, len(calls))
+
+    def test_expanded_segments_cover_the_code(self):
+        for strategy in (Strategy.SERPENTINE, Strategy.MIN_PLUNGE):
+            for stay_down in (False, True):
+                table = make_table(8)
+                planner = SubprogramPlanner(table, strategy, stay_down=stay_down)
+                expanded = planner.get_expanded_segments()
+                inline = LinePath(table, strategy).get_vectors()
+                self.assertEqual(covered_modules(inline), covered_modules(expanded))
+                # No module is cut more often than inline (MIN_PLUNGE cuts crossings twice)
+                self.assertLessEqual(sum(len(covered_modules([segment])) for segment in expanded),
+                                     sum(len(covered_modules([segment])) for segment in inline))
+
+
+class TestSubprogramEmitter(unittest.TestCase):
+    def setUp(self):
+        polylines = [[LineSegment(2, 0, Point(0, 0))], [LineSegment(0, 0, Point(1, 2))]]
+        self.cluster = Cluster(1001, 3, [Point(0, 0), Point(5, 5)], polylines)
+
+    def test_m98_definition(self):
+        emitter = SubprogramEmitter(2, EngraveParams(), Tool(), SubprogramDialect.M98)
+        self.assertEqual('M98 P1001\n', emitter.call(self.cluster))
+        self.assertEqual('O1001\n'
+                         'G91\n'
+                         'G01 Z-0.9 F500\n'
+                         'G01 X4 F1000\n'
+                         'G00 Z0.9\n'
+                         'G00 X-2 Y-4\n'
+                         'G01 Z-0.9 F500\n'
+                         'G00 Z0.9\n'
+                         'G90\n'
+                         'M99\n', emitter.definition(self.cluster))
+
+    def test_o_call_definition(self):
+        emitter = SubprogramEmitter(2, EngraveParams(), Tool(), SubprogramDialect.O_CALL)
+        self.assertEqual('o1001 call\n', emitter.call(self.cluster))
+        definition = emitter.definition(self.cluster)
+        self.assertTrue(definition.startswith('o1001 sub\nG91\n'))
+        self.assertTrue(definition.endswith('G90\no1001 endsub\n'))
+
+
+class TestMachinifySubprograms(unittest.TestCase):
+    def setUp(self):
+        self.machinify = MachinifyVector(1.2)
+        self.machinify.set_qr_path(LinePath(make_table(7)))
+        self.machinify.set_tool(Tool())
+        self.machinify.set_engrave_params(EngraveParams())
+        self.machinify.set_xy_zero(Point(0, 0))
+
+    def write(self):
+        gcode = StringIO()
+        self.machinify.write_gcode(gcode)
+        return gcode.getvalue()
+
+    def test_default_is_inline(self):
+        self.assertEqual(SubprogramDialect.NONE, self.machinify.get_subprogram_dialect())
+        self.assertNotIn('M98', self.write())
+
+    def test_m98_program_is_shorter_and_defines_after_m30(self):
+        inline = self.write()
+        self.machinify.set_subprogram_dialect(SubprogramDialect.M98)
+        program = self.write()
+        self.assertLess(len(program), len(inline))
+        self.assertEqual(9, program.count('M98 P'))
+        self.assertLess(program.index('M30'), program.index('O1001\n'))
+        self.assertTrue(program.endswith('M99\n'))
+
+    def test_o_call_defines_before_program(self):
+        self.machinify.set_subprogram_dialect(SubprogramDialect.O_CALL)
+        program = self.write()
+        self.assertEqual(9, program.count(' call\n'))
+        self.assertLess(program.index('o1002 endsub'), program.index('G90 \n'))
+
+    def test_plunge_count_includes_calls(self):
+        self.machinify.set_subprogram_dialect(SubprogramDialect.M98)
+        planner = self.machinify._get_subprogram_planner()
+        self.assertEqual(len(planner.get_expanded_segments()), self.machinify.get_plunge_count())
+
+    def test_planner_reused_until_geometry_changes(self):
+        self.machinify.set_subprogram_dialect(SubprogramDialect.M98)
+        self.machinify.get_job_duration_sec()
+        planner = self.machinify._get_subprogram_planner()
+        self.write()
+        self.assertIs(planner, self.machinify._get_subprogram_planner())
+        self.machinify.set_stay_down(True)
+        self.assertIsNot(planner, self.machinify._get_subprogram_planner())
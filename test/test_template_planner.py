@@ -0,0 +1,131 @@
+import unittest
+
+import numpy as np
+from qrcodegen import QrCode
+
+from src.platform.vectorize_helper import QrValueTable, LineSegment, Point
+from src.platform.line_path import LinePath, Strategy, clear_plan_cache, _plan_cache
+from src.platform.machinify_vector import MachinifyVector, Tool, EngraveParams
+from src.platform.template_planner import SerialTemplate, function_module_mask, get_template, _join_runs
+
+
+def covered_modules(segments):
+    modules = set()
+    for segment in segments:
+        for step in range(abs(segment.x_length + segment.y_length) + 1):
+            dx = step if segment.x_length > 0 else -step if segment.x_length < 0 else 0
+            dy = step if segment.y_length > 0 else -step if segment.y_length < 0 else 0
+            modules.add((segment.position.x + dx, segment.position.y + dy))
+    return modules
+
+
+def dark_modules(qr):
+    table = QrValueTable()
+    table.set_qr(qr)
+    return {(x, y) for y, x in zip(*np.nonzero(table.table))}
+
+
+class TestFunctionModuleMask(unittest.TestCase):
+    def test_matches_encoder_function_modules(self):
+        for version in (1, 2, 6, 7, 14, 40):
+            size = version * 4 + 17
+            qr = QrCode.__new__(QrCode)  # only the fields _draw_function_patterns() needs
+            qr._version = version
+            qr._size = size
+            qr._errcorlvl = QrCode.Ecc.LOW
+            qr._modules = [[False] * size for _ in range(size)]
+            qr._isfunction = [[False] * size for _ in range(size)]
+            qr._draw_function_patterns()
+            np.testing.assert_array_equal(np.array(qr._isfunction), function_module_mask(version))
+
+
+class TestSerialTemplate(unittest.TestCase):
+    def setUp(self):
+        clear_plan_cache()
+
+    def test_path_covers_the_code(self):
+        for strategy in (Strategy.SERPENTINE, Strategy.RUN_LENGTH, Strategy.MIN_PLUNGE):
+            template = SerialTemplate(2, QrCode.Ecc.MEDIUM, 3, strategy)
+            for number in range(3):
+                qr = template.encode('SN-{:06d}'.format(number))
+                self.assertEqual(dark_modules(qr), covered_modules(template.make_path(qr).get_vectors()))
+            self.assertEqual(3, template.get_planned_count())
+
+    def test_fixed_segments_planned_once(self):
+        template = SerialTemplate(1, QrCode.Ecc.MEDIUM, 0)
+        self.assertIsNone(template.get_fixed_segments())
+        template.make_path(template.encode('SN-000001'))
+        fixed = template.get_fixed_segments()
+        template.make_path(template.encode('SN-000002'))
+        self.assertIs(fixed, template.get_fixed_segments())
+
+    def test_encode_uses_template_version_and_mask(self):
+        template = SerialTemplate(3, QrCode.Ecc.HIGH, 5)
+        qr = template.encode('x')
+        self.assertEqual((3, 5), (qr.get_version(), qr.get_mask()))
+        self.assertEqual(QrCode.Ecc.HIGH, qr.get_error_correction_level())
+
+    def test_encode_too_long_raises(self):
+        with self.assertRaises(ValueError):
+            SerialTemplate(1, QrCode.Ecc.HIGH, 0).encode('A' * 100)
+
+    def test_mismatching_code_raises(self):
+        template = SerialTemplate(1, QrCode.Ecc.MEDIUM, 0)
+        with self.assertRaises(ValueError):
+            template.make_path(SerialTemplate(1, QrCode.Ecc.MEDIUM, 1).encode('x'))
+        with self.assertRaises(ValueError):
+            template.make_path(SerialTemplate(1, QrCode.Ecc.LOW, 0).encode('x'))
+        with self.assertRaises(ValueError):
+            template.make_path(SerialTemplate(2, QrCode.Ecc.MEDIUM, 0).encode('x'))
+
+    def test_path_not_memoized(self):
+        clear_plan_cache()
+        template = SerialTemplate(1, QrCode.Ecc.MEDIUM, 0)
+        for serial in range(10):
+            template.make_path(template.encode('SN-{:06d}'.format(serial))).get_vectors()
+        self.assertEqual(1, len(_plan_cache))  # only the fixed region, no serial code
+
+    def test_streamed_path_uses_template_plan(self):
+        clear_plan_cache()
+        template = SerialTemplate(2, QrCode.Ecc.MEDIUM, 3)
+        qr = template.encode('SN-000042')
+
+        def write(path):
+            machinify = MachinifyVector(1.2)
+            machinify.set_qr_path(path)
+            machinify.set_tool(Tool())
+            machinify.set_engrave_params(EngraveParams())
+            machinify.set_xy_zero(Point(0, 0))
+            return machinify._gcode_engrave()
+        streamed = write(template.make_path(qr))  # no duration computed, the program streams the path
+        planned = template.make_path(qr)
+        vectors = planned.get_vectors()
+        self.assertEqual(write(planned), streamed)
+        self.assertEqual(vectors, list(template.make_path(qr).iter_vectors(materialize=False)))
+        self.assertEqual(1, len(_plan_cache))
+
+    def test_join_runs(self):
+        segments = [LineSegment(2, 0, Point(0, 1)), LineSegment(1, 0, Point(3, 1)),
+                    LineSegment(-1, 0, Point(5, 2)), LineSegment(-2, 0, Point(3, 2)),
+                    LineSegment(0, 0, Point(5, 3))]
+        self.assertEqual([LineSegment(4, 0, Point(0, 1)), LineSegment(-4, 0, Point(5, 2)),
+                          LineSegment(0, 0, Point(5, 3))], _join_runs(segments))
+
+
+class TestGetTemplate(unittest.TestCase):
+    def test_returns_same_template(self):
+        template = get_template(2, QrCode.Ecc.MEDIUM, 4)
+        self.assertIs(template, get_template(2, QrCode.Ecc.MEDIUM, 4))
+        self.assertIsNot(template, get_template(2, QrCode.Ecc.MEDIUM, 4, Strategy.MIN_PLUNGE))
+        self.assertIsNot(template, get_template(2, QrCode.Ecc.LOW, 4))
+
+
+class TestLinePathPreload(unittest.TestCase):
+    def test_preload_without_memo(self):
+        clear_plan_cache()
+        table = QrValueTable(3)
+        table.table[1, :] = True
+        path = LinePath(table)
+        path.preload([LineSegment(2, 0, Point(0, 1))], memoize=False)
+        self.assertEqual([LineSegment(2, 0, Point(0, 1))], list(path.get_vectors()))
+        self.assertEqual(0, len(_plan_cache))
@@ -0,0 +1,58 @@
+import unittest
+
+from qrcodegen import QrCode
+
+from src.platform.vectorize_helper import QrValueTable, LineSegment, Point
+from src.platform.line_path import LinePath
+from src.platform.path_optimizer import get_travel
+from src.platform.toolpath import Toolpath, TOOLPATH_DTYPE
+
+
+class TestToolpath(unittest.TestCase):
+    def setUp(self):
+        self.segments = [LineSegment(2, 0, Point(1, 0)),
+                         LineSegment(0, 3, Point(3, 4)),
+                         LineSegment(-1, 0, Point(6, 7))]
+        self.toolpath = Toolpath.from_segments(self.segments)
+
+    def test_fromsegments_stores_8bytes_per_segment(self):
+        self.assertEqual(3, len(self.toolpath))
+        self.assertEqual(TOOLPATH_DTYPE, self.toolpath.get_array().dtype)
+        self.assertEqual(24, self.toolpath.get_array().nbytes)
+
+    def test_iter_yields_equal_linesegments(self):
+        self.assertEqual(self.segments, list(self.toolpath))
+
+    def test_getitem_returns_linesegment(self):
+        self.assertEqual(LineSegment(0, 3, Point(3, 4)), self.toolpath[1])
+
+    def test_cut_lengths(self):
+        self.assertEqual([2, 3, 1], self.toolpath.get_cut_lengths().tolist())
+        self.assertEqual(6, self.toolpath.get_cut_length())
+
+    def test_travel_lengths_start_at_origin(self):
+        self.assertEqual([1, 4, 3], self.toolpath.get_travel_lengths().tolist())
+        self.assertEqual(8, self.toolpath.get_travel_length())
+
+    def test_travel_matches_linesegment_calculation(self):
+        table = QrValueTable()
+        table.set_qr(QrCode.encode_text('schallbert.de', QrCode.Ecc.MEDIUM))
+        segments = LinePath(table).get_vectors()
+        self.assertAlmostEqual(get_travel(segments), Toolpath.from_segments(segments).get_travel_length())
+
+    def test_bounding_box_covers_starts_and_ends(self):
+        self.assertEqual(tuple((1, 0, 6, 7)), self.toolpath.get_bounding_box())
+
+    def test_empty_toolpath(self):
+        toolpath = Toolpath.from_segments([])
+        self.assertEqual(0, len(toolpath))
+        self.assertEqual(0, toolpath.get_travel_length())
+        self.assertIsNone(toolpath.get_bounding_box())
+
+    def test_linepath_gettoolpath_matches_vectors(self):
+        path = LinePath(QrValueTable(2))
+        path.get_table().table[1, 1] = True
+        self.assertEqual(path.get_vectors(), list(path.get_toolpath()))
+
+    def test_linesegment_has_no_instance_dict(self):
+        self.assertFalse(hasattr(LineSegment(0, 0, Point()), '__dict__'))
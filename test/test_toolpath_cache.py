@@ -0,0 +1,115 @@
+import os
+import pickle
+import unittest
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+import numpy as np
+from qrcodegen import QrCode
+
+from src.platform.vectorize_helper import QrValueTable
+from src.platform import line_path
+from src.platform.line_path import LinePath, Strategy, clear_plan_cache
+from src.platform.toolpath_cache import ToolpathCache
+
+
+class TestToolpathCache(unittest.TestCase):
+    def setUp(self):
+        clear_plan_cache()
+        self.temp_dir = TemporaryDirectory()
+        self.directory = self.temp_dir.name
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_getpath_first_call_misses_second_hits(self):
+        cache = ToolpathCache(self.directory)
+        cache.get_path('schallbert.de')
+        cache.get_path('schallbert.de')
+        self.assertEqual(1, cache.get_misses())
+        self.assertEqual(1, cache.get_hits())
+
+    def test_getpath_matches_planning_from_scratch(self):
+        table = QrValueTable()
+        table.set_qr(QrCode.encode_text('schallbert.de', QrCode.Ecc.MEDIUM))
+        expect = LinePath(table).get_vectors()
+        ToolpathCache(self.directory).get_path('schallbert.de')
+        clear_plan_cache()
+        path = ToolpathCache(self.directory).get_path('schallbert.de')
+        self.assertTrue((table.table == path.get_table().table).all())
+        self.assertEqual(expect, path.get_vectors())
+
+    def test_getpath_hit_does_not_plan(self):
+        ToolpathCache(self.directory).get_path('schallbert.de', strategy=Strategy.MIN_PLUNGE)
+        clear_plan_cache()
+        cache = ToolpathCache(self.directory)
+        with patch('src.platform.line_path.MinPlungeDecomposer') as decomposer:
+            cache.get_path('schallbert.de', strategy=Strategy.MIN_PLUNGE).get_vectors()
+            decomposer.assert_not_called()
+        self.assertEqual(1, cache.get_hits())
+
+    def test_getpath_key_covers_ecc_mask_and_strategy(self):
+        cache = ToolpathCache(self.directory)
+        cache.get_path('schallbert.de')
+        cache.get_path('schallbert.de', ecc=QrCode.Ecc.HIGH)
+        cache.get_path('schallbert.de', mask=3)
+        cache.get_path('schallbert.de', strategy=Strategy.RUN_LENGTH)
+        self.assertEqual(4, cache.get_misses())
+        self.assertEqual(0, cache.get_hits())
+
+    def test_planner_version_change_invalidates_entries(self):
+        ToolpathCache(self.directory).get_path('schallbert.de')
+        with patch('src.platform.line_path.PLANNER_VERSION', 99):
+            cache = ToolpathCache(self.directory)
+            self.assertEqual([], os.listdir(self.directory))
+            cache.get_path('schallbert.de')
+            self.assertEqual(1, cache.get_misses())
+
+    def test_size_limit_evicts_least_recently_used(self):
+        cache = ToolpathCache(self.directory)
+        cache.get_path('first')
+        entry_size = cache.get_size_bytes()
+        cache = ToolpathCache(self.directory, max_bytes=int(2.5 * entry_size))
+        cache.get_path('second')
+        cache.get_path('first')
+        cache.get_path('third')
+        self.assertEqual(2, len(os.listdir(self.directory)))
+        cache.get_path('first')
+        cache.get_path('second')
+        self.assertEqual(2, cache.get_hits())
+        self.assertEqual(3, cache.get_misses())
+
+    def test_corrupt_entry_counts_as_miss(self):
+        cache = ToolpathCache(self.directory)
+        cache.get_path('schallbert.de')
+        for name in os.listdir(self.directory):
+            with open(os.path.join(self.directory, name), 'wb') as file:
+                file.write(b'garbage')
+        cache.get_path('schallbert.de')
+        self.assertEqual(2, cache.get_misses())
+
+    def test_malformed_entry_is_deleted_and_counts_as_miss(self):
+        cache = ToolpathCache(self.directory)
+        cache.get_path('schallbert.de')
+        malformed = [['not', 'a', 'dict'], {'planner_version': line_path.PLANNER_VERSION, 'size': 21},
+                     {'planner_version': line_path.PLANNER_VERSION, 'size': 21, 'modules': np.zeros(3, np.uint8),
+                      'segments': np.zeros((0, 4), np.int16)}]
+        for entry in malformed:
+            for name in os.listdir(self.directory):
+                with open(os.path.join(self.directory, name), 'wb') as file:
+                    pickle.dump(entry, file)
+            misses = cache.get_misses()
+            self.assertEqual(21, cache.get_path('schallbert.de').get_size())
+            self.assertEqual(misses + 1, cache.get_misses())
+        cache.get_path('schallbert.de')
+        self.assertEqual(1, cache.get_hits())
+
+    def test_write_error_returns_uncached_path(self):
+        cache = ToolpathCache(self.directory)
+        with patch('src.platform.toolpath_cache.pickle.dump', side_effect=OSError(28, 'No space left on device')):
+            path = cache.get_path('schallbert.de')
+        self.assertEqual(LinePath(path.get_table()).get_vectors(), path.get_vectors())
+        self.assertEqual([], os.listdir(self.directory))
+        self.assertEqual(0, cache.get_size_bytes())
+        cache.get_path('schallbert.de')
+        self.assertEqual(2, cache.get_misses())